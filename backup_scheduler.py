@@ -0,0 +1,192 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from db_common import log_to_csv
+
+# --- Config ---
+SCHEDULER_LOG_CSV = 'scheduler_log.csv'
+DEFAULT_RESTORE_BUDGET_S = 30.0
+HISTORY_FILES = {
+    'full_backup': 'full_backup_log.csv',
+    'full_restore': 'full_restore_log.csv',
+    'incremental_backup': 'incremental_backup_log.csv',
+    'incremental_restore': 'incremental_restore_log.csv',
+}
+
+# Per-row costs from experiment_log.txt (400k-500k rows, 10k-row batches),
+# used until the CSV history has enough points for a fit
+DEFAULT_SLOPES = {
+    'full_backup_time': 2.6e-6,      # s per row in the database
+    'full_backup_size': 9.2e-5,      # MB per row in the database
+    'full_restore_time': 2.3e-5,     # s per row restored
+    'inc_backup_time': 8.5e-6,       # s per changed row
+    'inc_backup_size': 5.6e-4,       # MB per changed row
+    'inc_apply_time': 8.5e-5,        # s per changed row replayed
+}
+
+scheduler_headers = ['batch', 'kind', 'decision', 'reason', 'records_total', 'chain_length', 'chain_rows',
+                     'predicted_backup_time_s', 'actual_backup_time_s',
+                     'predicted_backup_size_MB', 'actual_backup_size_MB',
+                     'predicted_restore_time_s', 'actual_restore_time_s', 'restore_budget_s']
+
+
+# --- Cost Model ---
+# Least-squares line over (rows, cost) samples. With fewer than two distinct
+# row counts the line goes through the origin (one sample) or falls back to
+# the default per-row slope (no samples).
+class CostModel:
+    def __init__(self, name, default_slope):
+        self.name = name
+        self.default_slope = default_slope
+        self.x = []
+        self.y = []
+        self.coef = (default_slope, 0.0)
+
+    def add(self, x, y):
+        if x is None or y is None or pd.isna(x) or pd.isna(y) or x <= 0:
+            return
+        self.x.append(float(x))
+        self.y.append(float(y))
+        self.fit()
+
+    def fit(self):
+        x = np.asarray(self.x)
+        y = np.asarray(self.y)
+        if len(np.unique(x)) >= 2:
+            slope, intercept = np.polyfit(x, y, 1)
+            self.coef = (max(slope, 0.0), intercept)
+        elif len(x):
+            self.coef = (float(np.sum(y) / np.sum(x)), 0.0)
+        else:
+            self.coef = (self.default_slope, 0.0)
+
+    def predict(self, x):
+        slope, intercept = self.coef
+        return max(slope * x + intercept, 0.0)
+
+    def __repr__(self):
+        return f"{self.name}: {self.coef[0]:.3g}*rows + {self.coef[1]:.3g} ({len(self.x)} samples)"
+
+
+def _read(path):
+    return pd.read_csv(path) if path and os.path.exists(path) else None
+
+
+# --- Scheduler ---
+# At each batch boundary: an incremental backup is taken unless the predicted
+# restore time of the resulting chain (last full restore + every incremental
+# replay) would exceed the restore budget, in which case a new full backup
+# starts a fresh chain.
+class BackupScheduler:
+    def __init__(self, restore_budget_s=DEFAULT_RESTORE_BUDGET_S, history=HISTORY_FILES, log_file=SCHEDULER_LOG_CSV):
+        self.restore_budget_s = restore_budget_s
+        self.log_file = log_file
+        self.models = {name: CostModel(name, slope) for name, slope in DEFAULT_SLOPES.items()}
+        self.full_records = 0
+        self.chain = []          # changed rows per incremental since the last full backup
+        self.pending = None
+        self.load_history(history)
+
+    def load_history(self, history):
+        m = self.models
+        full = _read(history.get('full_backup'))
+        if full is not None:
+            for row in full.itertuples():
+                m['full_backup_time'].add(row.records_total, row.backup_time_s)
+                m['full_backup_size'].add(row.records_total, row.backup_size_MB)
+        restore = _read(history.get('full_restore'))
+        if restore is not None:
+            for row in restore.itertuples():
+                m['full_restore_time'].add(row.total_records, row.restore_time_s)
+
+        inc = _read(history.get('incremental_backup'))
+        if inc is not None:
+            previous = None
+            for row in inc.itertuples():
+                if row.type == 'full':
+                    m['full_backup_time'].add(row.records_inserted, row.backup_time_s)
+                    m['full_backup_size'].add(row.records_inserted, row.backup_size_MB)
+                elif previous is not None and row.records_inserted > previous:
+                    m['inc_backup_time'].add(row.records_inserted - previous, row.backup_time_s)
+                    m['inc_backup_size'].add(row.records_inserted - previous, row.backup_size_MB)
+                previous = row.records_inserted
+        inc_restore = _read(history.get('incremental_restore'))
+        if inc_restore is not None and 'records' in inc_restore.columns:
+            for row in inc_restore.itertuples():
+                if row.phase == 'full':
+                    m['full_restore_time'].add(row.records, row.restore_time_s)
+                elif row.phase == 'incremental':
+                    m['inc_apply_time'].add(row.records, row.restore_time_s)
+
+    def predicted_restore_s(self, full_records, chain):
+        m = self.models
+        return m['full_restore_time'].predict(full_records) + sum(m['inc_apply_time'].predict(rows) for rows in chain)
+
+    # Record the full backup a chain starts from (e.g. the initial one)
+    def start_chain(self, records_total):
+        self.full_records = records_total
+        self.chain = []
+
+    def decide(self, batch, records_total, batch_rows):
+        m = self.models
+        incremental_restore = self.predicted_restore_s(self.full_records, self.chain + [batch_rows])
+        if incremental_restore <= self.restore_budget_s:
+            decision = {
+                'decision': 'incremental',
+                'reason': 'within budget',
+                'predicted_backup_time_s': m['inc_backup_time'].predict(batch_rows),
+                'predicted_backup_size_MB': m['inc_backup_size'].predict(batch_rows),
+                'predicted_restore_time_s': incremental_restore,
+            }
+        else:
+            decision = {
+                'decision': 'full',
+                'reason': f"chain restore {round(incremental_restore, 2)}s > budget",
+                'predicted_backup_time_s': m['full_backup_time'].predict(records_total),
+                'predicted_backup_size_MB': m['full_backup_size'].predict(records_total),
+                'predicted_restore_time_s': self.predicted_restore_s(records_total, []),
+            }
+        decision.update({'batch': batch, 'records_total': records_total, 'batch_rows': batch_rows})
+        self.pending = decision
+        return decision['decision']
+
+    # Feed the measured backup back into the models and log predicted vs actual
+    def observe_backup(self, backup_time_s, backup_size_MB):
+        d = self.pending
+        self.pending = None
+        if d['decision'] == 'full':
+            self.models['full_backup_time'].add(d['records_total'], backup_time_s)
+            self.models['full_backup_size'].add(d['records_total'], backup_size_MB)
+            self.start_chain(d['records_total'])
+        else:
+            self.models['inc_backup_time'].add(d['batch_rows'], backup_time_s)
+            self.models['inc_backup_size'].add(d['batch_rows'], backup_size_MB)
+            self.chain.append(d['batch_rows'])
+
+        log_to_csv(self.log_file, {
+            'batch': d['batch'], 'kind': 'backup', 'decision': d['decision'], 'reason': d['reason'],
+            'records_total': d['records_total'], 'chain_length': len(self.chain), 'chain_rows': sum(self.chain),
+            'predicted_backup_time_s': round(d['predicted_backup_time_s'], 3), 'actual_backup_time_s': backup_time_s,
+            'predicted_backup_size_MB': round(d['predicted_backup_size_MB'], 2), 'actual_backup_size_MB': backup_size_MB,
+            'predicted_restore_time_s': round(d['predicted_restore_time_s'], 2),
+            'restore_budget_s': self.restore_budget_s,
+        }, scheduler_headers)
+
+    # After an actual restore of the current chain
+    def observe_restore(self, batch, full_restore_s, apply_times_s):
+        predicted = self.predicted_restore_s(self.full_records, self.chain)
+        self.models['full_restore_time'].add(self.full_records, full_restore_s)
+        if len(apply_times_s) == len(self.chain):   # per-incremental timings (not a compacted replay)
+            for rows, seconds in zip(self.chain, apply_times_s):
+                self.models['inc_apply_time'].add(rows, seconds)
+        actual = round(full_restore_s + sum(apply_times_s), 2)
+        log_to_csv(self.log_file, {
+            'batch': batch, 'kind': 'restore', 'decision': '', 'reason': '',
+            'records_total': self.full_records + sum(self.chain), 'chain_length': len(self.chain),
+            'chain_rows': sum(self.chain),
+            'predicted_restore_time_s': round(predicted, 2), 'actual_restore_time_s': actual,
+            'restore_budget_s': self.restore_budget_s,
+        }, scheduler_headers)
+        return predicted, actual
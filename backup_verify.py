@@ -0,0 +1,299 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+from chunked_dump import integer_primary_key, list_tables, plan_chunks
+from compression import BLOCK_SIZE, digest_path, open_reader
+from db_common import log_to_csv
+from db_pool import ConnectionPool
+from stream_pipeline import DecompressStage, DecryptStage, DiscardSink, FileSource, HashStage, Pipeline, load_key
+
+# --- Config ---
+DB_HOST = 'localhost'
+DB_USER = 'testuser'
+DB_PASS = 'testpass'
+DB_NAME = 'testdb'
+DEFAULT_CHUNK_ROWS = 100000     # primary-key span hashed per range query
+DEFAULT_WORKERS = 4
+
+verify_headers = ['verified_at', 'tables', 'ranges', 'mismatched_ranges', 'rows_expected', 'rows_actual',
+                  'checksum_time_s', 'verify_time_s', 'artifacts', 'artifacts_failed']
+
+
+# --- Backup integrity without a restore ---
+# Artifacts: backup_command_to_file(..., digest=True) hashes the uncompressed
+# stream as it is written and leaves a .sha256 sidecar; verify_artifact()
+# re-reads the file through its codec and compares. Encrypted artifacts
+# (backup_command_to_file(..., key=...)) are decrypted on the fly with the same key.
+#
+# Tables: every primary-key range gets (rows, BIT_XOR, SUM) of a per-row CRC32
+# computed on the server, so only three numbers per range cross the wire. XOR
+# alone cancels on duplicated rows; the SUM and row count catch those. After a
+# restore the same ranges are recomputed in parallel and only the ranges that
+# differ are reported.
+
+
+# --- Artifact Digests ---
+def _stream_digest(path, codec, key):
+    hasher = HashStage()
+    transforms = [DecryptStage(key)] + ([DecompressStage(codec)] if codec != 'none' else []) + [hasher]
+    Pipeline(FileSource(path), transforms, DiscardSink()).run()
+    return hasher.hexdigest()
+
+
+def verify_artifact(path, codec='none', key=None):
+    with open(digest_path(path)) as f:
+        expected = f.read().split()[0]
+    if key is not None:
+        actual = _stream_digest(path, codec, key)
+    else:
+        hasher = hashlib.sha256()
+        with open_reader(path, codec) as src:
+            while True:
+                block = src.read(BLOCK_SIZE)
+                if not block:
+                    break
+                hasher.update(block)
+        actual = hasher.hexdigest()
+    return {'path': path, 'ok': actual == expected, 'expected': expected, 'actual': actual}
+
+
+def verify_artifacts(paths, codec='none', key=None):
+    results = [verify_artifact(path, codec, key) for path in paths if os.path.exists(digest_path(path))]
+    for result in results:
+        if not result['ok']:
+            print(f"[!] Artifact {result['path']} does not match its digest "
+                  f"(expected {result['expected'][:16]}..., got {result['actual'][:16]}...)")
+    return results
+
+
+# --- Range Hashes ---
+def row_hash_sql(columns):
+    values = ', '.join(f"`{c}`" for c in columns)
+    nulls = ', '.join(f"ISNULL(`{c}`)" for c in columns)
+    return f"CRC32(CONCAT_WS('#', {values}, {nulls}))"
+
+
+def range_hash(cursor, table, row_hash, pk, bounds):
+    where = ''
+    params = ()
+    if bounds == 'outside':
+        # Rows a restore added outside every source range (or to an empty source table)
+        where, params = table['outside_sql'], table['outside_params']
+    elif pk is not None:
+        where, params = f" WHERE `{pk}` BETWEEN %s AND %s", tuple(bounds)
+    cursor.execute(f"SELECT COUNT(*), COALESCE(BIT_XOR({row_hash}), 0), COALESCE(SUM({row_hash}), 0) "
+                   f"FROM `{table['name']}`{where}", params)
+    rows, xor, total = cursor.fetchone()
+    return [int(rows), int(xor), int(total)]
+
+
+def _outside(pk, ranges):
+    if not ranges:
+        return '', ()
+    return f" WHERE `{pk}` < %s OR `{pk}` > %s", (ranges[0][0], ranges[-1][1])
+
+
+def _run_parallel(conn_params, tasks, workers):
+    pool = ConnectionPool(conn_params, workers)
+
+    def run(task):
+        conn = pool.get()
+        try:
+            cursor = conn.cursor()
+            result = range_hash(cursor, *task)
+            cursor.close()
+            return result
+        finally:
+            conn.close()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, tasks))
+    finally:
+        pool.close()
+
+
+# --- Source Checksums ---
+def table_checksums(conn_params, chunk_rows=DEFAULT_CHUNK_ROWS, workers=DEFAULT_WORKERS, exclude=()):
+    start = time.time()
+    db_name = conn_params['database']
+    conn = mysql.connector.connect(**conn_params)
+    cursor = conn.cursor()
+    tables = []
+    for name in list_tables(cursor):
+        if name in exclude:
+            continue
+        cursor.execute(f"SHOW COLUMNS FROM `{name}`")
+        columns = [row[0] for row in cursor.fetchall()]
+        pk = integer_primary_key(cursor, db_name, name)
+        if pk is None:
+            bounds = [None]
+        else:
+            cursor.execute(f"SELECT MIN(`{pk}`), MAX(`{pk}`) FROM `{name}`")
+            bounds = plan_chunks(*cursor.fetchone(), chunk_rows)
+        tables.append({'name': name, 'columns': columns, 'primary_key': pk, 'bounds': bounds})
+    conn.close()
+
+    tasks = [(table, row_hash_sql(table['columns']), table['primary_key'], bounds)
+             for table in tables for bounds in table['bounds']]
+    results = iter(_run_parallel(conn_params, tasks, workers))
+    manifest = {
+        'database': db_name,
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'chunk_rows': chunk_rows,
+        'tables': [],
+    }
+    for table in tables:
+        manifest['tables'].append({
+            'name': table['name'],
+            'columns': table['columns'],
+            'primary_key': table['primary_key'],
+            'ranges': [[bounds[0], bounds[1]] + next(results) if bounds else [None, None] + next(results)
+                       for bounds in table['bounds']],
+        })
+    manifest['checksum_time_s'] = round(time.time() - start, 3)
+    return manifest
+
+
+def save_checksums(path, manifest):
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f)
+    os.replace(path + '.tmp', path)
+
+
+def load_checksums(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# --- Verify a Restored Database ---
+def verify_checksums(conn_params, manifest, workers=DEFAULT_WORKERS):
+    start = time.time()
+    conn = mysql.connector.connect(**conn_params)
+    cursor = conn.cursor()
+    present = set(list_tables(cursor))
+    conn.close()
+
+    mismatches = []
+    tasks, expected = [], []
+    for table in manifest['tables']:
+        if table['name'] not in present:
+            mismatches.append({'table': table['name'], 'start': None, 'end': None,
+                               'expected_rows': sum(r[2] for r in table['ranges']), 'actual_rows': 0})
+            continue
+        pk = table['primary_key']
+        sql, params = _outside(pk, table['ranges'])
+        entry = dict(table, outside_sql=sql, outside_params=params)
+        row_hash = row_hash_sql(table['columns'])
+        for start_id, end_id, *hashes in table['ranges']:
+            tasks.append((entry, row_hash, pk, (start_id, end_id) if pk is not None else None))
+            expected.append((table['name'], start_id, end_id, hashes))
+        if pk is not None:
+            tasks.append((entry, row_hash, pk, 'outside'))
+            expected.append((table['name'], 'outside', None, [0, 0, 0]))
+
+    actual = _run_parallel(conn_params, tasks, workers) if tasks else []
+    for (name, start_id, end_id, hashes), result in zip(expected, actual):
+        if result != hashes:
+            mismatches.append({'table': name, 'start': start_id, 'end': end_id,
+                               'expected_rows': hashes[0], 'actual_rows': result[0]})
+    return {
+        'tables': len(manifest['tables']),
+        'ranges': len(tasks),
+        'mismatches': mismatches,
+        'rows_expected': sum(r[2] for t in manifest['tables'] for r in t['ranges']),
+        'rows_actual': sum(result[0] for result in actual),
+        'verify_time_s': round(time.time() - start, 3),
+    }
+
+
+def print_mismatches(report, limit=20):
+    for m in report['mismatches'][:limit]:
+        if m['start'] == 'outside':
+            where = 'outside the source id range'
+        elif m['start'] is None:
+            where = 'whole table'
+        else:
+            where = f"ids {m['start']}-{m['end']}"
+        print(f"[!] {m['table']} {where}: expected {m['expected_rows']} rows, found {m['actual_rows']} (hash differs)")
+    if len(report['mismatches']) > limit:
+        print(f"[!] ... {len(report['mismatches']) - limit} more mismatching ranges")
+
+
+# --- Final verification step of the simulate_* scripts ---
+def verify_restore(conn_params, manifest, artifacts=(), codec='none', workers=DEFAULT_WORKERS, log_file=None):
+    report = verify_checksums(conn_params, manifest, workers)
+    results = verify_artifacts(artifacts, codec)
+    print_mismatches(report)
+    failed = sum(not r['ok'] for r in results)
+    status = '✔' if not report['mismatches'] and not failed else '!'
+    print(f"[{status}] {report['ranges']} ranges over {report['tables']} table(s) checked in {report['verify_time_s']}s: "
+          f"{len(report['mismatches'])} mismatching, {report['rows_actual']}/{report['rows_expected']} rows; "
+          f"{len(results) - failed}/{len(results)} artifact digest(s) match")
+    if log_file:
+        log_to_csv(log_file, {
+            'verified_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'tables': report['tables'],
+            'ranges': report['ranges'],
+            'mismatched_ranges': len(report['mismatches']),
+            'rows_expected': report['rows_expected'],
+            'rows_actual': report['rows_actual'],
+            'checksum_time_s': manifest.get('checksum_time_s', ''),
+            'verify_time_s': report['verify_time_s'],
+            'artifacts': len(results),
+            'artifacts_failed': failed,
+        }, verify_headers)
+    return report
+
+
+# --- CLI ---
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Backup artifact digests and table range checksums")
+    parser.add_argument('--host', default=DB_HOST)
+    parser.add_argument('--user', default=DB_USER)
+    parser.add_argument('--password', default=DB_PASS)
+    parser.add_argument('--database', default=DB_NAME)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    checksum = sub.add_parser('checksum', help='hash primary-key ranges of the source database')
+    checksum.add_argument('output')
+    checksum.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+
+    verify = sub.add_parser('verify', help='compare the live database against saved range hashes')
+    verify.add_argument('checksums')
+
+    artifact = sub.add_parser('artifact', help='check backup files against their .sha256 sidecars')
+    artifact.add_argument('paths', nargs='+')
+    artifact.add_argument('--codec', default='none')
+    artifact.add_argument('--key-file', default=None, help='AES key of encrypted artifacts (32 raw bytes or hex)')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = _parse_args(sys.argv[1:])
+    conn_params = dict(host=args.host, user=args.user, password=args.password, database=args.database)
+    if args.command == 'checksum':
+        manifest = table_checksums(conn_params, args.chunk_rows, args.workers)
+        save_checksums(args.output, manifest)
+        print(f"[✔] {sum(len(t['ranges']) for t in manifest['tables'])} ranges hashed "
+              f"in {manifest['checksum_time_s']}s -> {args.output}")
+    elif args.command == 'verify':
+        report = verify_checksums(conn_params, load_checksums(args.checksums), args.workers)
+        print_mismatches(report)
+        print(f"[i] {report['ranges']} ranges checked in {report['verify_time_s']}s, "
+              f"{len(report['mismatches'])} mismatching")
+        sys.exit(1 if report['mismatches'] else 0)
+    else:
+        key = load_key(args.key_file) if args.key_file else None
+        results = verify_artifacts(args.paths, args.codec, key)
+        print(f"[i] {sum(r['ok'] for r in results)}/{len(results)} artifacts match their digests")
+        sys.exit(0 if all(r['ok'] for r in results) else 1)
@@ -0,0 +1,258 @@
+import datetime
+import itertools
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from backup_verify import print_mismatches, table_checksums, verify_checksums
+from db_common import RowInserter, create_customers_table, get_db_size, log_to_csv, reset_database
+from live_load import LiveLoad, LoadWindow
+from resource_sampler import ResourceSampler
+from restore_predictor import RestorePredictor, benchmark_sample
+from results_store import append_runs, require_pyarrow
+from strategies import STRATEGIES
+from workload import Workload
+
+# --- Config ---
+DB_NAME = 'testdb'
+DB_USER = 'testuser'
+DB_PASS = 'testpass'
+BINLOG_DIR = '/var/log/mysql'
+WORK_DIR = 'benchmark_work'
+DEFAULT_MATRIX_FILE = 'benchmark_matrix.json'
+RUNS_CSV = 'benchmark_runs.csv'          # one row per run (warmups flagged)
+RESULTS_CSV = 'benchmark_results.csv'    # one row per cell and metric: mean / p50 / p95 / std
+SAMPLES_CSV = 'benchmark_resource_samples.csv'  # restore CPU / RSS / disk time series, labelled per run
+RESULTS_STORE_DIR = 'results_store'     # partitioned Parquet copy of every run (pyarrow); None disables it
+
+CONN_PARAMS = dict(host='localhost', user=DB_USER, password=DB_PASS, database=DB_NAME)
+
+# Every cell parameter with its default; the matrix overrides any of them
+DEFAULT_CELL = {
+    'strategy': 'full',
+    'initial_records': 400000,
+    'batches': 10,
+    'records_per_batch': 10000,
+    'engine': 'mysqldump',
+    'codec': 'none',
+    'sink': 'buffered',         # artifact writes: 'buffered', 'fadvise' or 'direct' (stream_pipeline.FileSink)
+    'workers': 1,
+    'compact': False,
+    'restore_mode': 'normal',
+    'apply_client': 'pool',
+    'live_load_rate': 0,        # rows/s of concurrent writes during every backup; 0 = off
+    'load_method': 'executemany',
+    'workload': '',             # workload JSON file; '' = the customers table only
+    'seed_workers': 1,
+    'seed': 42,
+}
+CELL_KEYS = list(DEFAULT_CELL)
+
+METRICS = ['insert_rows_per_s', 'initial_backup_time_s', 'backup_time_batch_avg_s', 'backup_time_total_s',
+           'backup_size_last_MB', 'backup_size_total_MB', 'db_size_MB',
+           'restore_time_s', 'full_restore_time_s', 'apply_time_s', 'compact_time_s', 'restore_rows_per_s',
+           'restore_cpu_avg', 'restore_cpu_peak', 'restore_mysqld_cpu_avg', 'restore_disk_write_MB',
+           'restore_iops_avg', 'restore_connect_time_s', 'checksum_time_s', 'verify_time_s',
+           'load_rows_per_s_avg', 'load_degradation_pct_avg', 'load_p99_ms_max']
+run_headers = ['run_id', 'cell_id', 'repetition', 'warmup', 'started_at'] + CELL_KEYS + METRICS + \
+              ['rows_expected', 'rows_restored', 'mismatched_ranges',
+               'predicted_restore_time_s', 'prediction_error_pct']
+
+
+# --- Matrix ---
+# {"repetitions": 3, "warmup": 1,
+#  "fixed":  {"load_method": "multirow"},
+#  "matrix": {"strategy": ["full", "incremental"], "initial_records": [100000, 400000], ...}}
+def load_matrix(path):
+    with open(path) as f:
+        config = json.load(f)
+    unknown = set(config.get('matrix', {})) | set(config.get('fixed', {}))
+    unknown -= set(CELL_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown matrix parameters: {sorted(unknown)}")
+    return config
+
+
+# Parameters a strategy ignores are reset to their defaults, so combinations
+# that differ only in those collapse into one cell
+def expand_cells(config):
+    matrix = config.get('matrix', {})
+    keys = list(matrix)
+    cells = []
+    seen = set()
+    skipped = 0
+    for values in itertools.product(*(matrix[key] for key in keys)):
+        cell = dict(DEFAULT_CELL, **config.get('fixed', {}))
+        cell.update(zip(keys, values))
+        if cell['strategy'] not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{cell['strategy']}', expected one of {sorted(STRATEGIES)}")
+        for key in STRATEGIES[cell['strategy']].ignores:
+            cell[key] = DEFAULT_CELL[key]
+        identity = tuple(cell[key] for key in CELL_KEYS)
+        if identity in seen:
+            skipped += 1
+            continue
+        seen.add(identity)
+        cell['cell_id'] = len(cells) + 1
+        cells.append(cell)
+    if skipped:
+        print(f"[i] Skipped {skipped} duplicate cells (parameters their strategy ignores)")
+    return cells
+
+
+# --- One Run: seed -> backups -> drop -> restore -> verify ---
+def run_once(cell, label=''):
+    reset_database(CONN_PARAMS)
+    create_customers_table(CONN_PARAMS)
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+    os.makedirs(WORK_DIR)
+
+    inserter = RowInserter(CONN_PARAMS, cell['seed_workers'], cell['seed'], method=cell['load_method'])
+    workload = Workload.load(cell['workload'], CONN_PARAMS, seed=cell['seed'],
+                             method=cell['load_method']) if cell['workload'] else None
+    if workload:
+        workload.create_schema()
+    strategy = STRATEGIES[cell['strategy']](cell, CONN_PARAMS, WORK_DIR, BINLOG_DIR)
+    live_load = LiveLoad(CONN_PARAMS, cell['live_load_rate']).start() if cell['live_load_rate'] else None
+    windows = []
+    try:
+        if workload:
+            insert_stats = workload.seed_rows(cell['initial_records'])
+        else:
+            insert_stats = inserter.insert('customers', cell['initial_records'])
+        with LoadWindow(live_load) as window:
+            initial = strategy.backup_initial()
+        windows.append(window.stats)
+        batches = []
+        for batch in range(1, cell['batches'] + 1):
+            if workload:
+                workload.apply_batch(cell['records_per_batch'])
+            else:
+                inserter.insert('customers', cell['records_per_batch'])
+            with LoadWindow(live_load) as window:
+                batches.append(strategy.backup_batch(batch))
+            windows.append(window.stats)
+    finally:
+        inserter.close()
+        if live_load:
+            live_load.stop()
+    db_size = get_db_size(CONN_PARAMS)
+    source_checksums = table_checksums(CONN_PARAMS, exclude=(live_load.table,) if live_load else ())
+    load = {key: [w[key] for w in windows if w[key] != ''] for key in ('load_rows_per_s', 'load_degradation_pct',
+                                                                      'load_p99_ms')}
+
+    reset_database(CONN_PARAMS)
+    with strategy.tuning, ResourceSampler(label, series_file=SAMPLES_CSV) as sampler:
+        restore = strategy.restore()
+    resources = sampler.summary
+    report = verify_checksums(CONN_PARAMS, source_checksums)
+    # Workload batches update and delete too; the source checksums hold the real row count
+    if workload:
+        rows_expected = report['rows_expected']
+    else:
+        rows_expected = cell['initial_records'] + cell['batches'] * cell['records_per_batch']
+    rows_restored = report['rows_actual']
+    if rows_restored != rows_expected or report['mismatches']:
+        print(f"[!] Cell {cell['cell_id']}: restored {rows_restored} rows, expected {rows_expected}, "
+              f"{len(report['mismatches'])} mismatching ranges")
+        print_mismatches(report, limit=5)
+
+    backups = [initial] + batches
+    return {
+        'insert_rows_per_s': insert_stats['rows_per_s'],
+        'initial_backup_time_s': initial['backup_time_s'],
+        'backup_time_batch_avg_s': round(np.mean([b['backup_time_s'] for b in batches]), 3) if batches else '',
+        'backup_time_total_s': round(sum(b['backup_time_s'] for b in backups), 2),
+        'backup_size_last_MB': backups[-1]['backup_size_MB'],
+        'backup_size_total_MB': round(sum(b['backup_size_MB'] for b in backups), 2),
+        'db_size_MB': db_size,
+        'restore_time_s': restore['restore_time_s'],
+        'full_restore_time_s': restore.get('full_restore_time_s', restore['restore_time_s']),
+        'apply_time_s': restore.get('apply_time_s', ''),
+        'compact_time_s': restore.get('compact_time_s', ''),
+        'restore_rows_per_s': round(rows_expected / restore['restore_time_s'], 1) if restore['restore_time_s'] > 0 else '',
+        'restore_cpu_avg': resources['sys_cpu_avg'],
+        'restore_cpu_peak': resources['sys_cpu_peak'],
+        'restore_mysqld_cpu_avg': resources['mysqld_cpu_avg'],
+        'restore_disk_write_MB': resources['disk_write_MB'],
+        'restore_iops_avg': resources['iops_avg'],
+        'restore_connect_time_s': restore.get('connect_time_s', ''),
+        'checksum_time_s': source_checksums['checksum_time_s'],
+        'verify_time_s': report['verify_time_s'],
+        'load_rows_per_s_avg': round(np.mean(load['load_rows_per_s']), 1) if load['load_rows_per_s'] else '',
+        'load_degradation_pct_avg': round(np.mean(load['load_degradation_pct']), 1) if load['load_degradation_pct'] else '',
+        'load_p99_ms_max': max(load['load_p99_ms']) if load['load_p99_ms'] else '',
+        'rows_expected': rows_expected,
+        'rows_restored': rows_restored,
+        'mismatched_ranges': len(report['mismatches']),
+    }
+
+
+# --- Aggregation: one tidy row per (cell, metric) ---
+def summarize(runs):
+    measured = runs[~runs['warmup']]
+    long = measured.melt(id_vars=['cell_id'] + CELL_KEYS, value_vars=METRICS, var_name='metric')
+    long['value'] = pd.to_numeric(long['value'], errors='coerce')
+    long = long.dropna(subset=['value'])
+    grouped = long.groupby(['cell_id'] + CELL_KEYS + ['metric'], sort=False)['value']
+    return grouped.agg(
+        n='count',
+        mean='mean',
+        p50='median',
+        p95=lambda v: np.percentile(v, 95),
+        std=lambda v: np.std(v, ddof=1) if len(v) > 1 else 0.0,
+    ).round(4).reset_index().sort_values('cell_id', kind='stable')
+
+
+def run_matrix(config):
+    if RESULTS_STORE_DIR:
+        require_pyarrow()       # before the runs, not after hours of them
+    cells = expand_cells(config)
+    repetitions = config.get('repetitions', 3)
+    warmup = config.get('warmup', 1)
+    run_id = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    print(f"[*] Benchmark {run_id}: {len(cells)} cells x ({warmup} warmup + {repetitions} runs)")
+
+    # Every measured restore is first predicted from the history so far; the error goes to prediction_log.csv
+    predictor = RestorePredictor.from_history()
+    rows = []
+    for cell in cells:
+        label = ', '.join(f"{key}={cell[key]}" for key in config.get('matrix', {}))
+        for rep in range(warmup + repetitions):
+            is_warmup = rep < warmup
+            print(f"[*] Cell {cell['cell_id']}/{len(cells)} ({label}) "
+                  f"{'warmup' if is_warmup else 'run'} {rep - warmup + 1 if not is_warmup else rep + 1}...")
+            started = time.time()
+            metrics = run_once(cell, f"{run_id} cell {cell['cell_id']} rep {rep + 1}")
+            row = {'run_id': run_id, 'cell_id': cell['cell_id'], 'repetition': rep - warmup + 1,
+                   'warmup': is_warmup, 'started_at': datetime.datetime.fromtimestamp(started).isoformat(timespec='seconds')}
+            row.update({key: cell[key] for key in CELL_KEYS})
+            row.update(metrics)
+            if not is_warmup:
+                check = predictor.check(benchmark_sample(row))
+                row['predicted_restore_time_s'] = check['predicted_restore_time_s']
+                row['prediction_error_pct'] = check['error_pct']
+            log_to_csv(RUNS_CSV, row, run_headers)
+            rows.append(row)
+            print(f"[✔] Backup total {metrics['backup_time_total_s']}s, restore {metrics['restore_time_s']}s "
+                  f"({round(time.time() - started, 1)}s wall)")
+
+    runs = pd.DataFrame(rows)
+    results = summarize(runs)
+    results.insert(0, 'run_id', run_id)
+    results.to_csv(RESULTS_CSV, mode='a', index=False, header=not os.path.exists(RESULTS_CSV))
+    print(f"[✔] {len(rows)} runs logged to {RUNS_CSV}, summary appended to {RESULTS_CSV}")
+    if RESULTS_STORE_DIR:
+        append_runs(runs, RESULTS_STORE_DIR, numeric=METRICS + ['predicted_restore_time_s', 'prediction_error_pct'])
+        print(f"[✔] Runs appended to {RESULTS_STORE_DIR}/")
+    return results
+
+
+if __name__ == '__main__':
+    matrix_file = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MATRIX_FILE
+    run_matrix(load_matrix(matrix_file))
@@ -0,0 +1,267 @@
+import argparse
+import bisect
+import io
+import os
+import re
+import sys
+import time
+
+import mysql.connector
+from mysql.connector.constants import ClientFlag
+
+from binlog_text import Statement, iter_items, open_text
+from db_common import log_to_csv
+from db_pool import ConnectionPool
+
+# --- Config ---
+DB_HOST = 'localhost'
+DB_USER = 'testuser'
+DB_PASS = 'testpass'
+DB_NAME = 'testdb'
+PIPELINE_STATEMENTS = 64            # statements sent per round trip
+PIPELINE_MAX_BYTES = 4 * 1024 * 1024    # keep one round trip well under max_allowed_packet
+PROGRESS_INTERVAL_S = 5.0
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+histogram_headers = (['label', 'statement_type', 'count', 'total_s', 'avg_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms']
+                     + [f"le_{bucket}ms" for bucket in LATENCY_BUCKETS_MS] + ['le_inf'])
+
+_CHARSET_CMD = re.compile(rb'^/\*!\\C\s+(\w+)')
+_VERSIONED = re.compile(rb'^/\*!\d*\s*')
+
+
+# --- Per statement type latency ---
+# Fixed millisecond buckets; percentiles are read back as the upper bound of
+# the bucket they fall in (the exact maximum is kept separately).
+class LatencyHistogram:
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, ms)
+
+    def percentile(self, pct):
+        target = self.count * pct / 100
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += n
+            if seen >= target:
+                return min(bound, round(self.max, 3))
+        return round(self.max, 3)
+
+    def row(self):
+        row = {
+            'count': self.count,
+            'total_s': round(self.total, 4),
+            'avg_ms': round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': round(self.max, 3),
+        }
+        row.update(zip(histogram_headers[9:], self.buckets))
+        return row
+
+
+def statement_type(text):
+    stripped = _VERSIONED.sub(b'', text.lstrip(), count=1).lstrip()
+    if not stripped:
+        return 'EMPTY'
+    return stripped.split(None, 1)[0].rstrip(b';').upper().decode('ascii', 'replace')
+
+
+# Line-iterable view over a generator of byte blocks (e.g. PITR byte ranges)
+class BlockStream(io.RawIOBase):
+    def __init__(self, blocks):
+        self.blocks = iter(blocks)
+        self.pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        while not self.pending:
+            try:
+                self.pending = next(self.blocks)
+            except StopIteration:
+                return 0
+        n = min(len(buf), len(self.pending))
+        buf[:n] = self.pending[:n]
+        self.pending = self.pending[n:]
+        return n
+
+
+# --- Streaming applier ---
+# Parses mysqlbinlog text output with binlog_text (DELIMITER switches,
+# BINLOG '<base64>' row events, session SETs) and replays it over one
+# persistent connection instead of piping every file into a `mysql` process.
+# Consecutive statements are sent as one multi-statement round trip; the
+# server answers them in order, so the time between two answers is that
+# statement's latency (the first one also carries the network round trip).
+#
+#   with BinlogApplier(CONN_PARAMS, tuning.session_sql()) as applier:
+#       for path in segments:
+#           applier.apply_file(path, codec, label=path)
+class BinlogApplier:
+    def __init__(self, conn_params, session_sql=(), pipeline=PIPELINE_STATEMENTS, max_bytes=PIPELINE_MAX_BYTES,
+                 histogram_file=None, progress_interval_s=PROGRESS_INTERVAL_S):
+        # mysql client defaults: autocommit on, so statements outside BEGIN/COMMIT commit on their own
+        self.pool = ConnectionPool(dict(conn_params, client_flags=[ClientFlag.MULTI_STATEMENTS]), size=1,
+                                   autocommit=True, session_sql=session_sql)
+        self.pipeline = max(pipeline, 1)
+        self.max_bytes = max_bytes
+        self.histogram_file = histogram_file
+        self.progress_interval_s = progress_interval_s
+        self.conn = None
+        self.cursor = None
+        self.round_trips = 0
+
+    def _connection(self):
+        if self.conn is None:
+            self.conn = self.pool.get()
+            self.cursor = self.conn.cursor()
+        return self.cursor
+
+    def _send(self, batch, histograms, source):
+        if not batch:
+            return
+        cursor = self._connection()
+        sql = b';\n'.join(statement.text for statement, _ in batch)
+        done = 0
+        last = time.perf_counter()
+        self.round_trips += 1
+        try:
+            cursor.execute(sql)
+            while True:
+                now = time.perf_counter()
+                kind = batch[min(done, len(batch) - 1)][1]
+                histograms.setdefault(kind, LatencyHistogram()).add(now - last)
+                last = now
+                done += 1
+                if not cursor.nextset():
+                    break
+        except mysql.connector.Error as e:
+            statement = batch[min(done, len(batch) - 1)][0]
+            raise RuntimeError(f"Binlog apply failed at byte {statement.offset} of {source}: {e.msg} "
+                               f"({statement.text[:120]!r})") from e
+        batch.clear()
+
+    def apply_stream(self, stream, label='', total_bytes=None, source=None):
+        start = time.time()
+        connect_before = self.pool.summary()['connect_time_s']
+        histograms = {}
+        batch = []
+        batch_bytes = 0
+        statements = events = 0
+        self.round_trips = 0
+        position = 0
+        next_report = time.time() + self.progress_interval_s
+        source = source or label
+
+        for item in iter_items(stream):
+            if not isinstance(item, Statement):
+                events += 1
+                continue
+            position = item.end_offset
+            charset = _CHARSET_CMD.match(item.text.lstrip())
+            if charset:
+                # `\C <charset>` is a mysql client command, not SQL
+                self._send(batch, histograms, source)
+                batch_bytes = 0
+                self._connection()
+                self.conn.set_charset_collation(charset.group(1).decode())
+                continue
+            if not item.text.strip():
+                continue
+            batch.append((item, statement_type(item.text)))
+            batch_bytes += len(item.text)
+            statements += 1
+            if len(batch) >= self.pipeline or batch_bytes >= self.max_bytes:
+                self._send(batch, histograms, source)
+                batch_bytes = 0
+
+            if self.progress_interval_s and time.time() >= next_report:
+                next_report = time.time() + self.progress_interval_s
+                done = f"{round(position / 1024 / 1024, 1)}"
+                if total_bytes:
+                    done += f"/{round(total_bytes / 1024 / 1024, 1)}"
+                print(f"[i] {label}: {done} MB, {events} events, {statements} statements "
+                      f"({round(position / 1024 / 1024 / (time.time() - start), 1)} MB/s)")
+
+        self._send(batch, histograms, source)
+
+        if self.histogram_file:
+            for kind in sorted(histograms):
+                log_to_csv(self.histogram_file, dict(histograms[kind].row(), label=label, statement_type=kind),
+                           histogram_headers)
+        duration = time.time() - start
+        slowest = max(histograms.items(), key=lambda kv: kv[1].total, default=(None, None))
+        return {
+            'restore_time_s': round(duration, 2),
+            'bytes': position,
+            'events': events,
+            'statements': statements,
+            'round_trips': self.round_trips,
+            'MB_per_s': round(position / 1024 / 1024 / duration, 1) if duration > 0 else 0.0,
+            'connect_time_s': round(self.pool.summary()['connect_time_s'] - connect_before, 4),
+            'slowest_type': slowest[0] or '',
+            'slowest_type_p95_ms': slowest[1].percentile(95) if slowest[1] else '',
+            'histograms': {kind: h.row() for kind, h in histograms.items()},
+        }
+
+    def apply_file(self, path, codec='none', label=None):
+        total = os.path.getsize(path) if codec == 'none' else None
+        with open_text(path, codec) as stream:
+            return self.apply_stream(stream, label or path, total, source=path)
+
+    def apply_blocks(self, blocks, label=''):
+        return self.apply_stream(io.BufferedReader(BlockStream(blocks)), label)
+
+    def close(self):
+        if self.conn is not None:
+            self.cursor.close()
+            self.conn.close()
+            self.conn = None
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def print_histograms(stats, limit=8):
+    rows = sorted(stats['histograms'].items(), key=lambda kv: kv[1]['total_s'], reverse=True)
+    for kind, row in rows[:limit]:
+        print(f"[i]   {kind:<10} {row['count']:>8} stmts  total {row['total_s']}s  "
+              f"p50 {row['p50_ms']}ms  p95 {row['p95_ms']}ms  p99 {row['p99_ms']}ms  max {row['max_ms']}ms")
+
+
+# --- Command Line ---
+#   python binlog_applier.py binlog_batch1.sql binlog_batch2.sql [--codec zstd] [--histogram applier_latency.csv]
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Replay mysqlbinlog text output in-process")
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--codec', default='none')
+    parser.add_argument('--pipeline', type=int, default=PIPELINE_STATEMENTS)
+    parser.add_argument('--histogram', default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = _parse_args(sys.argv[1:])
+    conn_params = dict(host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME)
+    with BinlogApplier(conn_params, pipeline=args.pipeline, histogram_file=args.histogram) as applier:
+        for path in args.paths:
+            stats = applier.apply_file(path, args.codec)
+            print(f"[✔] Applied {path} in {stats['restore_time_s']}s: {stats['events']} events, "
+                  f"{stats['statements']} statements in {stats['round_trips']} round trips ({stats['MB_per_s']} MB/s)")
+            print_histograms(stats)
@@ -0,0 +1,205 @@
+import os
+import re
+import sys
+import time
+
+from binlog_text import DATA_DELIMITER, binlog_body, gtid_next, iter_items, open_text, session_key, Statement
+from compression import open_writer
+
+# --- Config ---
+GROUP_TRANSACTIONS = 1000           # source transactions merged into one replayed transaction
+MAX_MERGED_BINLOG_BYTES = 8 * 1024 * 1024   # keep merged BINLOG statements well under max_allowed_packet
+
+COMPACT_HEADER = (
+    b"/*!50530 SET @@SESSION.PSEUDO_SLAVE_MODE=1*/;\n"
+    b"/*!50003 SET @OLD_COMPLETION_TYPE=@@COMPLETION_TYPE,COMPLETION_TYPE=0*/;\n"
+    b"DELIMITER /*!*/;\n"
+)
+COMPACT_FOOTER = (
+    b"DELIMITER ;\n"
+    b"# End of compacted log\n"
+    b"/*!50003 SET COMPLETION_TYPE=@OLD_COMPLETION_TYPE*/;\n"
+    b"/*!50530 SET @@SESSION.PSEUDO_SLAVE_MODE=0*/;\n"
+)
+
+_SET_TRANSACTION = re.compile(rb'^(/\*!\d+\s*)?SET TRANSACTION\b', re.IGNORECASE)
+
+
+# --- Compaction ---
+# Merges per-batch mysqlbinlog extracts into one replay stream:
+#   - the preamble / footer framing is written once instead of per segment
+#   - format description BINLOG statements are kept only when they change
+#   - session SETs are dropped when they repeat the value already in effect
+#   - GTID_NEXT assignments are dropped (unless keep_gtids) so consecutive
+#     transactions can be coalesced into groups of group_size
+#   - adjacent row-event BINLOG statements for the same table inside a group
+#     are concatenated (the server decodes multiple base64 chunks per statement)
+# A source ROLLBACK (only written for transactions that touched
+# non-transactional tables) rolls back the whole open group, so streams
+# containing them should be compacted with group_size=1.
+class BinlogCompactor:
+    def __init__(self, out, group_size=GROUP_TRANSACTIONS, keep_gtids=False,
+                 max_binlog_bytes=MAX_MERGED_BINLOG_BYTES):
+        self.out = out
+        self.group_size = 1 if keep_gtids else max(group_size, 1)
+        self.keep_gtids = keep_gtids
+        self.max_binlog_bytes = max_binlog_bytes
+
+        self.session = {}
+        self.format_event = None
+        self.in_group = False
+        self.in_txn = False
+        self.group_txns = 0
+        self.pending_rows = None    # (table, [base64 lines], size)
+
+        self.statements_in = self.statements_out = 0
+        self.transactions_in = self.transactions_out = 0
+        self.bytes_out = 0
+
+    def _write(self, text):
+        data = text + DATA_DELIMITER + b'\n'
+        self.out.write(data)
+        self.bytes_out += len(data)
+        self.statements_out += 1
+
+    def _flush_rows(self):
+        if self.pending_rows is None:
+            return
+        _, lines, _ = self.pending_rows
+        self.pending_rows = None
+        self._write(b"BINLOG '\n" + b'\n'.join(lines) + b"\n'")
+
+    def _close_group(self):
+        self._flush_rows()
+        if self.in_group:
+            self._write(b'COMMIT')
+            self.in_group = False
+            self.group_txns = 0
+            self.transactions_out += 1
+
+    def _row_statement(self, statement):
+        table = statement.event.table if statement.event is not None else None
+        lines = binlog_body(statement)
+        size = sum(len(line) for line in lines)
+        if self.pending_rows is not None:
+            pending_table, pending_lines, pending_size = self.pending_rows
+            if pending_table == table and pending_size + size <= self.max_binlog_bytes:
+                pending_lines.extend(lines)
+                self.pending_rows = (table, pending_lines, pending_size + size)
+                return
+            self._flush_rows()
+        self.pending_rows = (table, lines, size)
+
+    def feed(self, statement):
+        self.statements_in += 1
+        text = statement.text.strip()
+        keyword = statement.keyword()
+        event_type = statement.event.event_type if statement.event is not None else None
+
+        if keyword == b'BINLOG' and event_type == 'Start':
+            # Format description: identical for every extract of one server version
+            if text != self.format_event:
+                self._close_group()
+                self.format_event = text
+                self._write(text)
+            return
+
+        if keyword == b'BEGIN':
+            self.transactions_in += 1
+            self.in_txn = True
+            if self.in_group:
+                return
+            self._write(b'BEGIN')
+            self.in_group = True
+            return
+
+        if keyword in (b'COMMIT', b'ROLLBACK') and text.upper().startswith(keyword) and len(text) <= 40:
+            if keyword == b'ROLLBACK' and not self.in_txn:
+                return  # mysqlbinlog emits a defensive ROLLBACK at the start of each file
+            self.in_txn = False
+            if keyword == b'ROLLBACK':
+                self._flush_rows()
+                self._write(text)
+                self.in_group = False
+                self.group_txns = 0
+                return
+            self.group_txns += 1
+            if self.group_txns >= self.group_size:
+                self._close_group()
+            return
+
+        if gtid_next(statement) is not None:
+            if self.keep_gtids:
+                self._close_group()
+                self._write(text)
+            return
+
+        key = session_key(text)
+        if key is not None:
+            if self.session.get(key) == text:
+                return
+            self.session[key] = text
+            self._flush_rows()
+            self._write(text)
+            return
+
+        if self.in_group and _SET_TRANSACTION.match(text):
+            return  # only sets the next transaction's isolation level; a no-op for row replay
+
+        if keyword == b'BINLOG' and self.in_txn:
+            self._row_statement(statement)
+            return
+
+        if self.in_group and not self.in_txn:
+            # Non-transactional statement (DDL, FLUSH, ...) between
+            # grouped transactions: commit the group before running it
+            self._close_group()
+        self._flush_rows()
+        self._write(text)
+
+    def finish(self):
+        self._close_group()
+        if self.keep_gtids:
+            self._write(b"SET @@SESSION.GTID_NEXT= 'AUTOMATIC'")
+
+
+def compact_segments(paths, output, codec='none', out_codec=None, group_size=GROUP_TRANSACTIONS,
+                     keep_gtids=False, level=None, threads=0):
+    out_codec = codec if out_codec is None else out_codec
+    start = time.time()
+    with open_writer(output, out_codec, level, threads) as out:
+        out.write(COMPACT_HEADER)
+        compactor = BinlogCompactor(out, group_size=group_size, keep_gtids=keep_gtids)
+        for path in paths:
+            with open_text(path, codec) as src:
+                for item in iter_items(src):
+                    if isinstance(item, Statement) and item.is_data:
+                        compactor.feed(item)
+        compactor.finish()
+        out.write(COMPACT_FOOTER)
+
+    return {
+        'path': output,
+        'compact_time_s': round(time.time() - start, 2),
+        'segments_before': len(paths),
+        'segments_after': 1,
+        'bytes_before': sum(os.path.getsize(path) for path in paths),
+        'bytes_after': os.path.getsize(output),
+        'statements_before': compactor.statements_in,
+        'statements_after': compactor.statements_out,
+        'transactions_before': compactor.transactions_in,
+        'transactions_after': compactor.transactions_out,
+    }
+
+
+# --- Command Line ---
+# python binlog_compact.py <output.sql> <segment.sql> [<segment.sql> ...]
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print("Usage: python binlog_compact.py <output.sql> <segment.sql> [<segment.sql> ...]")
+        sys.exit(1)
+    stats = compact_segments(sys.argv[2:], sys.argv[1])
+    print(f"[✔] Compacted {stats['segments_before']} segments into {stats['path']} in {stats['compact_time_s']}s")
+    print(f"[i] {round(stats['bytes_before'] / 1024 / 1024, 2)} MB -> {round(stats['bytes_after'] / 1024 / 1024, 2)} MB, "
+          f"{stats['statements_before']} -> {stats['statements_after']} statements, "
+          f"{stats['transactions_before']} -> {stats['transactions_after']} transactions")
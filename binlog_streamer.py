@@ -0,0 +1,281 @@
+import asyncio
+import datetime
+import os
+import re
+import signal
+import time
+
+import mysql.connector
+
+from binlog_incremental import files_in_window, list_binlogs, load_checkpoint, master_status, save_checkpoint, window_bytes
+from db_common import log_to_csv
+from pitr_index import PitrIndex
+
+# --- Config ---
+DB_HOST = 'localhost'
+DB_USER = 'testuser'
+DB_PASS = 'testpass'
+SEGMENT_DIR = 'binlog_stream'
+STATE_FILE = os.path.join(SEGMENT_DIR, 'stream_checkpoint.json')
+SEGMENT_LOG_NAME = 'segments.csv'
+LAG_LOG_CSV = 'binlog_stream_lag.csv'
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+SEGMENT_MAX_SECONDS = 60
+FSYNC_INTERVAL_S = 1.0
+LAG_POLL_S = 1.0
+PITR_INDEX_FILE = os.path.join(SEGMENT_DIR, 'pitr_index.db')   # None disables indexing
+
+segment_headers = ['segment', 'start_file', 'start_pos', 'end_file', 'end_pos',
+                   'first_event_ts', 'last_event_ts', 'bytes', 'events']
+lag_headers = ['ts', 'streamed_file', 'streamed_pos', 'master_file', 'master_pos', 'lag_bytes', 'lag_seconds']
+
+_EVENT_HEADER = re.compile(rb'^#(\d{6})\s+(\d{1,2}):(\d\d):(\d\d)\s+server id \d+\s+end_log_pos (\d+)')
+_ROTATE = re.compile(rb'Rotate to (\S+)\s+pos: (\d+)')
+SEGMENT_FOOTER = (
+    b"SET @@SESSION.GTID_NEXT= 'AUTOMATIC' /* added by binlog_streamer */ /*!*/;\n"
+    b"DELIMITER ;\n"
+    b"# End of log file\n"
+    b"/*!50003 SET COMPLETION_TYPE=@OLD_COMPLETION_TYPE*/;\n"
+    b"/*!50530 SET @@SESSION.PSEUDO_SLAVE_MODE=0*/;\n"
+)
+
+
+def parse_event_time(match):
+    day = match.group(1).decode()
+    return datetime.datetime(2000 + int(day[0:2]), int(day[2:4]), int(day[4:6]),
+                             int(match.group(2)), int(match.group(3)), int(match.group(4))).timestamp()
+
+
+# --- Streamer ---
+# mysqlbinlog --read-from-remote-server --stop-never writes decoded events to
+# stdout as they arrive. Output is rolled into segment files that start with
+# the stream preamble (DELIMITER + format description event) and are only cut
+# right after a COMMIT, so each segment can be replayed into mysql on its own.
+class BinlogStreamer:
+    def __init__(self, conn_params, segment_dir=SEGMENT_DIR, state_file=STATE_FILE,
+                 max_bytes=SEGMENT_MAX_BYTES, max_seconds=SEGMENT_MAX_SECONDS,
+                 fsync_interval=FSYNC_INTERVAL_S, lag_poll=LAG_POLL_S, index_file=PITR_INDEX_FILE):
+        self.conn_params = conn_params
+        self.segment_dir = segment_dir
+        self.segment_log = os.path.join(segment_dir, SEGMENT_LOG_NAME)
+        self.state_file = state_file
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.fsync_interval = fsync_interval
+        self.lag_poll = lag_poll
+        self.index_file = index_file
+
+        self.proc = None
+        self.stopping = asyncio.Event()
+        self.preamble = []
+        self.segment = None
+        self.segment_no = 0
+        self.dirty = False
+
+        self.current_file = None
+        self.current_pos = None
+        self.last_end_pos = None
+        self.last_event_ts = None
+
+    # --- Blocking helpers (run in a thread) ---
+    def _server_status(self):
+        conn = mysql.connector.connect(**self.conn_params)
+        cursor = conn.cursor()
+        status = master_status(cursor)
+        binlogs = list_binlogs(cursor)
+        conn.close()
+        return status, binlogs
+
+    # --- Segment lifecycle ---
+    # Runs on the loop thread like every other segment operation, so a segment
+    # is never closed or truncated while it is being flushed
+    def _fsync(self):
+        if self.segment and self.dirty:
+            self.dirty = False
+            self.segment['file'].flush()
+            os.fsync(self.segment['file'].fileno())
+
+    def _open_segment(self):
+        self.segment_no += 1
+        name = f"segment_{self.segment_no:06d}.sql"
+        f = open(os.path.join(self.segment_dir, name), 'wb')
+        f.writelines(self.preamble)
+        self.segment = {
+            'name': name, 'file': f, 'opened': time.time(),
+            'start_file': self.current_file, 'start_pos': self.current_pos,
+            'first_event_ts': None, 'bytes': 0, 'events': 0,
+            'commit_bytes': 0, 'commit_events': 0, 'commit_end': None,
+        }
+
+    # On shutdown the segment is cut back to its last COMMIT, so a partially
+    # streamed transaction is never stored; the checkpoint resumes before it.
+    def _truncate_to_last_commit(self):
+        seg = self.segment
+        if seg is None or seg['commit_end'] is None:
+            if seg is not None:
+                seg['events'] = 0
+            return
+        seg['file'].seek(len(b''.join(self.preamble)) + seg['commit_bytes'])
+        seg['file'].truncate()
+        seg['bytes'], seg['events'] = seg['commit_bytes'], seg['commit_events']
+        self.current_file, self.current_pos = seg['commit_end']
+
+    def _close_segment(self):
+        seg = self.segment
+        if seg is None:
+            return
+        seg['file'].write(SEGMENT_FOOTER)
+        seg['file'].flush()
+        os.fsync(seg['file'].fileno())
+        seg['file'].close()
+        self.segment = None
+        if seg['events'] == 0:
+            os.remove(os.path.join(self.segment_dir, seg['name']))
+            self.segment_no -= 1
+            return
+        log_to_csv(self.segment_log, {
+            'segment': seg['name'],
+            'start_file': seg['start_file'], 'start_pos': seg['start_pos'],
+            'end_file': self.current_file, 'end_pos': self.current_pos,
+            'first_event_ts': seg['first_event_ts'], 'last_event_ts': self.last_event_ts,
+            'bytes': seg['bytes'], 'events': seg['events'],
+        }, segment_headers)
+        save_checkpoint(self.state_file, self.current_file, self.current_pos)
+        if self.index_file:
+            with PitrIndex(self.index_file) as index:
+                index.add_segment(os.path.join(self.segment_dir, seg['name']), 'none', seg['start_file'],
+                                  seg['start_pos'], self.current_file, self.current_pos)
+        print(f"[✔] Segment {seg['name']} closed at {self.current_file}:{self.current_pos} "
+              f"({seg['events']} events, {round(seg['bytes'] / 1024 / 1024, 2)} MB)")
+
+    def _segment_full(self):
+        seg = self.segment
+        return seg['bytes'] >= self.max_bytes or time.time() - seg['opened'] >= self.max_seconds
+
+    # --- Tasks ---
+    async def _read_stream(self):
+        in_preamble = True
+        seen_format_event = False
+        in_format_statement = False
+        after_commit = False
+        while True:
+            line = await self.proc.stdout.readline()
+            if not line:
+                break
+
+            if line.startswith(b'# at '):
+                position = int(line[5:].strip())
+                # Cut only on a transaction boundary, never mid-transaction
+                if self.segment and after_commit and self._segment_full():
+                    self.current_pos = position
+                    self._close_segment()
+                if not in_preamble and self.segment is None:
+                    self.current_pos = position
+                    self._open_segment()
+                self.current_pos = position
+                after_commit = False
+                if self.segment:
+                    self.segment['events'] += 1
+            elif line.startswith(b'#'):
+                header = _EVENT_HEADER.match(line)
+                if header and int(header.group(5)) > 0:
+                    self.last_end_pos = int(header.group(5))
+                    self.last_event_ts = parse_event_time(header)
+                    if self.segment and self.segment['first_event_ts'] is None:
+                        self.segment['first_event_ts'] = self.last_event_ts
+                rotate = _ROTATE.search(line)
+                if rotate:
+                    self.current_file = rotate.group(1).decode()
+                if b'Start: binlog' in line:
+                    seen_format_event = True
+            elif line.rstrip() == b'COMMIT/*!*/;':
+                after_commit = True
+
+            if in_preamble:
+                self.preamble.append(line)
+                # The preamble ends with the BINLOG '...' statement carrying the format
+                # description event. A binlog created at server startup has a
+                # ROLLBACK/*!*/; in front of it, which must not end the preamble early.
+                if seen_format_event and line.startswith(b"BINLOG '"):
+                    in_format_statement = True
+                if in_format_statement and line.rstrip().endswith(b"'/*!*/;"):
+                    in_preamble = False
+                continue
+
+            if self.segment:
+                self.segment['file'].write(line)
+                self.segment['bytes'] += len(line)
+                self.dirty = True
+                if after_commit and line.rstrip() == b'COMMIT/*!*/;':
+                    self.segment['commit_bytes'] = self.segment['bytes']
+                    self.segment['commit_events'] = self.segment['events']
+                    self.segment['commit_end'] = (self.current_file, self.last_end_pos)
+
+        self.stopping.set()
+
+    async def _fsync_loop(self):
+        while not self.stopping.is_set():
+            await asyncio.sleep(self.fsync_interval)
+            self._fsync()
+
+    async def _lag_loop(self):
+        while not self.stopping.is_set():
+            await asyncio.sleep(self.lag_poll)
+            if self.current_file is None or self.current_pos is None:
+                continue
+            try:
+                (master_file, master_pos), binlogs = await asyncio.to_thread(self._server_status)
+                files = files_in_window(binlogs, self.current_file, master_file)
+                lag_bytes = max(window_bytes(binlogs, files, self.current_pos, master_pos), 0)
+            except (mysql.connector.Error, RuntimeError, ValueError) as e:
+                print(f"[!] Lag check failed: {e}")
+                continue
+            lag_seconds = round(time.time() - self.last_event_ts, 2) if lag_bytes and self.last_event_ts else 0.0
+            log_to_csv(LAG_LOG_CSV, {
+                'ts': datetime.datetime.now().isoformat(timespec='milliseconds'),
+                'streamed_file': self.current_file, 'streamed_pos': self.current_pos,
+                'master_file': master_file, 'master_pos': master_pos,
+                'lag_bytes': lag_bytes, 'lag_seconds': lag_seconds,
+            }, lag_headers)
+
+    # --- Entry point ---
+    async def run(self):
+        os.makedirs(self.segment_dir, exist_ok=True)
+        state = load_checkpoint(self.state_file)
+        if state is None:
+            (log_file, position), _ = await asyncio.to_thread(self._server_status)
+            state = save_checkpoint(self.state_file, log_file, position)
+        self.current_file, self.current_pos = state['file'], state['position']
+        print(f"[*] Streaming binlogs from {self.current_file}:{self.current_pos} into {self.segment_dir}/")
+
+        self.proc = await asyncio.create_subprocess_exec(
+            "mysqlbinlog", "--read-from-remote-server", "--stop-never",
+            f"--host={self.conn_params['host']}", f"--user={self.conn_params['user']}",
+            f"--password={self.conn_params['password']}",
+            f"--start-position={self.current_pos}", self.current_file,
+            stdout=asyncio.subprocess.PIPE,
+            limit=64 * 1024 * 1024,  # statement-based events can be single very long lines
+        )
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stopping.set)
+
+        tasks = [asyncio.create_task(t) for t in (self._read_stream(), self._fsync_loop(), self._lag_loop())]
+        await self.stopping.wait()
+
+        if self.proc.returncode is None:
+            self.proc.terminate()
+            await self.proc.wait()
+        await tasks[0]
+        for task in tasks[1:]:
+            task.cancel()
+        self._truncate_to_last_commit()
+        self._close_segment()
+        print("[✔] Binlog streamer stopped.")
+
+
+# --- Run as a daemon ---
+if __name__ == '__main__':
+    conn_params = dict(host=DB_HOST, user=DB_USER, password=DB_PASS)
+    asyncio.run(BinlogStreamer(conn_params).run())
@@ -0,0 +1,160 @@
+import datetime
+import io
+import re
+
+from compression import BLOCK_SIZE, open_reader
+
+# --- mysqlbinlog Text Output Parser ---
+# mysqlbinlog prints every event as a "# at <pos>" line, a "#<date> <time>
+# server id ... end_log_pos ..." header line, optional comment lines and then
+# the statements for that event. After "DELIMITER /*!*/;" every statement ends
+# with "/*!*/;" (row events become BINLOG '<base64>' statements). The parser
+# yields a flat stream of items so callers can keep whatever state they need.
+DATA_DELIMITER = b'/*!*/;'
+
+_EVENT_HEADER = re.compile(
+    rb'^#(\d{6})\s+(\d{1,2}):(\d\d):(\d\d)\s+server id (\d+)\s+end_log_pos (\d+)'
+    rb'(?:\s+CRC32 0x[0-9a-fA-F]+)?\s*(.*)$'
+)
+_TABLE_MAP = re.compile(rb'Table_map: `([^`]+)`\.`([^`]+)` mapped to number (\d+)')
+_ROTATE = re.compile(rb'Rotate to (\S+)\s+pos: (\d+)')
+_SESSION_VARS = re.compile(rb'@@session\.(\w+)\s*=', re.IGNORECASE)
+_CHARSET_CMD = re.compile(rb'^/\*!\\C\s')
+_GTID_NEXT = re.compile(rb"^SET @@SESSION\.GTID_NEXT=\s*'([^']*)'", re.IGNORECASE)
+
+
+# Line-iterable reader for a (possibly compressed) mysqlbinlog text file
+def open_text(path, codec='none'):
+    src = open_reader(path, codec)
+    return io.BufferedReader(src, BLOCK_SIZE) if codec == 'zstd' else src
+
+
+class Event:
+    __slots__ = ('position', 'offset', 'timestamp', 'end_pos', 'event_type', 'info', 'table', 'rotate_to')
+
+    def __init__(self, position, offset):
+        self.position = position
+        self.offset = offset
+        self.timestamp = None
+        self.end_pos = None
+        self.event_type = None
+        self.info = b''
+        self.table = None
+        self.rotate_to = None
+
+
+class Statement:
+    __slots__ = ('text', 'delimiter', 'offset', 'end_offset', 'event')
+
+    def __init__(self, text, delimiter, offset, end_offset, event):
+        self.text = text
+        self.delimiter = delimiter
+        self.offset = offset
+        self.end_offset = end_offset
+        self.event = event
+
+    @property
+    def is_data(self):
+        return self.delimiter == DATA_DELIMITER
+
+    def keyword(self):
+        return self.text.lstrip().split(None, 1)[0].upper() if self.text.strip() else b''
+
+
+def event_epoch(match):
+    day = match.group(1).decode()
+    return datetime.datetime(2000 + int(day[0:2]), int(day[2:4]), int(day[4:6]),
+                             int(match.group(2)), int(match.group(3)), int(match.group(4))).timestamp()
+
+
+def _parse_header(event, line):
+    match = _EVENT_HEADER.match(line)
+    if not match:
+        return
+    event.end_pos = int(match.group(6))
+    if event.end_pos > 0:
+        event.timestamp = event_epoch(match)
+    rest = match.group(7).strip()
+    event.event_type = rest.split(b':', 1)[0].split(None, 1)[0].decode() if rest else None
+    event.info = rest
+    table = _TABLE_MAP.search(rest)
+    if table:
+        event.table = (table.group(1).decode(), table.group(2).decode())
+        event.event_type = 'Table_map'
+    rotate = _ROTATE.search(rest)
+    if rotate:
+        event.rotate_to = rotate.group(1).decode()
+        event.event_type = 'Rotate'
+
+
+# Yields Event objects (on "# at" lines) and Statement objects, in file order.
+# Byte offsets refer to the text file, so callers can slice it later.
+def iter_items(stream):
+    delimiter = b';'
+    buf = []
+    buf_offset = 0
+    offset = 0
+    event = None
+    table = None
+    for raw in stream:
+        line_offset = offset
+        offset += len(raw)
+        line = raw.rstrip(b'\r\n')
+
+        if not buf:
+            if line.startswith(b'# at '):
+                event = Event(int(line[5:].strip()), line_offset)
+                yield event
+                continue
+            if line.startswith(b'#'):
+                if event is not None and event.end_pos is None:
+                    _parse_header(event, line)
+                    # Row events inherit the table from the Table_map event before them
+                    if event.table is not None:
+                        table = event.table
+                    elif event.event_type and '_rows' in event.event_type.lower():
+                        event.table = table
+                continue
+            if line[:10].upper() == b'DELIMITER ':
+                delimiter = line[10:].strip()
+                continue
+            if not line.strip():
+                continue
+            buf_offset = line_offset
+
+        buf.append(line)
+        if line.rstrip().endswith(delimiter):
+            text = b'\n'.join(buf).rstrip()[:-len(delimiter)]
+            yield Statement(text, delimiter, buf_offset, offset, event)
+            buf = []
+
+
+def gtid_next(statement):
+    match = _GTID_NEXT.match(statement.text.lstrip())
+    return match.group(1).decode() if match else None
+
+
+# BINLOG '<base64 lines>' -> list of base64 lines
+def binlog_body(statement):
+    text = statement.text.strip()
+    start = text.index(b"'") + 1
+    end = text.rindex(b"'")
+    return [line for line in text[start:end].split(b'\n') if line]
+
+
+# Session statements repeated before every event; re-emitting an identical
+# value is a no-op, so each one is keyed by the variables it assigns.
+def session_key(text):
+    stripped = text.lstrip()
+    if _CHARSET_CMD.match(stripped):
+        return ('charset',)
+    if stripped[:14].upper() == b'SET TIMESTAMP=':
+        return ('timestamp',)
+    if stripped[:4].lower() == b'use ':
+        return ('use',)
+    if b'GTID_NEXT' in stripped.upper() or b'TRANSACTION' in stripped.upper():
+        return None
+    names = _SESSION_VARS.findall(stripped)
+    if names and (stripped[:4].upper() == b'SET ' or stripped.startswith(b'/*!')):
+        return tuple(name.lower() for name in names)
+    return None
@@ -0,0 +1,248 @@
+import datetime
+import json
+import os
+import queue
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import mysql.connector
+
+# --- Config ---
+DEFAULT_CHUNK_ROWS = 50000      # primary-key span per chunk file
+DEFAULT_WORKERS = 4
+INSERT_MAX_BYTES = 1024 * 1024  # split extended INSERTs like mysqldump's --net-buffer-length
+MANIFEST_NAME = 'manifest.json'
+
+_ESCAPES = str.maketrans({
+    '\\': '\\\\', "'": "\\'", '\0': '\\0', '\n': '\\n', '\r': '\\r', '\x1a': '\\Z'
+})
+
+
+# --- SQL Literal Encoding ---
+def sql_literal(value):
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return '0x' + value.hex() if value else "''"
+    if isinstance(value, datetime.timedelta):
+        seconds = int(value.total_seconds())
+        sign = '-' if seconds < 0 else ''
+        seconds = abs(seconds)
+        return f"'{sign}{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}'"
+    if isinstance(value, set):
+        value = ','.join(sorted(value))
+    return "'" + str(value).translate(_ESCAPES) + "'"
+
+
+# --- Table Discovery ---
+def list_tables(cursor):
+    cursor.execute("SHOW FULL TABLES WHERE Table_type = 'BASE TABLE'")
+    return [row[0] for row in cursor.fetchall()]
+
+
+# Single-column integer primary key, or None (the table is then dumped as one chunk)
+def integer_primary_key(cursor, db_name, table):
+    cursor.execute("""
+        SELECT k.COLUMN_NAME, c.DATA_TYPE
+        FROM information_schema.KEY_COLUMN_USAGE k
+        JOIN information_schema.COLUMNS c
+          ON c.TABLE_SCHEMA = k.TABLE_SCHEMA AND c.TABLE_NAME = k.TABLE_NAME AND c.COLUMN_NAME = k.COLUMN_NAME
+        WHERE k.TABLE_SCHEMA = %s AND k.TABLE_NAME = %s AND k.CONSTRAINT_NAME = 'PRIMARY'
+    """, (db_name, table))
+    rows = cursor.fetchall()
+    if len(rows) == 1 and rows[0][1] in ('tinyint', 'smallint', 'mediumint', 'int', 'bigint'):
+        return rows[0][0]
+    return None
+
+
+def plan_chunks(min_id, max_id, chunk_rows):
+    if min_id is None:
+        return []
+    return [(start, min(start + chunk_rows - 1, max_id)) for start in range(min_id, max_id + 1, chunk_rows)]
+
+
+# --- Consistent Snapshot ---
+# Tables are held under LOCK TABLES ... READ while every worker opens a
+# REPEATABLE READ snapshot, so all chunks see the same point in time without
+# needing the RELOAD privilege that FLUSH TABLES WITH READ LOCK requires.
+def open_snapshot_connections(conn_params, control_cursor, tables, workers):
+    control_cursor.execute("LOCK TABLES " + ", ".join(f"`{t}` READ" for t in tables))
+    conns = []
+    try:
+        for _ in range(workers):
+            conn = mysql.connector.connect(**conn_params)
+            conns.append(conn)
+            cursor = conn.cursor()
+            cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+            cursor.close()
+    except Exception:
+        for conn in conns:
+            conn.close()
+        raise
+    return conns
+
+
+def read_binlog_position(cursor):
+    try:
+        cursor.execute("SHOW MASTER STATUS")
+        row = cursor.fetchone()
+    except mysql.connector.Error:
+        return None
+    return {'file': row[0], 'position': row[1]} if row else None
+
+
+# --- Chunk Writer ---
+def write_chunk(conn, table, columns, pk, bounds, path):
+    start = time.time()
+    cursor = conn.cursor()
+    if pk is None:
+        cursor.execute(f"SELECT * FROM `{table}`")
+    else:
+        cursor.execute(f"SELECT * FROM `{table}` WHERE `{pk}` BETWEEN %s AND %s ORDER BY `{pk}`", bounds)
+
+    prefix = f"INSERT INTO `{table}` ({', '.join(f'`{c}`' for c in columns)}) VALUES "
+    rows = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        values = []
+        pending = len(prefix)
+        for row in cursor:
+            tuple_sql = '(' + ','.join(sql_literal(v) for v in row) + ')'
+            if values and pending + len(tuple_sql) > INSERT_MAX_BYTES:
+                f.write(prefix + ','.join(values) + ';\n')
+                values = []
+                pending = len(prefix)
+            values.append(tuple_sql)
+            pending += len(tuple_sql) + 1
+            rows += 1
+        if values:
+            f.write(prefix + ','.join(values) + ';\n')
+    cursor.close()
+    return {
+        'file': os.path.basename(path),
+        'start': bounds[0] if bounds else None,
+        'end': bounds[1] if bounds else None,
+        'rows': rows,
+        'bytes': os.path.getsize(path),
+        'dump_time_s': round(time.time() - start, 3),
+    }
+
+
+# --- Dump Engine ---
+def dump_database(conn_params, out_dir, chunk_rows=DEFAULT_CHUNK_ROWS, workers=DEFAULT_WORKERS):
+    start = time.time()
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+
+    db_name = conn_params['database']
+    control = mysql.connector.connect(**conn_params)
+    conns = []
+    try:
+        cursor = control.cursor()
+        tables = list_tables(cursor)
+
+        manifest = {
+            'database': db_name,
+            'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'chunk_rows': chunk_rows,
+            'workers': workers,
+            'binlog': None,
+            'snapshot_ts': None,        # when the snapshot was taken (the binlog position's time)
+            'tables': [],
+        }
+
+        conns = open_snapshot_connections(conn_params, cursor, tables, workers) if tables else []
+        plans = []
+        try:
+            manifest['binlog'] = read_binlog_position(cursor)
+            manifest['snapshot_ts'] = time.time()
+            for table in tables:
+                cursor.execute(f"SHOW CREATE TABLE `{table}`")
+                create_sql = cursor.fetchone()[1]
+                schema_file = f"{table}-schema.sql"
+                with open(os.path.join(out_dir, schema_file), 'w', encoding='utf-8') as f:
+                    f.write(f"DROP TABLE IF EXISTS `{table}`;\n{create_sql};\n")
+
+                cursor.execute(f"SHOW COLUMNS FROM `{table}`")
+                columns = [row[0] for row in cursor.fetchall()]
+                pk = integer_primary_key(cursor, db_name, table)
+                if pk is None:
+                    bounds_list = [None]
+                else:
+                    cursor.execute(f"SELECT MIN(`{pk}`), MAX(`{pk}`) FROM `{table}`")
+                    bounds_list = plan_chunks(*cursor.fetchone(), chunk_rows)
+                plans.append((table, columns, pk, schema_file, bounds_list))
+        finally:
+            if tables:
+                cursor.execute("UNLOCK TABLES")
+
+        # --- Dump chunks concurrently; each task borrows a snapshot connection ---
+        idle = queue.Queue()
+        for conn in conns:
+            idle.put(conn)
+
+        def run(table, columns, pk, bounds, path):
+            conn = idle.get()
+            try:
+                return write_chunk(conn, table, columns, pk, bounds, path)
+            finally:
+                idle.put(conn)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for table, columns, pk, schema_file, bounds_list in plans:
+                futures = [
+                    executor.submit(run, table, columns, pk, bounds,
+                                    os.path.join(out_dir, f"{table}.{i:05d}.sql"))
+                    for i, bounds in enumerate(bounds_list, 1)
+                ]
+                manifest['tables'].append({
+                    'name': table,
+                    'primary_key': pk,
+                    'schema_file': schema_file,
+                    'chunks': futures,
+                })
+            for entry in manifest['tables']:
+                entry['chunks'] = [f.result() for f in entry['chunks']]
+
+        for conn in conns:
+            conn.commit()
+    finally:
+        # Also on a failed dump: every snapshot connection and the control
+        # connection (whose session holds the table locks) is released
+        for conn in conns:
+            conn.close()
+        control.close()
+
+    manifest['dump_time_s'] = round(time.time() - start, 2)
+    manifest['rows'] = sum(c['rows'] for t in manifest['tables'] for c in t['chunks'])
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# --- Manifest Helpers ---
+def load_manifest(out_dir):
+    with open(os.path.join(out_dir, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+def dump_size_bytes(out_dir):
+    return sum(os.path.getsize(os.path.join(out_dir, name)) for name in os.listdir(out_dir))
+
+
+# Schema files first, then chunks in key order: replaying these into one
+# session reproduces the database like a single mysqldump file would.
+def iter_dump_files(out_dir, manifest=None):
+    manifest = manifest or load_manifest(out_dir)
+    for entry in manifest['tables']:
+        yield os.path.join(out_dir, entry['schema_file'])
+    for entry in manifest['tables']:
+        for chunk in entry['chunks']:
+            yield os.path.join(out_dir, chunk['file'])
@@ -0,0 +1,166 @@
+import csv
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+from chunked_dump import DEFAULT_WORKERS, load_manifest
+from db_pool import ConnectionPool
+
+# --- Session setup for every loader connection ---
+BULK_SESSION_SQL = [
+    "SET SESSION unique_checks = 0",
+    "SET SESSION foreign_key_checks = 0",
+]
+
+_DEFERRABLE_INDEX = re.compile(r'^(UNIQUE |FULLTEXT |SPATIAL )?KEY ')
+_INDEX_COLUMNS = re.compile(r'\(`([^`]+)`')
+
+
+# --- CREATE TABLE Splitting ---
+# Returns the CREATE TABLE without secondary indexes / foreign keys, plus the
+# clauses to add back with one ALTER TABLE once the data is loaded. An index
+# leading with the AUTO_INCREMENT column stays, since InnoDB requires one.
+def split_create_table(create_sql):
+    lines = create_sql.strip().rstrip(';').split('\n')
+    head, body, tail = lines[0], lines[1:-1], lines[-1]
+    definitions = [line.strip().rstrip(',') for line in body]
+
+    auto_inc = None
+    for definition in definitions:
+        if definition.startswith('`') and 'AUTO_INCREMENT' in definition:
+            auto_inc = definition.split('`')[1]
+
+    kept, indexes, foreign_keys = [], [], []
+    for definition in definitions:
+        if 'FOREIGN KEY' in definition:
+            foreign_keys.append(definition)
+        elif _DEFERRABLE_INDEX.match(definition):
+            cols = _INDEX_COLUMNS.search(definition[definition.index('('):])
+            if cols and cols.group(1) == auto_inc:
+                kept.append(definition)
+            else:
+                indexes.append(definition)
+        else:
+            kept.append(definition)
+
+    base_sql = head + '\n' + ',\n'.join('  ' + d for d in kept) + '\n' + tail
+    return base_sql, indexes, foreign_keys
+
+
+def read_create_table(schema_path):
+    with open(schema_path, encoding='utf-8') as f:
+        content = f.read()
+    # Schema files are "DROP TABLE IF EXISTS ...;\nCREATE TABLE ...;\n"
+    return content.split(';\n', 1)[1].strip().rstrip(';')
+
+
+# --- Chunk Loader ---
+def load_chunk(conn, path):
+    start = time.time()
+    cursor = conn.cursor()
+    statements = 0
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line:
+                continue
+            cursor.execute(line.rstrip(';'))
+            statements += 1
+    conn.commit()
+    cursor.close()
+    return statements, round(time.time() - start, 3)
+
+
+def open_loader_connection(conn_params, session_sql):
+    conn = mysql.connector.connect(**conn_params)
+    cursor = conn.cursor()
+    for sql in session_sql:
+        cursor.execute(sql)
+    cursor.close()
+    return conn
+
+
+# --- Restore Engine ---
+def restore_database(conn_params, dump_dir, workers=DEFAULT_WORKERS, defer_indexes=True,
+                     session_sql=BULK_SESSION_SQL):
+    start = time.time()
+    manifest = load_manifest(dump_dir)
+
+    # --- Create tables (secondary indexes and FKs deferred) ---
+    control = open_loader_connection(conn_params, session_sql)
+    cursor = control.cursor()
+    deferred = []
+    for entry in manifest['tables']:
+        create_sql = read_create_table(os.path.join(dump_dir, entry['schema_file']))
+        if defer_indexes:
+            create_sql, indexes, foreign_keys = split_create_table(create_sql)
+        else:
+            indexes, foreign_keys = [], []
+        cursor.execute(f"DROP TABLE IF EXISTS `{entry['name']}`")
+        cursor.execute(create_sql)
+        deferred.append((entry['name'], indexes, foreign_keys))
+
+    # --- Replay chunks over a pool of loader connections ---
+    pool = ConnectionPool(conn_params, workers, session_sql=session_sql)
+
+    def run(table, chunk):
+        conn = pool.get()
+        try:
+            statements, duration = load_chunk(conn, os.path.join(dump_dir, chunk['file']))
+        finally:
+            conn.close()
+        return {'table': table, 'file': chunk['file'], 'rows': chunk['rows'],
+                'statements': statements, 'restore_time_s': duration}
+
+    load_start = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run, entry['name'], chunk)
+                   for entry in manifest['tables'] for chunk in entry['chunks']]
+        chunk_stats = [f.result() for f in futures]
+    load_time = time.time() - load_start
+
+    pool.close()
+
+    # --- Rebuild deferred indexes, then foreign keys ---
+    index_start = time.time()
+    for table, indexes, _ in deferred:
+        if indexes:
+            cursor.execute(f"ALTER TABLE `{table}` " + ', '.join('ADD ' + d for d in indexes))
+    for table, _, foreign_keys in deferred:
+        if foreign_keys:
+            cursor.execute(f"ALTER TABLE `{table}` " + ', '.join('ADD ' + d for d in foreign_keys))
+    index_time = time.time() - index_start
+    cursor.close()
+    control.close()
+
+    duration = time.time() - start
+    rows = sum(c['rows'] for c in chunk_stats)
+    chunk_times = [c['restore_time_s'] for c in chunk_stats] or [0.0]
+    return {
+        'restore_time_s': round(duration, 2),
+        'load_time_s': round(load_time, 2),
+        'index_rebuild_s': round(index_time, 2),
+        'rows': rows,
+        'rows_per_s': round(rows / duration, 1) if duration > 0 else 0.0,
+        'chunks': len(chunk_stats),
+        'chunk_time_avg_s': round(sum(chunk_times) / len(chunk_times), 3),
+        'chunk_time_max_s': round(max(chunk_times), 3),
+        'workers': workers,
+        'connect_time_s': pool.summary()['connect_time_s'],
+        'chunk_stats': chunk_stats,
+    }
+
+
+# --- Per-chunk timings, written next to the restore CSV ---
+def log_chunk_stats(file_path, chunk_stats, run_label):
+    headers = ['run', 'table', 'file', 'rows', 'statements', 'restore_time_s']
+    write_header = not os.path.exists(file_path)
+    with open(file_path, mode='a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=headers)
+        if write_header:
+            writer.writeheader()
+        for stat in chunk_stats:
+            writer.writerow(dict(stat, run=run_label))
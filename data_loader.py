@@ -0,0 +1,126 @@
+import csv
+import io
+import os
+import tempfile
+import time
+
+# --- Config ---
+DEFAULT_BATCH_SIZE = 5000
+LOAD_METHODS = ('executemany', 'multirow', 'infile')
+
+
+# --- CSV Encoding (shared with LOAD DATA LOCAL INFILE) ---
+# Every field is enclosed in double quotes and embedded quotes are doubled,
+# so the file can be read back with ESCAPED BY '' and no backslash handling.
+def rows_to_csv_bytes(rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf, quoting=csv.QUOTE_ALL, lineterminator='\n')
+    writer.writerows(rows)
+    return buf.getvalue().encode('utf-8')
+
+
+# --- Batching ---
+def iter_batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --- Method: executemany (connector rewrites it into one multi-row INSERT) ---
+def _load_executemany(conn, table, columns, rows, batch_size):
+    cursor = conn.cursor()
+    placeholders = ", ".join(["%s"] * len(columns))
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    loaded = 0
+    for batch in iter_batches(rows, batch_size):
+        cursor.executemany(sql, batch)
+        conn.commit()
+        loaded += len(batch)
+    cursor.close()
+    return loaded
+
+
+# --- Method: explicit INSERT ... VALUES (...),(...) ---
+def _load_multirow(conn, table, columns, rows, batch_size):
+    cursor = conn.cursor()
+    row_placeholder = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    prefix = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+    loaded = 0
+    for batch in iter_batches(rows, batch_size):
+        sql = prefix + ", ".join([row_placeholder] * len(batch))
+        params = [value for row in batch for value in row]
+        cursor.execute(sql, params)
+        conn.commit()
+        loaded += len(batch)
+    cursor.close()
+    return loaded
+
+
+# --- Method: LOAD DATA LOCAL INFILE from a streamed temp file ---
+# Needs local_infile=ON on the server and allow_local_infile=True on the connection.
+# csv_chunks, when given, yields pre-encoded (bytes, row_count) pairs in the same
+# CSV format (see RowPool.csv_chunks) and is used instead of encoding rows here.
+def _load_infile(conn, table, columns, rows, batch_size, csv_chunks=None):
+    if csv_chunks is None:
+        csv_chunks = ((rows_to_csv_bytes(batch), len(batch)) for batch in iter_batches(rows, batch_size))
+    cursor = conn.cursor()
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{table}_", suffix='.csv')
+    loaded = 0
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk, count in csv_chunks:
+                f.write(chunk)
+                loaded += count
+        cursor.execute(f"""
+            LOAD DATA LOCAL INFILE '{tmp_path}'
+            INTO TABLE {table}
+            FIELDS TERMINATED BY ',' ENCLOSED BY '"' ESCAPED BY ''
+            LINES TERMINATED BY '\\n'
+            ({', '.join(columns)})
+        """)
+        conn.commit()
+    finally:
+        os.remove(tmp_path)
+    cursor.close()
+    return loaded
+
+
+# --- Public Entry Point ---
+def load_rows(conn, table, columns, rows, batch_size=DEFAULT_BATCH_SIZE, method='executemany',
+              csv_chunks=None, verbose=True):
+    if method not in LOAD_METHODS:
+        raise ValueError(f"Unknown load method '{method}', expected one of {LOAD_METHODS}")
+
+    start = time.time()
+    if method == 'executemany':
+        loaded = _load_executemany(conn, table, columns, rows, batch_size)
+    elif method == 'multirow':
+        loaded = _load_multirow(conn, table, columns, rows, batch_size)
+    else:
+        loaded = _load_infile(conn, table, columns, rows, batch_size, csv_chunks=csv_chunks)
+    duration = time.time() - start
+    rows_per_s = round(loaded / duration, 1) if duration > 0 else 0.0
+
+    if verbose:
+        print(f"[i] Loaded {loaded} rows into {table} via {method} "
+              f"in {round(duration, 2)}s ({rows_per_s} rows/s)")
+
+    return {
+        'rows': loaded,
+        'load_time_s': round(duration, 2),
+        'rows_per_s': rows_per_s,
+    }
+
+
+# --- Seeding from a RowPool: tuples for the INSERT methods, CSV bytes for infile ---
+def load_from_pool(conn, table, pool, count, batch_size=DEFAULT_BATCH_SIZE, method='executemany', verbose=True):
+    if method == 'infile':
+        return load_rows(conn, table, pool.columns, None, batch_size=batch_size, method=method,
+                         csv_chunks=pool.csv_chunks(count), verbose=verbose)
+    return load_rows(conn, table, pool.columns, pool.rows(count), batch_size=batch_size,
+                     method=method, verbose=verbose)
@@ -0,0 +1,122 @@
+import csv
+import os
+
+import mysql.connector
+
+from data_loader import DEFAULT_BATCH_SIZE, load_from_pool
+from db_pool import pooled_connection
+from parallel_seed import ParallelSeeder
+from row_generator import RowPool
+from stream_pipeline import STAGE_COLUMNS, stage_rows, summarize
+
+# --- Shared helpers for the simulate_* scripts and the benchmark harness ---
+
+CUSTOMERS_DDL = """
+CREATE TABLE customers (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100),
+    email VARCHAR(100),
+    address TEXT
+)
+"""
+
+
+# --- Log to CSV ---
+def log_to_csv(file_path, data, headers):
+    write_header = not os.path.exists(file_path)
+    with open(file_path, mode='a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=headers)
+        if write_header:
+            writer.writeheader()
+        writer.writerow(data)
+
+
+# Per-stage throughput / stall rows of a streamed backup or restore (stream_pipeline)
+def log_pipeline_stages(file_path, label, stages):
+    for row in stage_rows(label, stages):
+        log_to_csv(file_path, row, STAGE_COLUMNS)
+    if stages:
+        print(f"[i] Pipeline {label}: {summarize(stages)}")
+
+
+# --- DB Connection ---
+# Dedicated connection, for sessions whose settings must not leak into the
+# shared pools (server metrics, restore tuning, snapshots)
+def connect(conn_params, use_db=True, allow_local_infile=False):
+    params = dict(conn_params, allow_local_infile=allow_local_infile)
+    if not use_db:
+        params.pop('database', None)
+    return mysql.connector.connect(**params)
+
+
+# --- Client command lines (mysqldump / mysql / mysqlbinlog) ---
+def client_command(program, conn_params, *args):
+    cmd = [program, "-u", conn_params['user'], f"-p{conn_params['password']}"]
+    if conn_params.get('host', 'localhost') != 'localhost':
+        cmd += ["-h", conn_params['host']]
+    return cmd + list(args)
+
+
+# --- DB Size ---
+def get_db_size(conn_params):
+    conn = pooled_connection(conn_params)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT ROUND(SUM(data_length + index_length) / 1024 / 1024, 2)
+        FROM information_schema.tables
+        WHERE table_schema = %s
+    """, (conn_params['database'],))
+    size_mb = cursor.fetchone()[0]
+    conn.close()
+    return size_mb
+
+
+def create_customers_table(conn_params):
+    conn = pooled_connection(conn_params)
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS customers")
+    cursor.execute(CUSTOMERS_DDL)
+    conn.commit()
+    conn.close()
+
+
+def reset_database(conn_params):
+    conn = pooled_connection(conn_params, use_db=False)
+    cursor = conn.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS {conn_params['database']}")
+    cursor.execute(f"CREATE DATABASE {conn_params['database']}")
+    conn.commit()
+    conn.close()
+
+
+def row_count(conn_params, table='customers'):
+    conn = pooled_connection(conn_params)
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+    count = cursor.fetchone()[0]
+    conn.close()
+    return count
+
+
+# --- Row Inserter (in-process pool or parallel seeder) ---
+class RowInserter:
+    def __init__(self, conn_params, workers=1, seed=42, batch_size=DEFAULT_BATCH_SIZE, method='executemany'):
+        self.conn_params = conn_params
+        self.batch_size = batch_size
+        self.method = method
+        self.pool = RowPool(seed=seed) if workers == 1 else None
+        self.seeder = ParallelSeeder(conn_params, workers, seed, batch_size=batch_size,
+                                     method=method) if workers > 1 else None
+
+    def insert(self, table, count):
+        if self.seeder:
+            return self.seeder.seed_rows(table, count)
+        conn = pooled_connection(self.conn_params, allow_local_infile=(self.method == 'infile'))
+        stats = load_from_pool(conn, table, self.pool, count, batch_size=self.batch_size, method=self.method)
+        conn.close()
+        stats.update(workers=1, worker_rows_per_s_min=stats['rows_per_s'], worker_rows_per_s_max=stats['rows_per_s'])
+        return stats
+
+    def close(self):
+        if self.seeder:
+            self.seeder.close()
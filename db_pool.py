@@ -0,0 +1,257 @@
+import atexit
+import queue
+import threading
+import time
+
+import mysql.connector
+
+from binlog_text import open_text
+
+# --- Config ---
+DEFAULT_POOL_SIZE = 4
+HEALTH_CHECK_IDLE_S = 30.0      # ping a connection idle for longer than this before handing it out
+CHECKOUT_TIMEOUT_S = 300.0      # give up waiting for a free connection after this long
+
+# Session setup profiles; a pool runs its statements once per physical connection
+SESSION_PROFILES = {
+    'default': [],
+    'bulk': [
+        "SET SESSION unique_checks = 0",
+        "SET SESSION foreign_key_checks = 0",
+    ],
+}
+
+
+# --- Bounded connection pool ---
+# Connections are opened lazily up to `size` and handed out again after
+# close(), so helpers keep calling conn.close() exactly as with a plain
+# connection. Every new connection gets the session setup (sql_mode,
+# autocommit, session statements, hooks); setup survives reuse because the
+# session is never reset. Time spent opening connections is tracked apart
+# from the work done on them.
+#
+#   pool = ConnectionPool(CONN_PARAMS, size=4, session_sql=SESSION_PROFILES['bulk'])
+#   conn = pool.get()
+#   ...
+#   conn.close()            # back to the pool
+class PooledConnection:
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    def __init__(self, conn_params, size=DEFAULT_POOL_SIZE, use_db=True, allow_local_infile=False,
+                 autocommit=False, sql_mode=None, session_sql=(), hooks=()):
+        self.params = dict(conn_params, allow_local_infile=allow_local_infile)
+        if not use_db:
+            self.params.pop('database', None)
+        self.size = size
+        self.autocommit = autocommit
+        self.sql_mode = sql_mode
+        self.session_sql = list(session_sql)
+        self.hooks = list(hooks)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._open = 0
+        self.stats = {'connects': 0, 'connect_time_s': 0.0, 'checkouts': 0,
+                      'health_checks': 0, 'reconnects': 0, 'wait_time_s': 0.0}
+
+    def _count(self, key, value=1):
+        with self._lock:
+            self.stats[key] += value
+
+    def _setup(self, conn):
+        conn.autocommit = self.autocommit
+        cursor = conn.cursor()
+        if self.sql_mode is not None:
+            cursor.execute("SET SESSION sql_mode = %s", (self.sql_mode,))
+        for sql in self.session_sql:
+            cursor.execute(sql)
+        cursor.close()
+        for hook in self.hooks:
+            hook(conn)
+
+    def _open_connection(self):
+        start = time.time()
+        conn = mysql.connector.connect(**self.params)
+        self._setup(conn)
+        self._count('connects')
+        self._count('connect_time_s', time.time() - start)
+        with self._lock:
+            self._open += 1
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._open -= 1
+        try:
+            conn.close()
+        except mysql.connector.Error:
+            pass
+
+    def _healthy(self, conn, idle_since):
+        if time.time() - idle_since < HEALTH_CHECK_IDLE_S:
+            return True
+        self._count('health_checks')
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except mysql.connector.Error:
+            return False
+
+    def get(self, timeout=CHECKOUT_TIMEOUT_S):
+        start = time.time()
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No free connection in pool of {self.size} after {timeout}s")
+        self._count('wait_time_s', time.time() - start)
+        try:
+            while True:
+                try:
+                    conn, idle_since = self._idle.get_nowait()
+                except queue.Empty:
+                    conn = self._open_connection()
+                    break
+                if self._healthy(conn, idle_since):
+                    break
+                self._discard(conn)
+                self._count('reconnects')
+        except BaseException:
+            self._slots.release()
+            raise
+        self._count('checkouts')
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        try:
+            if conn.unread_result:
+                conn.consume_results()
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put((conn, time.time()))
+        except mysql.connector.Error:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def summary(self):
+        with self._lock:
+            stats = dict(self.stats, open=self._open, size=self.size)
+        stats['connect_time_s'] = round(stats['connect_time_s'], 4)
+        stats['wait_time_s'] = round(stats['wait_time_s'], 4)
+        return stats
+
+
+# --- Shared pools, one per connection settings ---
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(conn_params, use_db=True, allow_local_infile=False, profile='default', size=DEFAULT_POOL_SIZE,
+             extra_session_sql=()):
+    key = (tuple(sorted(conn_params.items())), use_db, allow_local_infile, profile, size, tuple(extra_session_sql))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(conn_params, size, use_db, allow_local_infile,
+                                         session_sql=SESSION_PROFILES[profile] + list(extra_session_sql))
+        return _pools[key]
+
+
+def pooled_connection(conn_params, use_db=True, allow_local_infile=False):
+    return get_pool(conn_params, use_db, allow_local_infile).get()
+
+
+# Connection setup totals over every shared pool (for per-phase diffs)
+def connect_stats():
+    with _pools_lock:
+        pools = list(_pools.values())
+    totals = {'pools': len(pools), 'connects': 0, 'connect_time_s': 0.0, 'checkouts': 0, 'reconnects': 0}
+    for pool in pools:
+        stats = pool.summary()
+        for key in ('connects', 'connect_time_s', 'checkouts', 'reconnects'):
+            totals[key] += stats[key]
+    totals['connect_time_s'] = round(totals['connect_time_s'], 4)
+    return totals
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_pools)
+
+
+# --- In-process apply of SQL dump files ---
+# Replays a (possibly compressed) mysqldump file on one pooled connection
+# instead of piping it into a `mysql` client process. Statements end with
+# the current delimiter at end of line; mysqldump writes every row batch on
+# a single line, so string literals never span lines.
+def iter_sql_statements(stream):
+    delimiter = b';'
+    buf = []
+    for raw in stream:
+        line = raw.rstrip(b'\r\n')
+        if not buf:
+            stripped = line.strip()
+            if not stripped or stripped.startswith(b'--') or stripped.startswith(b'#'):
+                continue
+            if stripped[:10].upper() == b'DELIMITER ':
+                delimiter = stripped[10:].strip()
+                continue
+        buf.append(line)
+        if line.rstrip().endswith(delimiter):
+            yield b'\n'.join(buf).rstrip()[:-len(delimiter)]
+            buf = []
+    if buf and b''.join(buf).strip():
+        yield b'\n'.join(buf)
+
+
+def apply_sql_file(pool, path, codec='none'):
+    start = time.time()
+    connect_before = pool.summary()['connect_time_s']
+    conn = pool.get()
+    cursor = conn.cursor()
+    statements = 0
+    try:
+        with open_text(path, codec) as src:
+            for statement in iter_sql_statements(src):
+                cursor.execute(statement)
+                if cursor.with_rows:
+                    cursor.fetchall()
+                statements += 1
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return {
+        'restore_time_s': round(time.time() - start, 2),
+        'statements': statements,
+        'connect_time_s': round(pool.summary()['connect_time_s'] - connect_before, 4),
+    }
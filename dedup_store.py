@@ -0,0 +1,173 @@
+import datetime
+import hashlib
+import json
+import os
+import subprocess
+import time
+
+import numpy as np
+
+# --- Config ---
+WINDOW = 48                     # bytes in the rolling hash window
+AVG_BITS = 13                   # boundary when the top AVG_BITS hash bits are zero -> ~8 KiB chunks
+MIN_CHUNK = 2 * 1024
+MAX_CHUNK = 64 * 1024
+READ_SIZE = 4 * 1024 * 1024
+
+_GEAR = np.random.default_rng(0x6765617223).integers(0, 2 ** 63, 256, dtype=np.uint64)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_SHIFT = np.uint64(64 - AVG_BITS)
+
+
+# --- Content-Defined Chunking ---
+# The rolling hash is the (wrapping) sum of per-byte gear values over the last
+# WINDOW bytes, taken as a difference of prefix sums so the whole buffer is
+# hashed with a few NumPy passes. A boundary depends only on nearby content,
+# so an insert early in a dump shifts offsets without changing later chunks.
+def candidate_cuts(buf):
+    if len(buf) <= WINDOW:
+        return np.empty(0, dtype=np.int64)
+    gear = _GEAR[np.frombuffer(buf, dtype=np.uint8)]
+    prefix = np.cumsum(gear, dtype=np.uint64)
+    window_hash = prefix[WINDOW:] - prefix[:-WINDOW]
+    hits = np.nonzero(((window_hash * _MIX) >> _SHIFT) == 0)[0]
+    return hits + WINDOW + 1
+
+
+def cut_points(buf, final):
+    cuts = []
+    last = 0
+    for cut in candidate_cuts(buf).tolist():
+        while cut - last > MAX_CHUNK:
+            last += MAX_CHUNK
+            cuts.append(last)
+        if cut - last >= MIN_CHUNK:
+            cuts.append(cut)
+            last = cut
+    while len(buf) - last > MAX_CHUNK:
+        last += MAX_CHUNK
+        cuts.append(last)
+    if final and last < len(buf):
+        cuts.append(len(buf))
+    return cuts
+
+
+def iter_chunks(stream):
+    carry = b''
+    while True:
+        block = stream.read(READ_SIZE)
+        final = not block
+        buf = carry + block
+        start = 0
+        for cut in cut_points(buf, final):
+            yield buf[start:cut]
+            start = cut
+        carry = buf[start:]
+        if final:
+            return
+
+
+# --- Deduplicated Backup Store ---
+# <root>/chunks/<aa>/<sha256>   each unique chunk, written once
+# <root>/manifests/<name>.json  ordered chunk list for one backup
+class DedupStore:
+    def __init__(self, root):
+        self.root = root
+        self.chunk_dir = os.path.join(root, 'chunks')
+        self.manifest_dir = os.path.join(root, 'manifests')
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        self.known = set()
+        for prefix in os.listdir(self.chunk_dir):
+            self.known.update(name for name in os.listdir(os.path.join(self.chunk_dir, prefix))
+                              if not name.endswith('.tmp'))
+
+    def _chunk_path(self, digest):
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def _manifest_path(self, name):
+        return os.path.join(self.manifest_dir, f"{name}.json")
+
+    def put_stream(self, name, stream):
+        start = time.time()
+        stats = self._store_chunks(name, stream)
+        self._write_manifest(name, stats.pop('manifest'))
+        stats['backup_time_s'] = round(time.time() - start, 2)
+        return stats
+
+    # Chunks are written as they arrive; the manifest that makes them a
+    # backup is left to the caller
+    def _store_chunks(self, name, stream):
+        chunks = []
+        total_bytes = new_bytes = new_chunks = 0
+        for chunk in iter_chunks(stream):
+            digest = hashlib.sha256(chunk).hexdigest()
+            chunks.append([digest, len(chunk)])
+            total_bytes += len(chunk)
+            if digest not in self.known:
+                path = self._chunk_path(digest)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + '.tmp', 'wb') as f:
+                    f.write(chunk)
+                os.replace(path + '.tmp', path)
+                self.known.add(digest)
+                new_bytes += len(chunk)
+                new_chunks += 1
+
+        return {
+            'name': name,
+            'manifest': {
+                'name': name,
+                'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+                'size': total_bytes,
+                'chunks': chunks,
+            },
+            'raw_MB': round(total_bytes / 1024 / 1024, 2),
+            'new_MB': round(new_bytes / 1024 / 1024, 2),
+            'chunks': len(chunks),
+            'new_chunks': new_chunks,
+            'dedup_ratio': round(total_bytes / new_bytes, 2) if new_bytes else None,
+        }
+
+    def _write_manifest(self, name, manifest):
+        with open(self._manifest_path(name), 'w') as f:
+            json.dump(manifest, f)
+
+    # Stream a producer's stdout (e.g. mysqldump) straight into the store. A
+    # producer that fails leaves no manifest: its chunks stay unreferenced and
+    # the truncated stream never shows up as a backup
+    def put_command(self, name, cmd):
+        start = time.time()
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+        stats = self._store_chunks(name, proc.stdout)
+        if proc.wait() != 0:
+            raise RuntimeError(f"Backup command {cmd[0]} exited with code {proc.returncode}; {name} not stored")
+        self._write_manifest(name, stats.pop('manifest'))
+        stats['backup_time_s'] = round(time.time() - start, 2)
+        return stats
+
+    def load_manifest(self, name):
+        with open(self._manifest_path(name)) as f:
+            return json.load(f)
+
+    def iter_backup(self, name):
+        for digest, _ in self.load_manifest(name)['chunks']:
+            with open(self._chunk_path(digest), 'rb') as f:
+                yield f.read()
+
+    # Stream a stored backup back into a consumer's stdin (e.g. mysql)
+    def restore_to_command(self, name, cmd):
+        start = time.time()
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        for chunk in self.iter_backup(name):
+            proc.stdin.write(chunk)
+        proc.stdin.close()
+        if proc.wait() != 0:
+            raise RuntimeError(f"Restore command {cmd[0]} exited with code {proc.returncode} restoring {name}")
+        return {'restore_time_s': round(time.time() - start, 2)}
+
+    def list_backups(self):
+        return sorted(name[:-5] for name in os.listdir(self.manifest_dir) if name.endswith('.json'))
+
+    def stored_bytes(self):
+        return sum(os.path.getsize(self._chunk_path(digest)) for digest in self.known)
@@ -0,0 +1,168 @@
+import threading
+import time
+
+import mysql.connector
+import numpy as np
+
+from db_common import CUSTOMERS_DDL
+from db_pool import ConnectionPool
+from row_generator import RowPool
+
+# --- Config ---
+DEFAULT_RATE = 200              # rows/s across all writers; 0 = as fast as the writers can go
+DEFAULT_WRITERS = 4
+DEFAULT_ROWS_PER_TXN = 10
+DEFAULT_TABLE = 'live_load'     # same schema as customers, kept apart so verification stays deterministic
+BASELINE_WINDOW_S = 2.0         # undisturbed load measured right before every backup
+REFILL_ROWS = 2000              # rows a writer takes from the shared pool at a time
+
+LOAD_COLUMNS = ['load_rate_target', 'load_baseline_rows_per_s', 'load_rows_per_s', 'load_degradation_pct',
+                'load_baseline_p99_ms', 'load_p50_ms', 'load_p95_ms', 'load_p99_ms', 'load_max_ms', 'load_errors']
+
+
+# --- Foreground write load ---
+# A pool of writer threads inserts rows_per_txn rows per transaction into its
+# own table while backups run. Writers follow a fixed schedule (rate / writers
+# rows per second each); latency is measured from the scheduled start, so a
+# writer stalled behind a backup lock is charged for every transaction that
+# queued up behind the stall, not just the one that was blocked.
+#
+#   load = LiveLoad(CONN_PARAMS, rate=500).start()
+#   with LoadWindow(load) as window:
+#       take_backup()
+#   print(window.stats)
+#   load.stop()
+class LiveLoad:
+    def __init__(self, conn_params, rate=DEFAULT_RATE, writers=DEFAULT_WRITERS, rows_per_txn=DEFAULT_ROWS_PER_TXN,
+                 seed=7, table=DEFAULT_TABLE):
+        self.conn_params = conn_params
+        self.rate = rate
+        self.writers = writers
+        self.rows_per_txn = rows_per_txn
+        self.table = table
+        self.row_pool = RowPool(seed=seed, pool_size=50000)
+        self.pool = ConnectionPool(conn_params, size=writers)
+        self.samples = []           # (end, latency_s, rows); list.append is atomic
+        self.errors = []
+        self._rows_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _take_rows(self, count):
+        with self._rows_lock:
+            return list(self.row_pool.rows(count))
+
+    def _writer(self):
+        conn = self.pool.get()
+        cursor = conn.cursor()
+        columns = self.row_pool.columns
+        sql = (f"INSERT INTO `{self.table}` ({', '.join(columns)}) "
+               f"VALUES ({', '.join(['%s'] * len(columns))})")
+        interval = self.rows_per_txn * self.writers / self.rate if self.rate else 0.0
+        buffer = []
+        due = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                if interval:
+                    wait = due - time.perf_counter()
+                    if wait > 0 and self._stop.wait(wait):
+                        break
+                if len(buffer) < self.rows_per_txn:
+                    buffer += self._take_rows(REFILL_ROWS)
+                rows, buffer = buffer[:self.rows_per_txn], buffer[self.rows_per_txn:]
+                started = due if interval else time.perf_counter()
+                try:
+                    cursor.executemany(sql, rows)
+                    conn.commit()
+                    end = time.perf_counter()
+                    self.samples.append((end, end - started, len(rows)))
+                except mysql.connector.Error as e:
+                    self.errors.append((time.perf_counter(), e.msg))
+                    conn.rollback()
+                due += interval
+        finally:
+            cursor.close()
+            conn.close()
+
+    def start(self):
+        conn = self.pool.get()
+        cursor = conn.cursor()
+        cursor.execute(f"DROP TABLE IF EXISTS `{self.table}`")
+        # Own copy of the customers schema, whatever tables the workload created
+        cursor.execute(CUSTOMERS_DDL.replace("CREATE TABLE customers", f"CREATE TABLE `{self.table}`"))
+        cursor.close()
+        conn.close()
+        for _ in range(self.writers):
+            thread = threading.Thread(target=self._writer, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        rate = f"{self.rate} rows/s" if self.rate else "unthrottled"
+        print(f"[*] Live load: {self.writers} writers into `{self.table}` ({rate}, {self.rows_per_txn} rows/txn)")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.pool.close()
+        rows = sum(s[2] for s in self.samples)
+        print(f"[✔] Live load stopped: {rows} rows in {len(self.samples)} transactions, {len(self.errors)} errors")
+        return rows
+
+    def now(self):
+        return time.perf_counter()
+
+    # Throughput and latency of the transactions that finished in [start, end)
+    def window_stats(self, start, end):
+        window = [s for s in self.samples if start <= s[0] < end]
+        latencies = np.array([s[1] for s in window]) * 1000
+        duration = end - start
+        stats = {
+            'transactions': len(window),
+            'rows': sum(s[2] for s in window),
+            'errors': sum(1 for t, _ in self.errors if start <= t < end),
+        }
+        stats['rows_per_s'] = round(stats['rows'] / duration, 1) if duration > 0 else 0.0
+        for pct in (50, 95, 99):
+            stats[f"p{pct}_ms"] = round(float(np.percentile(latencies, pct)), 2) if len(latencies) else ''
+        stats['max_ms'] = round(float(latencies.max()), 2) if len(latencies) else ''
+        return stats
+
+    def baseline(self, seconds=BASELINE_WINDOW_S):
+        start = self.now()
+        time.sleep(seconds)
+        return self.window_stats(start, self.now())
+
+
+# --- Load measured around one backup ---
+class LoadWindow:
+    def __init__(self, load):
+        self.load = load
+        self.stats = dict.fromkeys(LOAD_COLUMNS, '')
+
+    def __enter__(self):
+        if self.load:
+            self.baseline = self.load.baseline()
+            self.start = self.load.now()
+        return self
+
+    def __exit__(self, *exc):
+        if not self.load:
+            return
+        during = self.load.window_stats(self.start, self.load.now())
+        base = self.baseline['rows_per_s']
+        self.stats = {
+            'load_rate_target': self.load.rate,
+            'load_baseline_rows_per_s': base,
+            'load_rows_per_s': during['rows_per_s'],
+            'load_degradation_pct': round((1 - during['rows_per_s'] / base) * 100, 1) if base else '',
+            'load_baseline_p99_ms': self.baseline['p99_ms'],
+            'load_p50_ms': during['p50_ms'],
+            'load_p95_ms': during['p95_ms'],
+            'load_p99_ms': during['p99_ms'],
+            'load_max_ms': during['max_ms'],
+            'load_errors': during['errors'],
+        }
+        print(f"[i] Live load during backup: {during['rows_per_s']} rows/s (baseline {base}), "
+              f"p99 {during['p99_ms']} ms (baseline {self.baseline['p99_ms']} ms)")
@@ -0,0 +1,93 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import mysql.connector
+import numpy as np
+
+from data_loader import DEFAULT_BATCH_SIZE, load_from_pool
+from row_generator import DEFAULT_POOL_SIZE, RowPool
+
+# --- Per-process worker state (one connection and one RowPool per worker) ---
+_worker = {}
+
+
+def _init_worker(conn_params, seed, pool_size):
+    _worker['conn'] = mysql.connector.connect(**conn_params)
+    _worker['pool'] = RowPool(seed=seed, pool_size=pool_size)
+
+
+def _seed_task(table, count, task_seed, batch_size, method):
+    pool = _worker['pool']
+    pool.reseed(task_seed)
+    stats = load_from_pool(_worker['conn'], table, pool, count, batch_size=batch_size,
+                           method=method, verbose=False)
+    stats['pid'] = multiprocessing.current_process().pid
+    return stats
+
+
+# --- Split a row count evenly across workers ---
+def split_counts(total, workers):
+    base, extra = divmod(total, workers)
+    return [base + (1 if i < extra else 0) for i in range(workers)]
+
+
+# --- Parallel Seeder ---
+# Each worker generates its own rows and inserts over its own connection. Task
+# seeds are derived from (seed, round, worker) so a given configuration always
+# produces the same dataset regardless of scheduling order.
+class ParallelSeeder:
+    def __init__(self, conn_params, workers, seed, batch_size=DEFAULT_BATCH_SIZE, method='executemany',
+                 pool_size=DEFAULT_POOL_SIZE):
+        self.workers = workers
+        self.seed = seed
+        self.batch_size = batch_size
+        self.method = method
+        self.round = 0
+        conn_params = dict(conn_params, allow_local_infile=(method == 'infile'))
+        # Fork explicitly: the simulate_* scripts run at import time, so a spawn or
+        # forkserver start method would re-execute the whole experiment in every worker.
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_worker,
+            initargs=(conn_params, seed, pool_size),
+        )
+
+    def seed_rows(self, table, count):
+        self.round += 1
+        start = time.time()
+        futures = []
+        for worker_id, worker_count in enumerate(split_counts(count, self.workers)):
+            if worker_count == 0:
+                continue
+            task_seed = int(np.random.SeedSequence([self.seed, self.round, worker_id]).generate_state(1)[0])
+            futures.append(self.executor.submit(_seed_task, table, worker_count, task_seed,
+                                                self.batch_size, self.method))
+        results = [f.result() for f in futures]
+        duration = time.time() - start
+
+        loaded = sum(r['rows'] for r in results)
+        rows_per_s = round(loaded / duration, 1) if duration > 0 else 0.0
+        worker_rates = [r['rows_per_s'] for r in results] or [0.0]
+        print(f"[i] Loaded {loaded} rows into {table} with {len(results)} workers "
+              f"in {round(duration, 2)}s ({rows_per_s} rows/s, "
+              f"per worker min {min(worker_rates)} / max {max(worker_rates)} rows/s)")
+
+        return {
+            'rows': loaded,
+            'load_time_s': round(duration, 2),
+            'rows_per_s': rows_per_s,
+            'workers': len(results),
+            'worker_rows_per_s_min': min(worker_rates),
+            'worker_rows_per_s_max': max(worker_rates),
+        }
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,37 +1,73 @@
+import os
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 
+from results_store import DEFAULT_STORE_DIR, load_runs, scaling_curve
+
 # --- Config: CSV paths ---
 csv_files = {
     'Full': {
         'backup': 'full_backup_log.csv',
-        'restore': 'full_restore_log.csv'
+        'restore': 'full_restore_log.csv',
+        'server': 'full_server_metrics.csv'
     },
     'Incremental': {
         'backup': 'incremental_backup_log.csv',
-        'restore': 'incremental_restore_log.csv'
+        'restore': 'incremental_restore_log.csv',
+        'server': 'incremental_server_metrics.csv'
     },
     'Log-Based': {
         'backup': 'log_based_backup_log.csv',
-        'restore': 'log_based_restore_log.csv'
+        'restore': 'log_based_restore_log.csv',
+        'server': 'log_based_server_metrics.csv'
+    },
+    'Physical': {
+        'backup': 'physical_backup_log.csv',
+        'restore': 'physical_restore_log.csv',
+        'server': 'physical_server_metrics.csv'
     }
 }
+colors = {'Full': '#1f77b4', 'Incremental': '#ff7f0e', 'Log-Based': '#2ca02c', 'Physical': '#d62728'}
+strategy_colors = {'full': colors['Full'], 'incremental': colors['Incremental'],
+                   'log_based': colors['Log-Based'], 'physical': colors['Physical']}
+
+# Only the columns the charts use are parsed
+used_columns = {
+    'backup': ['batch', 'backup_time_s', 'backup_size_MB', 'backup_raw_MB', 'codec', 'codec_level', 'cpu_time_s'],
+    'restore': ['restore_time_s', 'cpu_after', 'sys_cpu_avg'],
+    'server': ['label', 'duration_s', 'rows_inserted', 'log_bytes_written', 'log_fsyncs', 'data_fsyncs',
+               'buffer_pool_reads', 'lock_wait_time_s', 'top_wait_time_s'],
+}
+
+# Sweep dimensions and metrics plotted from the results store
+scaling_dimensions = [('initial_records', "Rows"), ('workers', "Workers")]
+scaling_metrics = [('backup_time_total_s', "Backup Time Total (s)"), ('backup_size_total_MB', "Backup Size Total (MB)"),
+                   ('restore_time_s', "Restore Time (s)")]
+
+# --- Load CSVs ---
+def read_columns(path, kind):
+    return pd.read_csv(path, usecols=lambda column: column in used_columns[kind])
 
-# --- Load and print CSVs ---
 def load_csvs():
     data = {}
     for method, paths in csv_files.items():
-        backup_df = pd.read_csv(paths['backup'])
-        restore_df = pd.read_csv(paths['restore'])
-        data[method] = {'backup': backup_df, 'restore': restore_df}
-        
-        print(f"\n=== {method} Backup Data ===")
-        print(backup_df)
-        print(f"\n=== {method} Restore Data ===")
-        print(restore_df)
+        if not os.path.exists(paths['backup']):
+            print(f"[!] {paths['backup']} not found, skipping {method}")
+            continue
+        data[method] = {'backup': read_columns(paths['backup'], 'backup'),
+                        'restore': read_columns(paths['restore'], 'restore')}
+        # Server-side counters are optional (older runs, no status privileges)
+        if os.path.exists(paths['server']):
+            data[method]['server'] = read_columns(paths['server'], 'server')
+        print(f"[i] {method}: {len(data[method]['backup'])} backups, {len(data[method]['restore'])} restore steps")
     return data
 
+# Every batch number logged by any method
+def all_batches(data):
+    return sorted(set().union(*(data[method]['backup']['batch'].dropna().astype(int) for method in data)))
+
 # --- Utility: Save plot ---
 def save_plot(title):
     filename = f"{title.lower().replace(' ', '_')}.png"
@@ -43,10 +79,9 @@ def save_plot(title):
 # --- Bar Chart: Backup Time ---
 def plot_backup_time_bar(data):
     plt.figure(figsize=(12, 6))
-    bar_width = 0.25
-    batches = range(11)  # assuming 0 to 10
-    offsets = {'Full': -bar_width, 'Incremental': 0, 'Log-Based': bar_width}
-    colors = {'Full': '#1f77b4', 'Incremental': '#ff7f0e', 'Log-Based': '#2ca02c'}
+    bar_width = 0.8 / len(data)
+    batches = all_batches(data)
+    offsets = {method: (i - (len(data) - 1) / 2) * bar_width for i, method in enumerate(data)}
 
     for method in data:
         df = data[method]['backup']
@@ -71,10 +106,9 @@ def plot_backup_time_bar(data):
 # --- Bar Chart: Backup Size ---
 def plot_backup_size_bar(data):
     plt.figure(figsize=(12, 6))
-    bar_width = 0.25
-    batches = range(11)
-    offsets = {'Full': -bar_width, 'Incremental': 0, 'Log-Based': bar_width}
-    colors = {'Full': '#1f77b4', 'Incremental': '#ff7f0e', 'Log-Based': '#2ca02c'}
+    bar_width = 0.8 / len(data)
+    batches = all_batches(data)
+    offsets = {method: (i - (len(data) - 1) / 2) * bar_width for i, method in enumerate(data)}
 
     for method in data:
         df = data[method]['backup']
@@ -111,12 +145,14 @@ def plot_restore_time_bar(data):
         methods.append(method)
         restore_times.append(time)
 
-    plt.bar(methods, restore_times, color=['#1f77b4', '#ff7f0e', '#2ca02c'])
+    plt.bar(methods, restore_times, color=[colors[m] for m in methods])
     plt.title("Total Restore Time by Method")
     plt.ylabel("Restore Time (s)")
     save_plot("restore_time_total_bar")
 
-# --- Bar Chart: CPU After Restore ---
+# --- Bar Chart: CPU During Restore ---
+# Sampled average over each restore step (resource sampler), weighted by its
+# duration; older logs only have the single cpu_after reading
 def plot_cpu_after_bar(data):
     plt.figure(figsize=(10, 6))
     methods = []
@@ -124,16 +160,125 @@ def plot_cpu_after_bar(data):
 
     for method in data:
         df = data[method]['restore']
-        if 'cpu_after' in df.columns:
-            avg_cpu = df['cpu_after'].mean()
-            methods.append(method)
-            cpu_usages.append(avg_cpu)
+        if 'sys_cpu_avg' in df.columns and df['sys_cpu_avg'].notna().any():
+            df = df.dropna(subset=['sys_cpu_avg'])
+            weights = df['restore_time_s'].clip(lower=0.01)
+            cpu = (df['sys_cpu_avg'] * weights).sum() / weights.sum()
+        elif 'cpu_after' in df.columns:
+            cpu = df['cpu_after'].mean()
+        else:
+            continue
+        methods.append(method)
+        cpu_usages.append(cpu)
 
-    plt.bar(methods, cpu_usages, color=['#1f77b4', '#ff7f0e', '#2ca02c'])
-    plt.title("Average CPU Usage After Restore")
+    plt.bar(methods, cpu_usages, color=[colors[m] for m in methods])
+    plt.title("Average CPU Usage During Restore")
     plt.ylabel("CPU (%)")
     save_plot("cpu_after_restore_bar")
 
+# --- Scatter: Codec Size/Speed Tradeoff ---
+def plot_codec_tradeoff(data):
+    plt.figure(figsize=(10, 6))
+    plotted = False
+
+    for method in data:
+        df = data[method]['backup']
+        if not {'codec', 'backup_raw_MB', 'cpu_time_s'}.issubset(df.columns):
+            continue
+        df = df.dropna(subset=['codec', 'backup_raw_MB'])
+        df = df[df['backup_raw_MB'] > 0]
+        if df.empty:
+            continue
+        grouped = df.assign(
+            ratio=df['backup_size_MB'] / df['backup_raw_MB'],
+            codec_level=df['codec_level'].fillna('-').astype(str)
+        ).groupby(['codec', 'codec_level'])[['backup_time_s', 'ratio', 'cpu_time_s']].mean()
+
+        for (codec, level), row in grouped.iterrows():
+            cpu = 0 if pd.isna(row['cpu_time_s']) else row['cpu_time_s']
+            plt.scatter(row['backup_time_s'], row['ratio'], color=colors[method], s=40 + 20 * cpu)
+            plt.annotate(f"{method} {codec}:{level}", (row['backup_time_s'], row['ratio']),
+                         textcoords="offset points", xytext=(5, 5), fontsize=8)
+        plotted = True
+
+    if not plotted:
+        plt.close()
+        return
+    plt.title("Codec Size/Speed Tradeoff (marker size = CPU s)")
+    plt.xlabel("Average Backup Time (s)")
+    plt.ylabel("Compressed / Raw Size")
+    plt.grid(True)
+    save_plot("codec_size_speed_tradeoff")
+
+# --- Bar Charts: Server-Side Counters During Restore ---
+def plot_server_restore_metrics(data):
+    panels = [
+        ('rows_inserted_per_s', "Rows Inserted / s"),
+        ('log_MB', "Redo Log Written (MB)"),
+        ('fsyncs', "Fsyncs (log + data)"),
+        ('buffer_pool_reads', "Buffer Pool Disk Reads"),
+        ('lock_wait_s', "Lock Wait Time (s)"),
+        ('top_wait_time_s', "Top Wait Event Time (s)"),
+    ]
+    totals = {}
+    for method in data:
+        df = data[method].get('server')
+        if df is None:
+            continue
+        # Latest run of every restore phase ('restore full', 'restore pitr', 'apply N')
+        df = df[df['label'].str.startswith(('restore', 'apply'))].drop_duplicates('label', keep='last')
+        if df.empty:
+            continue
+        duration = df['duration_s'].sum()
+        totals[method] = {
+            'rows_inserted_per_s': df['rows_inserted'].sum() / duration if duration > 0 else 0.0,
+            'log_MB': df['log_bytes_written'].sum() / 1024 / 1024,
+            'fsyncs': df['log_fsyncs'].sum() + df['data_fsyncs'].sum(),
+            'buffer_pool_reads': df['buffer_pool_reads'].sum(),
+            'lock_wait_s': df['lock_wait_time_s'].sum(),
+            'top_wait_time_s': df['top_wait_time_s'].max(),
+        }
+    if not totals:
+        return
+
+    fig, axes = plt.subplots(2, 3, figsize=(15, 8))
+    methods = list(totals)
+    for ax, (key, title) in zip(axes.flat, panels):
+        ax.bar(methods, [totals[m][key] for m in methods], color=[colors[m] for m in methods])
+        ax.set_title(title)
+        ax.grid(True, axis='y')
+    fig.suptitle("Server-Side Counters During Restore")
+    save_plot("server_restore_metrics_bar")
+
+# --- Line Charts: Scaling Curves from the Results Store ---
+# p50 per strategy against each swept dimension, shaded up to p95. Only the
+# columns needed are read from the store, so months of runs load quickly.
+def plot_scaling_curves(store_dir=DEFAULT_STORE_DIR):
+    if not os.path.isdir(store_dir):
+        return
+    runs = load_runs(store_dir, columns=['strategy'] + [x for x, _ in scaling_dimensions] +
+                     [metric for metric, _ in scaling_metrics])
+    print(f"[i] Results store: {len(runs)} runs")
+    for x, x_label in scaling_dimensions:
+        if x not in runs.columns or runs[x].nunique() < 2:
+            continue
+        fig, axes = plt.subplots(1, len(scaling_metrics), figsize=(6 * len(scaling_metrics), 5))
+        for ax, (metric, title) in zip(axes, scaling_metrics):
+            if metric not in runs.columns:
+                continue
+            p50 = scaling_curve(runs, x, metric, percentile=50)
+            p95 = scaling_curve(runs, x, metric, percentile=95)
+            for strategy in p50.columns:
+                color = strategy_colors.get(strategy)
+                ax.plot(p50.index, p50[strategy], marker='o', label=strategy, color=color)
+                ax.fill_between(p50.index, p50[strategy], p95[strategy], alpha=0.2, color=color)
+            ax.set_title(title)
+            ax.set_xlabel(x_label)
+            ax.legend()
+            ax.grid(True)
+        fig.suptitle(f"Scaling vs {x_label} (p50, shaded to p95)")
+        save_plot(f"scaling_vs_{x}")
+
 # --- Run ---
 if __name__ == '__main__':
     all_data = load_csvs()
@@ -141,4 +286,7 @@ if __name__ == '__main__':
     plot_backup_size_bar(all_data)
     plot_restore_time_bar(all_data)
     plot_cpu_after_bar(all_data)
+    plot_codec_tradeoff(all_data)
+    plot_server_restore_metrics(all_data)
+    plot_scaling_curves()
 
@@ -0,0 +1,216 @@
+import datetime
+import errno
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+from chunked_dump import list_tables, read_binlog_position
+
+# --- Config ---
+DEFAULT_WORKERS = 4
+COPY_CHUNK_BYTES = 64 * 1024 * 1024
+MANIFEST_NAME = 'manifest.json'
+TABLESPACE_EXTENSIONS = ('.ibd', '.cfg')
+
+_PLAIN_NAME = re.compile(r'[A-Za-z0-9_]')
+
+
+# --- Physical (transportable tablespace) backups ---
+# FLUSH TABLES ... FOR EXPORT quiesces the tables and writes a .cfg next to
+# every .ibd; the files are copied while the lock is held. Restore recreates
+# each table, discards its empty tablespace, drops the copied files into the
+# datadir and runs ALTER TABLE ... IMPORT TABLESPACE.
+#
+# The script must run on the database host with read access (backup) and
+# write access (restore) to @@datadir, e.g. as root or the mysql user. Only
+# non-partitioned InnoDB tables with file-per-table tablespaces are supported.
+
+
+# MySQL stores identifiers outside [A-Za-z0-9_] as @xxxx in file names
+def tablespace_name(identifier):
+    return ''.join(c if _PLAIN_NAME.match(c) else f"@{ord(c):04x}" for c in identifier)
+
+
+def schema_dir(datadir, db_name):
+    return os.path.join(datadir, tablespace_name(db_name))
+
+
+# --- Zero-copy file copy ---
+# copy_file_range stays in the kernel (and can reflink on XFS/btrfs); sendfile
+# is the fallback across filesystems on older kernels; plain reads last.
+def _copy_range(fd_in, fd_out):
+    while os.copy_file_range(fd_in, fd_out, COPY_CHUNK_BYTES):
+        pass
+
+
+def _copy_sendfile(fd_in, fd_out):
+    offset = 0
+    while True:
+        sent = os.sendfile(fd_out, fd_in, offset, COPY_CHUNK_BYTES)
+        if not sent:
+            break
+        offset += sent
+
+
+def copy_file(src, dst):
+    with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+        fd_in, fd_out = fin.fileno(), fout.fileno()
+        for method, copier in (('copy_file_range', _copy_range), ('sendfile', _copy_sendfile)):
+            if not hasattr(os, method):
+                continue
+            try:
+                copier(fd_in, fd_out)
+                return os.path.getsize(dst), method
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                    raise
+                os.lseek(fd_in, 0, os.SEEK_SET)
+                os.lseek(fd_out, 0, os.SEEK_SET)
+                os.ftruncate(fd_out, 0)
+        shutil.copyfileobj(fin, fout, COPY_CHUNK_BYTES)
+    return os.path.getsize(dst), 'read/write'
+
+
+def copy_files(pairs, workers, owner=None):
+    def run(pair):
+        size, method = copy_file(*pair)
+        if owner:
+            os.chown(pair[1], *owner)
+        return size, method
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(run, pairs))
+    methods = sorted({method for _, method in results})
+    return sum(size for size, _ in results), ','.join(methods)
+
+
+def innodb_tables(cursor, db_name):
+    tables = list_tables(cursor)
+    cursor.execute("""
+        SELECT TABLE_NAME, ENGINE, CREATE_OPTIONS FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
+    """, (db_name,))
+    for name, engine, options in cursor.fetchall():
+        if engine != 'InnoDB' or 'partitioned' in (options or ''):
+            raise ValueError(f"Table {name} ({engine}, {options}) cannot be copied as a transportable tablespace")
+    return tables
+
+
+def load_manifest(backup_dir):
+    with open(os.path.join(backup_dir, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+# --- Backup ---
+def backup_tablespaces(conn_params, out_dir, workers=DEFAULT_WORKERS):
+    start = time.time()
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+
+    db_name = conn_params['database']
+    conn = mysql.connector.connect(**conn_params)
+    cursor = conn.cursor()
+    cursor.execute("SELECT @@datadir, VERSION()")
+    datadir, version = cursor.fetchone()
+    source_dir = schema_dir(datadir, db_name)
+    tables = innodb_tables(cursor, db_name)
+
+    manifest = {
+        'database': db_name,
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'server_version': version,
+        'binlog': None,
+        'tables': [],
+    }
+    pairs = []
+    for table in tables:
+        cursor.execute(f"SHOW CREATE TABLE `{table}`")
+        manifest['tables'].append({'name': table, 'create_sql': cursor.fetchone()[1],
+                                   'files': [tablespace_name(table) + ext for ext in TABLESPACE_EXTENSIONS]})
+        pairs += [(os.path.join(source_dir, name), os.path.join(out_dir, name))
+                  for name in manifest['tables'][-1]['files']]
+
+    # Writes to these tables block until UNLOCK TABLES; the .cfg files are
+    # removed by the server at unlock, so everything is copied inside the lock.
+    # The binlog position is read under the lock too: a commit that lands
+    # before it would be in the copied files and replayed again after it.
+    lock_start = time.time()
+    if tables:
+        cursor.execute("FLUSH TABLES " + ", ".join(f"`{t}`" for t in tables) + " FOR EXPORT")
+    try:
+        manifest['binlog'] = read_binlog_position(cursor)
+        copied, method = copy_files(pairs, workers)
+    finally:
+        if tables:
+            cursor.execute("UNLOCK TABLES")
+    lock_time = time.time() - lock_start
+    conn.close()
+
+    manifest.update({'bytes': copied, 'copy_method': method})
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    duration = time.time() - start
+    return {
+        'backup_time_s': round(duration, 2),
+        'lock_time_s': round(lock_time, 2),
+        'tables': len(tables),
+        'files': len(pairs),
+        'stored_MB': round(copied / 1024 / 1024, 2),
+        'copy_MB_per_s': round(copied / 1024 / 1024 / lock_time, 1) if lock_time > 0 else 0.0,
+        'copy_method': method,
+    }
+
+
+# --- Restore ---
+def restore_tablespaces(conn_params, backup_dir, workers=DEFAULT_WORKERS):
+    start = time.time()
+    manifest = load_manifest(backup_dir)
+    conn = mysql.connector.connect(**conn_params)
+    cursor = conn.cursor()
+    cursor.execute("SET SESSION foreign_key_checks = 0")
+    cursor.execute("SELECT @@datadir")
+    target_dir = schema_dir(cursor.fetchone()[0], conn_params['database'])
+
+    # Recreate every table and detach its (empty) tablespace
+    for entry in manifest['tables']:
+        cursor.execute(f"DROP TABLE IF EXISTS `{entry['name']}`")
+        cursor.execute(entry['create_sql'])
+        cursor.execute(f"ALTER TABLE `{entry['name']}` DISCARD TABLESPACE")
+
+    # Files must end up owned by the server's user, like the schema directory
+    st = os.stat(target_dir)
+    owner = (st.st_uid, st.st_gid) if os.geteuid() == 0 else None
+    copy_start = time.time()
+    pairs = [(os.path.join(backup_dir, name), os.path.join(target_dir, name))
+             for entry in manifest['tables'] for name in entry['files']
+             if os.path.exists(os.path.join(backup_dir, name))]
+    copied, method = copy_files(pairs, workers, owner)
+    copy_time = time.time() - copy_start
+
+    import_start = time.time()
+    for entry in manifest['tables']:
+        cursor.execute(f"ALTER TABLE `{entry['name']}` IMPORT TABLESPACE")
+    import_time = time.time() - import_start
+    conn.close()
+
+    # The imported .cfg files are no longer needed by the server
+    for entry in manifest['tables']:
+        cfg = os.path.join(target_dir, tablespace_name(entry['name']) + '.cfg')
+        if os.path.exists(cfg):
+            os.remove(cfg)
+
+    duration = time.time() - start
+    return {
+        'restore_time_s': round(duration, 2),
+        'copy_time_s': round(copy_time, 2),
+        'import_time_s': round(import_time, 2),
+        'tables': len(manifest['tables']),
+        'restored_MB': round(copied / 1024 / 1024, 2),
+        'copy_method': method,
+    }
@@ -0,0 +1,394 @@
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+from binlog_text import DATA_DELIMITER, Statement, gtid_next, iter_items, open_text, session_key
+from compression import BLOCK_SIZE, open_reader
+
+# --- Config ---
+DB_HOST = 'localhost'
+DB_USER = 'testuser'
+DB_PASS = 'testpass'
+DB_NAME = 'testdb'
+DEFAULT_INDEX_FILE = 'pitr_index.db'
+
+# Closes the replay of one segment range, like mysqlbinlog's own trailer
+RANGE_FOOTER = (
+    b"SET @@SESSION.GTID_NEXT= 'AUTOMATIC' /* added by pitr_index */ /*!*/;\n"
+    b"DELIMITER ;\n"
+    b"/*!50003 SET COMPLETION_TYPE=@OLD_COMPLETION_TYPE*/;\n"
+    b"/*!50530 SET @@SESSION.PSEUDO_SLAVE_MODE=0*/;\n"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    start_file TEXT, start_pos INTEGER,
+    end_file TEXT, end_pos INTEGER,
+    preamble_end INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    indexed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS session_states (
+    id INTEGER PRIMARY KEY,
+    statements BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    seq INTEGER PRIMARY KEY,
+    segment_id INTEGER NOT NULL,
+    offset_start INTEGER NOT NULL,
+    offset_end INTEGER NOT NULL,
+    log_file TEXT,
+    start_pos INTEGER,
+    end_pos INTEGER,
+    ts REAL,
+    gtid TEXT,
+    tables TEXT,
+    state_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS transactions_ts ON transactions (ts);
+CREATE INDEX IF NOT EXISTS transactions_gtid ON transactions (gtid);
+CREATE INDEX IF NOT EXISTS transactions_pos ON transactions (log_file, end_pos);
+CREATE TABLE IF NOT EXISTS full_backups (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    engine TEXT,
+    codec TEXT,
+    binlog_file TEXT NOT NULL,
+    binlog_pos INTEGER NOT NULL,
+    created_ts REAL NOT NULL
+);
+"""
+
+
+def parse_datetime(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+# --- Segment Scan ---
+# One pass over a mysqlbinlog text file. A unit is a committed transaction or
+# a standalone statement (DDL) and covers the bytes from its first event to
+# the end of its COMMIT, so any run of units is a contiguous byte range. The
+# session SETs in effect before each unit are kept, because mysqlbinlog only
+# prints them when they change and a range may start mid-file.
+def scan_segment(stream, start_file):
+    log_file = start_file
+    preamble_end = None
+    session = {}
+    units = []
+    unit = None
+    in_txn = False
+    last_event = None
+
+    for item in iter_items(stream):
+        if not isinstance(item, Statement):
+            if last_event is not None and last_event.rotate_to:
+                log_file = last_event.rotate_to
+            last_event = item
+            continue
+        if not item.is_data:
+            continue
+
+        event = item.event
+        text = item.text.strip()
+        keyword = item.keyword()
+        event_type = event.event_type if event is not None else None
+
+        if keyword == b'BINLOG' and event_type == 'Start':
+            if preamble_end is None:
+                preamble_end = item.end_offset
+            continue
+        if keyword == b'ROLLBACK' and not in_txn and unit is None:
+            continue  # defensive ROLLBACK printed after each format description
+
+        if unit is None:
+            unit = {
+                'offset_start': event.offset if event is not None else item.offset,
+                'log_file': log_file,
+                'start_pos': event.position if event is not None else None,
+                'ts': None, 'gtid': None, 'tables': set(), 'statements': 0,
+                'session': b''.join(s + DATA_DELIMITER + b'\n' for s in session.values()),
+            }
+        unit['statements'] += 1
+        if unit['ts'] is None and event is not None and event.timestamp is not None:
+            unit['ts'] = event.timestamp
+        if event is not None and event.table is not None:
+            unit['tables'].add('.'.join(event.table))
+
+        gtid = gtid_next(item)
+        if gtid is not None:
+            if gtid not in ('ANONYMOUS', 'AUTOMATIC'):
+                unit['gtid'] = gtid
+            continue
+        key = session_key(text)
+        if key is not None:
+            session[key] = text
+            continue
+        if keyword == b'BEGIN':
+            in_txn = True
+            continue
+        if not in_txn and (keyword == b'SET' or text.startswith(b'/*!')):
+            continue  # per-transaction settings (isolation level, ...) that precede BEGIN
+        if in_txn and keyword not in (b'COMMIT', b'ROLLBACK'):
+            continue
+        if in_txn and len(text) > 40:
+            continue  # a statement that merely starts with COMMIT/ROLLBACK
+
+        # Unit ends: COMMIT / ROLLBACK of a transaction, or a standalone statement
+        in_txn = False
+        unit['offset_end'] = item.end_offset
+        unit['end_pos'] = event.end_pos if event is not None else None
+        units.append(unit)
+        unit = None
+
+    return preamble_end or 0, units
+
+
+# --- Index ---
+class PitrIndex:
+    def __init__(self, path=DEFAULT_INDEX_FILE):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _state_id(self, statements, cache):
+        if statements not in cache:
+            cur = self.db.execute("INSERT INTO session_states (statements) VALUES (?)", (statements,))
+            cache[statements] = cur.lastrowid
+        return cache[statements]
+
+    # Index one captured segment (called right after it is written)
+    def add_segment(self, path, codec='none', start_file=None, start_pos=None, end_file=None, end_pos=None):
+        start = time.time()
+        with open_text(path, codec) as src:
+            preamble_end, units = scan_segment(src, start_file)
+
+        cur = self.db.execute(
+            "INSERT INTO segments (path, codec, start_file, start_pos, end_file, end_pos, preamble_end, bytes, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(path), codec, start_file, start_pos, end_file, end_pos, preamble_end,
+             os.path.getsize(path), datetime.datetime.now().isoformat(timespec='seconds')))
+        segment_id = cur.lastrowid
+        cache = {}
+        self.db.executemany(
+            "INSERT INTO transactions (segment_id, offset_start, offset_end, log_file, start_pos, end_pos, ts, gtid, tables, state_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(segment_id, u['offset_start'], u['offset_end'], u['log_file'], u['start_pos'], u['end_pos'],
+              u['ts'], u['gtid'], ','.join(sorted(u['tables'])), self._state_id(u['session'], cache))
+             for u in units])
+        self.db.commit()
+        return {
+            'segment_id': segment_id,
+            'transactions': len(units),
+            'index_time_s': round(time.time() - start, 3),
+        }
+
+    # Register a full backup with the binlog position it is consistent with
+    def add_full_backup(self, path, binlog_file, binlog_pos, engine='mysqldump', codec='none', created_ts=None):
+        cur = self.db.execute(
+            "INSERT INTO full_backups (path, engine, codec, binlog_file, binlog_pos, created_ts) VALUES (?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(path), engine, codec, binlog_file, binlog_pos,
+             time.time() if created_ts is None else created_ts))
+        self.db.commit()
+        return cur.lastrowid
+
+    # --- Planner ---
+    # Resolves the target to the last transaction to replay, picks the newest
+    # full backup at or before it and the per-segment byte ranges in between.
+    # stop_datetime follows mysqlbinlog: replay stops before the first
+    # transaction at or after the given time.
+    def plan(self, stop_datetime=None, stop_gtid=None, stop_position=None):
+        start = time.time()
+        db = self.db
+        if stop_datetime is not None:
+            target_ts = parse_datetime(stop_datetime)
+            row = db.execute("SELECT MIN(seq) FROM transactions WHERE ts >= ?", (target_ts,)).fetchone()
+            last_seq = row[0] - 1 if row[0] is not None else db.execute("SELECT MAX(seq) FROM transactions").fetchone()[0]
+        elif stop_gtid is not None:
+            target_ts = None
+            row = db.execute("SELECT seq FROM transactions WHERE gtid = ?", (stop_gtid,)).fetchone()
+            if row is None:
+                raise ValueError(f"GTID {stop_gtid} is not in the index")
+            last_seq = row[0]
+        elif stop_position is not None:
+            target_ts = None
+            stop_file, stop_pos = stop_position
+            last_seq = db.execute(
+                "SELECT MAX(seq) FROM transactions WHERE log_file < ? OR (log_file = ? AND end_pos <= ?)",
+                (stop_file, stop_file, stop_pos)).fetchone()[0]
+        else:
+            raise ValueError("One of stop_datetime, stop_gtid or stop_position is required")
+
+        last = db.execute("SELECT log_file, end_pos FROM transactions WHERE seq = ?", (last_seq,)).fetchone() if last_seq else None
+        query = "SELECT id, path, engine, codec, binlog_file, binlog_pos, created_ts FROM full_backups"
+        params = []
+        if last is not None:
+            query += " WHERE (binlog_file < ? OR (binlog_file = ? AND binlog_pos <= ?))"
+            params += [last[0], last[0], last[1]]
+        if target_ts is not None:
+            query += (" AND" if params else " WHERE") + " created_ts <= ?"
+            params.append(target_ts)
+        full = db.execute(query + " ORDER BY binlog_file DESC, binlog_pos DESC LIMIT 1", params).fetchone()
+        if full is None:
+            raise ValueError("No full backup precedes the requested recovery point")
+        full_backup = dict(zip(('id', 'path', 'engine', 'codec', 'binlog_file', 'binlog_pos', 'created_ts'), full))
+
+        first_seq = db.execute(
+            "SELECT MIN(seq) FROM transactions WHERE log_file > ? OR (log_file = ? AND start_pos >= ?)",
+            (full_backup['binlog_file'], full_backup['binlog_file'], full_backup['binlog_pos'])).fetchone()[0]
+
+        ranges = []
+        binlog_files = [full_backup['binlog_file']]
+        if first_seq is not None and last_seq is not None and first_seq <= last_seq:
+            for (log_file,) in db.execute("SELECT DISTINCT log_file FROM transactions WHERE seq BETWEEN ? AND ? "
+                                          "ORDER BY log_file", (first_seq, last_seq)):
+                if log_file not in binlog_files:
+                    binlog_files.append(log_file)
+            for row in db.execute(
+                    "SELECT t.segment_id, s.path, s.codec, s.preamble_end, MIN(t.offset_start), MAX(t.offset_end), "
+                    "COUNT(*), MIN(t.seq) FROM transactions t JOIN segments s ON s.id = t.segment_id "
+                    "WHERE t.seq BETWEEN ? AND ? GROUP BY t.segment_id ORDER BY MIN(t.seq)",
+                    (first_seq, last_seq)).fetchall():
+                state_id = db.execute("SELECT state_id FROM transactions WHERE seq = ?", (row[7],)).fetchone()[0]
+                ranges.append({
+                    'segment_id': row[0], 'path': row[1], 'codec': row[2], 'preamble_end': row[3],
+                    'offset_start': row[4], 'offset_end': row[5], 'transactions': row[6], 'state_id': state_id,
+                })
+
+        stop = db.execute("SELECT log_file, end_pos, ts, gtid FROM transactions WHERE seq = ?",
+                          (last_seq,)).fetchone() if ranges else None
+        return {
+            'full_backup': full_backup,
+            'ranges': ranges,
+            'transactions': sum(r['transactions'] for r in ranges),
+            'bytes': sum(r['offset_end'] - r['offset_start'] for r in ranges),
+            'binlog_files': binlog_files,
+            'stop_file': stop[0] if stop else full_backup['binlog_file'],
+            'stop_pos': stop[1] if stop else full_backup['binlog_pos'],
+            'stop_ts': stop[2] if stop else None,
+            'stop_gtid': stop[3] if stop else None,
+            'plan_time_ms': round((time.time() - start) * 1000, 2),
+        }
+
+    # Equivalent mysqlbinlog invocation against the server's own binlog files
+    def mysqlbinlog_args(self, plan):
+        return (["mysqlbinlog", f"--start-position={plan['full_backup']['binlog_pos']}",
+                 f"--stop-position={plan['stop_pos']}"] + plan['binlog_files'])
+
+    def _read_range(self, rng):
+        with open_reader(rng['path'], rng['codec']) as src:
+            yield src.read(rng['preamble_end'])
+            state = self.db.execute("SELECT statements FROM session_states WHERE id = ?", (rng['state_id'],)).fetchone()
+            yield b'\n' + (state[0] if state else b'')
+            if rng['codec'] == 'none':
+                src.seek(rng['offset_start'])
+            else:
+                skip = rng['offset_start'] - rng['preamble_end']
+                while skip > 0:
+                    skip -= len(src.read(min(skip, BLOCK_SIZE)))
+            remaining = rng['offset_end'] - rng['offset_start']
+            while remaining > 0:
+                block = src.read(min(remaining, BLOCK_SIZE))
+                if not block:
+                    break
+                remaining -= len(block)
+                yield block
+        yield RANGE_FOOTER
+
+    # The planned byte ranges as one replayable stream (e.g. for binlog_applier)
+    def plan_blocks(self, plan):
+        for rng in plan['ranges']:
+            yield from self._read_range(rng)
+
+    # Replay only the planned byte ranges into a consumer's stdin (e.g. mysql)
+    def apply_plan(self, plan, cmd):
+        start = time.time()
+        applied = 0
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        for block in self.plan_blocks(plan):
+            proc.stdin.write(block)
+            applied += len(block)
+        proc.stdin.close()
+        proc.wait()
+        return {
+            'restore_time_s': round(time.time() - start, 2),
+            'bytes_applied': applied,
+            'segments_applied': len(plan['ranges']),
+        }
+
+
+# --- Command Line ---
+#   python pitr_index.py index <segment.sql> --start-file mysql-bin.000003 [--codec zstd]
+#   python pitr_index.py full <full_backup.sql> mysql-bin.000003 157 [--engine mysqldump]
+#                             [--created-at "2025-07-10 09:00:00"]   (snapshot time; default now)
+#   python pitr_index.py plan --datetime "2025-07-10 10:00:05" | --gtid <uuid:n> | --position mysql-bin.000004:1234
+#   python pitr_index.py apply ... (same target options; replays the binlog ranges into mysql)
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Point-in-time recovery index and planner")
+    parser.add_argument('--index', default=DEFAULT_INDEX_FILE)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    idx = sub.add_parser('index', help='index a binlog segment')
+    idx.add_argument('path')
+    idx.add_argument('--codec', default='none')
+    idx.add_argument('--start-file')
+
+    full = sub.add_parser('full', help='register a full backup')
+    full.add_argument('path')
+    full.add_argument('binlog_file')
+    full.add_argument('binlog_pos', type=int)
+    full.add_argument('--engine', default='mysqldump')
+    full.add_argument('--codec', default='none')
+    full.add_argument('--created-at', type=parse_datetime, help='when the backup snapshot was taken (ISO datetime)')
+
+    for name in ('plan', 'apply'):
+        target = sub.add_parser(name)
+        group = target.add_mutually_exclusive_group(required=True)
+        group.add_argument('--datetime')
+        group.add_argument('--gtid')
+        group.add_argument('--position', help='binlog_file:pos')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = _parse_args(sys.argv[1:])
+    with PitrIndex(args.index) as index:
+        if args.command == 'index':
+            stats = index.add_segment(args.path, args.codec, args.start_file)
+            print(f"[✔] Indexed {args.path}: {stats['transactions']} transactions in {stats['index_time_s']}s")
+        elif args.command == 'full':
+            index.add_full_backup(args.path, args.binlog_file, args.binlog_pos, args.engine, args.codec,
+                                  args.created_at)
+            print(f"[✔] Registered full backup {args.path} at {args.binlog_file}:{args.binlog_pos}")
+        else:
+            position = None
+            if args.position:
+                log_file, pos = args.position.rsplit(':', 1)
+                position = (log_file, int(pos))
+            plan = index.plan(stop_datetime=args.datetime, stop_gtid=args.gtid, stop_position=position)
+            print(json.dumps(plan, indent=2))
+            print(f"[i] Planned in {plan['plan_time_ms']} ms: {plan['transactions']} transactions, "
+                  f"{plan['bytes']} bytes over {len(plan['ranges'])} segment(s)")
+            print(f"[i] Equivalent: {' '.join(index.mysqlbinlog_args(plan))}")
+            if args.command == 'apply':
+                print(f"[*] Restore the full backup {plan['full_backup']['path']} first; applying binlog ranges...")
+                stats = index.apply_plan(plan, ["mysql", "-h", DB_HOST, "-u", DB_USER, f"-p{DB_PASS}", DB_NAME])
+                print(f"[✔] Applied {stats['bytes_applied']} bytes in {stats['restore_time_s']}s")
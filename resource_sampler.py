@@ -0,0 +1,179 @@
+import csv
+import os
+import threading
+import time
+
+import psutil
+
+# --- Config ---
+DEFAULT_INTERVAL_S = 0.05
+SERVER_PROCESS_NAMES = ('mysqld',)
+
+series_headers = ['label', 't_s', 'sys_cpu_pct', 'mysqld_cpu_pct', 'client_cpu_pct',
+                  'mysqld_rss_MB', 'client_rss_MB', 'read_MB_s', 'write_MB_s', 'read_iops', 'write_iops']
+
+# Summary columns appended to the backup / restore CSV rows. The summary also
+# carries cpu_before / cpu_after (system CPU of the first and last sample),
+# which the restore logs already have as columns.
+RESOURCE_COLUMNS = ['sys_cpu_avg', 'sys_cpu_peak',
+                    'mysqld_cpu_avg', 'mysqld_cpu_peak', 'client_cpu_avg', 'client_cpu_peak',
+                    'mysqld_rss_peak_MB', 'client_rss_peak_MB', 'disk_read_MB', 'disk_write_MB',
+                    'iops_avg', 'iops_peak', 'samples']
+
+
+# --- Background Sampler ---
+# A daemon thread samples every `interval` seconds while a backup or restore
+# runs: system CPU, CPU and RSS of mysqld and of this process plus its
+# children (mysql / mysqldump / mysqlbinlog), and disk throughput and IOPS
+# from the system-wide counters. Per-process CPU comes from psutil's
+# cpu_percent deltas, so each Process object is kept across samples.
+#
+#   with ResourceSampler('restore full', series_file='restore_samples.csv') as sampler:
+#       run_restore()
+#   row.update(sampler.summary)
+class ResourceSampler:
+    def __init__(self, label='', interval=DEFAULT_INTERVAL_S, series_file=None,
+                 server_names=SERVER_PROCESS_NAMES):
+        self.label = label
+        self.interval = interval
+        self.series_file = series_file
+        self.server_names = server_names
+        self.samples = []
+        self.summary = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._procs = {}
+        self._self = psutil.Process()
+
+    def _tracked(self, proc):
+        if proc.pid not in self._procs:
+            self._procs[proc.pid] = proc
+            proc.cpu_percent(None)  # prime: the first call always returns 0.0
+            return None
+        return self._procs[proc.pid]
+
+    def _group_usage(self, procs):
+        cpu = rss = 0.0
+        for proc in procs:
+            tracked = self._tracked(proc)
+            if tracked is None:
+                continue
+            try:
+                cpu += tracked.cpu_percent(None)
+                rss += tracked.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                self._procs.pop(proc.pid, None)
+        return cpu, rss / 1024 / 1024
+
+    def _server_procs(self):
+        procs = []
+        for proc in psutil.process_iter(['name']):
+            if proc.info['name'] in self.server_names:
+                procs.append(self._procs.get(proc.pid, proc))
+        return procs
+
+    def _client_procs(self):
+        try:
+            return [self._self] + self._self.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return [self._self]
+
+    def _sample(self, start, last_io, last_t):
+        now = time.time()
+        io = psutil.disk_io_counters()
+        dt = max(now - last_t, 1e-6)
+        mysqld_cpu, mysqld_rss = self._group_usage(self._server_procs())
+        client_cpu, client_rss = self._group_usage(self._client_procs())
+        self.samples.append({
+            'label': self.label,
+            't_s': round(now - start, 3),
+            'sys_cpu_pct': psutil.cpu_percent(None),
+            'mysqld_cpu_pct': round(mysqld_cpu, 1),
+            'client_cpu_pct': round(client_cpu, 1),
+            'mysqld_rss_MB': round(mysqld_rss, 1),
+            'client_rss_MB': round(client_rss, 1),
+            'read_MB_s': round((io.read_bytes - last_io.read_bytes) / dt / 1024 / 1024, 2) if io else 0.0,
+            'write_MB_s': round((io.write_bytes - last_io.write_bytes) / dt / 1024 / 1024, 2) if io else 0.0,
+            'read_iops': round((io.read_count - last_io.read_count) / dt, 1) if io else 0.0,
+            'write_iops': round((io.write_count - last_io.write_count) / dt, 1) if io else 0.0,
+        })
+        return io, now
+
+    def _run(self):
+        start = last_t = time.time()
+        last_io = psutil.disk_io_counters()
+        psutil.cpu_percent(None)
+        self._group_usage(self._server_procs())
+        self._group_usage(self._client_procs())
+        while not self._stop.wait(self.interval):
+            last_io, last_t = self._sample(start, last_io, last_t)
+        # Always end with one sample covering the tail of the window
+        self._sample(start, last_io, last_t)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='resource-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.summary = summarize(self.samples)
+        if self.series_file:
+            write_series(self.series_file, self.samples)
+        return self.summary
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def summarize(samples):
+    if not samples:
+        return dict({column: '' for column in RESOURCE_COLUMNS}, cpu_before='', cpu_after='')
+
+    def avg(key):
+        return round(sum(s[key] for s in samples) / len(samples), 1)
+
+    def peak(key):
+        return max(s[key] for s in samples)
+
+    durations = [b['t_s'] - a['t_s'] for a, b in zip([{'t_s': 0.0}] + samples[:-1], samples)]
+    iops = [s['read_iops'] + s['write_iops'] for s in samples]
+    return {
+        'cpu_before': samples[0]['sys_cpu_pct'],
+        'cpu_after': samples[-1]['sys_cpu_pct'],
+        'sys_cpu_avg': avg('sys_cpu_pct'),
+        'sys_cpu_peak': peak('sys_cpu_pct'),
+        'mysqld_cpu_avg': avg('mysqld_cpu_pct'),
+        'mysqld_cpu_peak': peak('mysqld_cpu_pct'),
+        'client_cpu_avg': avg('client_cpu_pct'),
+        'client_cpu_peak': peak('client_cpu_pct'),
+        'mysqld_rss_peak_MB': peak('mysqld_rss_MB'),
+        'client_rss_peak_MB': peak('client_rss_MB'),
+        'disk_read_MB': round(sum(s['read_MB_s'] * d for s, d in zip(samples, durations)), 2),
+        'disk_write_MB': round(sum(s['write_MB_s'] * d for s, d in zip(samples, durations)), 2),
+        'iops_avg': round(sum(iops) / len(iops), 1),
+        'iops_peak': max(iops),
+        'samples': len(samples),
+    }
+
+
+def write_series(file_path, samples):
+    write_header = not os.path.exists(file_path)
+    with open(file_path, mode='a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=series_headers)
+        if write_header:
+            writer.writeheader()
+        writer.writerows(samples)
+
+
+if __name__ == '__main__':
+    # Self-check: sample a short busy loop
+    with ResourceSampler('self-check') as sampler:
+        end = time.time() + 0.5
+        while time.time() < end:
+            pass
+    print(f"[i] {sampler.summary}")
@@ -0,0 +1,280 @@
+import argparse
+import datetime
+import math
+import os
+import statistics
+import sys
+
+import numpy as np
+import pandas as pd
+
+from db_common import log_to_csv
+
+# --- Config ---
+PREDICTION_LOG_CSV = 'prediction_log.csv'
+DEFAULT_CONFIDENCE = 0.95
+HISTORY_FILES = {
+    'benchmark_runs': 'benchmark_runs.csv',
+    'full_backup': 'full_backup_log.csv',
+    'full_restore': 'full_restore_log.csv',
+    'physical_restore': 'physical_restore_log.csv',
+}
+FEATURES = ['rows', 'size_MB', 'chain_length', 'compressed']
+CHAIN_STRATEGIES = ('incremental', 'log_based')     # restore = full dump + one replay per batch
+
+prediction_headers = ['predicted_at', 'strategy', 'rows', 'size_MB', 'chain_length', 'compressed', 'samples',
+                      'predicted_restore_time_s', 'interval_low_s', 'interval_high_s', 'actual_restore_time_s',
+                      'error_s', 'error_pct', 'within_interval']
+
+
+# --- One restore observation ---
+# rows restored, size of the whole backup set (full + every incremental it
+# needs), number of incrementals replayed, compressed or not, restore seconds
+def make_sample(strategy, rows, size_MB, chain_length=0, codec='none', restore_time_s=None):
+    return {'strategy': strategy, 'rows': float(rows), 'size_MB': float(size_MB), 'chain_length': float(chain_length),
+            'compressed': float(codec not in ('none', '', None) and not pd.isna(codec)),
+            'restore_time_s': None if restore_time_s is None else float(restore_time_s)}
+
+
+def benchmark_sample(run):
+    # Rows verified after the restore: workload batches also update and delete
+    rows = run.get('rows_expected')
+    if rows in (None, '') or pd.isna(rows):
+        rows = run['initial_records'] + run['batches'] * run['records_per_batch']
+    if run['strategy'] in CHAIN_STRATEGIES:
+        return make_sample(run['strategy'], rows, run['backup_size_total_MB'], run['batches'], run['codec'],
+                           run.get('restore_time_s'))
+    return make_sample(run['strategy'], rows, run['backup_size_last_MB'], 0, run['codec'], run.get('restore_time_s'))
+
+
+def _read(path):
+    return pd.read_csv(path) if path and os.path.exists(path) else None
+
+
+# benchmark_runs.csv (every strategy) plus the full / physical script logs;
+# the incremental scripts log one row per phase with no run key, so their
+# runs come from the benchmark only
+def load_history(history=HISTORY_FILES):
+    samples = []
+    runs = _read(history.get('benchmark_runs'))
+    if runs is not None:
+        runs = runs[~runs['warmup'].astype(bool)]
+        samples += [benchmark_sample(run) for run in runs.to_dict('records')]
+
+    restore = _read(history.get('full_restore'))
+    backup = _read(history.get('full_backup'))
+    if restore is not None and backup is not None:
+        # Restores replay the latest backup of that size; deduplicated backups report only new bytes
+        if 'dedup_chunks' in backup.columns:
+            backup['backup_size_MB'] = backup['backup_size_MB'].where(backup['dedup_chunks'].isna(),
+                                                                      backup['backup_raw_MB'])
+        sizes = backup.drop_duplicates('records_total', keep='last').set_index('records_total')['backup_size_MB']
+        for row in restore.to_dict('records'):
+            if row['total_records'] in sizes.index:
+                samples.append(make_sample('full', row['total_records'], sizes[row['total_records']], 0,
+                                           row.get('codec', 'none'), row['restore_time_s']))
+
+    physical = _read(history.get('physical_restore'))
+    if physical is not None:
+        samples += [make_sample('physical', row['total_records'], row['restored_MB'], 0, 'none', row['restore_time_s'])
+                    for row in physical.to_dict('records')]
+    return [s for s in samples if s['restore_time_s'] is not None and not any(pd.isna(s[f]) for f in FEATURES)]
+
+
+# Two-sided Student t critical value: exact for 1 and 2 degrees of freedom,
+# Cornish-Fisher expansion around the normal quantile beyond that
+def t_critical(confidence, dof):
+    p = (1 + confidence) / 2
+    if dof == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if dof == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = statistics.NormalDist().inv_cdf(p)
+    return z + (z ** 3 + z) / (4 * dof) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2)
+
+
+# --- Per-strategy least squares ---
+# restore_time_s ~ b0 + b1*rows + b2*size_MB + b3*chain_length + b4*compressed,
+# fitted with np.linalg.lstsq on standardized features. Features that never
+# vary in the history are left out (a single codec, full backups with no
+# chain). Prediction intervals come from the residual variance and the
+# pseudo-inverse of X'X, so collinear rows/size still give finite bounds.
+# One sample falls back to a per-row rate through the origin.
+class RestoreModel:
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.samples = []
+        self.active = []
+        self.coef = None
+        self.sigma2 = None
+        self.xtx_inv = None
+        self.dof = 0
+
+    def add(self, sample):
+        self.samples.append(sample)
+        self.fit()
+
+    def _design(self, samples):
+        x = np.array([[s[f] for f in self.active] for s in samples], dtype=float)
+        x = x.reshape(len(samples), len(self.active))
+        return np.column_stack([np.ones(len(samples)), (x - self.mean) / self.scale])
+
+    def fit(self):
+        n = len(self.samples)
+        if n < 2:
+            return
+        features = np.array([[s[f] for f in FEATURES] for s in self.samples], dtype=float)
+        varying = np.ptp(features, axis=0) > 0
+        self.active = [f for f, keep in zip(FEATURES, varying) if keep]
+        self.mean = features[:, varying].mean(axis=0)
+        self.scale = features[:, varying].std(axis=0)
+        x = self._design(self.samples)
+        y = np.array([s['restore_time_s'] for s in self.samples])
+        self.coef, _, rank, _ = np.linalg.lstsq(x, y, rcond=None)
+        residuals = y - x @ self.coef
+        self.dof = n - int(rank)
+        self.sigma2 = float(residuals @ residuals / self.dof) if self.dof > 0 else None
+        self.xtx_inv = np.linalg.pinv(x.T @ x)
+
+    def predict(self, sample, confidence=DEFAULT_CONFIDENCE):
+        n = len(self.samples)
+        result = {'strategy': self.strategy, 'samples': n, 'predicted_restore_time_s': None,
+                  'interval_low_s': '', 'interval_high_s': ''}
+        if n == 0:
+            return result
+        if n == 1:
+            only = self.samples[0]
+            result['predicted_restore_time_s'] = round(only['restore_time_s'] * sample['rows'] / only['rows'], 3)
+            return result
+        x = self._design([sample])[0]
+        predicted = max(float(x @ self.coef), 0.0)
+        result['predicted_restore_time_s'] = round(predicted, 3)
+        if self.sigma2 is not None:
+            half = t_critical(confidence, self.dof) * math.sqrt(self.sigma2 * (1 + float(x @ self.xtx_inv @ x)))
+            result['interval_low_s'] = round(max(predicted - half, 0.0), 3)
+            result['interval_high_s'] = round(predicted + half, 3)
+        return result
+
+    # Coefficients in original units (seconds per row, per MB, per incremental, for compression)
+    def describe(self):
+        if self.coef is None:
+            return f"{self.strategy}: {len(self.samples)} sample(s), no fit"
+        terms = [f"{self.coef[0] - float(np.sum(self.coef[1:] * self.mean / self.scale)):.3g}"]
+        terms += [f"{c / s:.3g}*{f}" for f, c, s in zip(self.active, self.coef[1:], self.scale)]
+        spread = f", residual sd {math.sqrt(self.sigma2):.3g}s" if self.sigma2 is not None else ''
+        return f"{self.strategy}: {' + '.join(terms)} ({len(self.samples)} samples{spread})"
+
+
+class RestorePredictor:
+    def __init__(self, samples=(), log_file=PREDICTION_LOG_CSV, confidence=DEFAULT_CONFIDENCE):
+        self.models = {}
+        self.log_file = log_file
+        self.confidence = confidence
+        for sample in samples:
+            self.model(sample['strategy']).samples.append(sample)
+        for model in self.models.values():
+            model.fit()
+
+    @classmethod
+    def from_history(cls, history=HISTORY_FILES, **kwargs):
+        return cls(load_history(history), **kwargs)
+
+    def model(self, strategy):
+        return self.models.setdefault(strategy, RestoreModel(strategy))
+
+    def predict(self, strategy, rows, size_MB, chain_length=0, codec='none'):
+        return self.model(strategy).predict(make_sample(strategy, rows, size_MB, chain_length, codec), self.confidence)
+
+    # Predict a finished restore before learning from it, log the error, then refit
+    def check(self, sample):
+        prediction = self.model(sample['strategy']).predict(sample, self.confidence)
+        predicted = prediction['predicted_restore_time_s']
+        actual = sample['restore_time_s']
+        row = dict(prediction, predicted_at=datetime.datetime.now().isoformat(timespec='seconds'),
+                   rows=int(sample['rows']), size_MB=sample['size_MB'], chain_length=int(sample['chain_length']),
+                   compressed=int(sample['compressed']), actual_restore_time_s=actual,
+                   error_s='', error_pct='', within_interval='')
+        if predicted is not None:
+            row['error_s'] = round(actual - predicted, 3)
+            row['error_pct'] = round((actual - predicted) / actual * 100, 1) if actual > 0 else ''
+            if prediction['interval_low_s'] != '':
+                row['within_interval'] = int(prediction['interval_low_s'] <= actual <= prediction['interval_high_s'])
+        else:
+            row['predicted_restore_time_s'] = ''
+        if self.log_file:
+            log_to_csv(self.log_file, row, prediction_headers)
+        self.model(sample['strategy']).add(sample)
+        return row
+
+
+def predict_restore(strategy, rows, size_MB, chain_length=0, codec='none', history=HISTORY_FILES):
+    return RestorePredictor.from_history(history, log_file=None).predict(strategy, rows, size_MB, chain_length, codec)
+
+
+# --- Prediction error over time ---
+# Per strategy: checks, mean absolute error %, share inside the interval,
+# overall and over the most recent `recent` checks
+def error_summary(log_file=PREDICTION_LOG_CSV, recent=10):
+    log = _read(log_file)
+    if log is None:
+        return pd.DataFrame()
+    log = log.dropna(subset=['error_pct'])
+    log['abs_error_pct'] = log['error_pct'].abs()
+    grouped = log.groupby('strategy')
+    latest = log.groupby('strategy').tail(recent).groupby('strategy')
+    return pd.DataFrame({
+        'checks': grouped.size(),
+        'mape_pct': grouped['abs_error_pct'].mean().round(1),
+        'within_interval_pct': (grouped['within_interval'].mean() * 100).round(1),
+        f"mape_last{recent}_pct": latest['abs_error_pct'].mean().round(1),
+        'last_checked': grouped['predicted_at'].max(),
+    }).reset_index()
+
+
+# --- CLI ---
+#   python restore_predictor.py predict --strategy incremental --rows 500000 --size-mb 60 --chain-length 10
+#   python restore_predictor.py models
+#   python restore_predictor.py errors
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Restore time prediction from the backup/restore history")
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    predict = sub.add_parser('predict', help='predict the restore time of one backup set')
+    predict.add_argument('--strategy', required=True)
+    predict.add_argument('--rows', type=int, required=True)
+    predict.add_argument('--size-mb', type=float, required=True)
+    predict.add_argument('--chain-length', type=int, default=0)
+    predict.add_argument('--codec', default='none')
+
+    sub.add_parser('models', help='print the fitted model of every strategy')
+
+    errors = sub.add_parser('errors', help='prediction error per strategy from the prediction log')
+    errors.add_argument('--recent', type=int, default=10)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = _parse_args(sys.argv[1:])
+    if args.command == 'predict':
+        predictor = RestorePredictor.from_history(log_file=None, confidence=args.confidence)
+        result = predictor.predict(args.strategy, args.rows, args.size_mb, args.chain_length, args.codec)
+        if result['predicted_restore_time_s'] is None:
+            print(f"[!] No history for strategy '{args.strategy}'")
+            sys.exit(1)
+        interval = ''
+        if result['interval_low_s'] != '':
+            interval = (f", {round(args.confidence * 100)}% interval "
+                        f"{result['interval_low_s']}-{result['interval_high_s']}s")
+        print(f"[✔] Predicted {args.strategy} restore: {result['predicted_restore_time_s']}s{interval} "
+              f"({result['samples']} samples)")
+    elif args.command == 'models':
+        predictor = RestorePredictor.from_history(log_file=None)
+        for strategy in sorted(predictor.models):
+            print(f"[i] {predictor.models[strategy].describe()}")
+    else:
+        summary = error_summary(recent=args.recent)
+        if summary.empty:
+            print(f"[!] No checked predictions in {PREDICTION_LOG_CSV}")
+            sys.exit(1)
+        print(summary.to_string(index=False))
@@ -0,0 +1,165 @@
+import atexit
+import datetime
+import json
+import os
+
+import mysql.connector
+
+from db_common import connect
+
+# --- Config ---
+RESTORE_MODES = ('normal', 'fast')
+DEFAULT_STATE_FILE = 'restore_tuning_state.json'
+
+# Global variables relaxed for the duration of a 'fast' restore. Durability is
+# traded for speed: a server crash mid-restore loses up to ~1s of commits,
+# which a restore can simply redo.
+FAST_RESTORE_GLOBALS = {
+    'innodb_flush_log_at_trx_commit': 2,   # write the redo log per commit, fsync once a second
+    'sync_binlog': 0,                      # let the OS decide when to flush the binlog
+}
+# Buffers that are only ever raised, never shrunk below the server's setting
+FAST_RESTORE_MIN_GLOBALS = {
+    'innodb_log_buffer_size': 64 * 1024 * 1024,
+    'max_allowed_packet': 256 * 1024 * 1024,
+}
+# Session settings for every restore connection (mysql client / loader pool).
+# sql_log_bin = 0 keeps the replay from writing a second copy into the binlog.
+FAST_RESTORE_SESSION = {
+    'sql_log_bin': 0,
+    'unique_checks': 0,
+    'foreign_key_checks': 0,
+}
+
+
+# --- Persisted snapshot of the original values ---
+# Written before anything is changed, removed after the revert. If a restore
+# is killed hard (no finally / atexit), the next RestoreTuning finds the file
+# and puts the server back first.
+def load_state(state_file):
+    if not os.path.exists(state_file):
+        return None
+    with open(state_file) as f:
+        return json.load(f)
+
+
+def save_state(state_file, originals):
+    state = {
+        'globals': originals,
+        'applied_at': datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+    with open(state_file + '.tmp', 'w') as f:
+        json.dump(state, f)
+    os.replace(state_file + '.tmp', state_file)
+
+
+def read_global(cursor, name):
+    cursor.execute(f"SELECT @@GLOBAL.{name}")
+    return cursor.fetchone()[0]
+
+
+def set_global(cursor, name, value):
+    cursor.execute(f"SET GLOBAL {name} = %s", (value,))
+
+
+def revert_globals(conn_params, originals):
+    conn = connect(conn_params, use_db=False)
+    cursor = conn.cursor()
+    failed = []
+    for name, value in originals.items():
+        try:
+            set_global(cursor, name, value)
+        except mysql.connector.Error as e:
+            failed.append(f"{name}={value} ({e.msg})")
+    conn.close()
+    if failed:
+        raise RuntimeError("Could not restore server settings: " + ', '.join(failed))
+
+
+def revert_pending(conn_params, state_file=DEFAULT_STATE_FILE):
+    state = load_state(state_file)
+    if state is None:
+        return False
+    print(f"[!] Reverting server settings left by an interrupted restore ({state['applied_at']}): {state['globals']}")
+    revert_globals(conn_params, state['globals'])
+    os.remove(state_file)
+    return True
+
+
+# --- Restore Profile ---
+# 'normal' leaves the server alone; 'fast' snapshots the globals above, applies
+# the profile, and reverts on context exit, including when the restore raises.
+# The atexit hook and the state file are only the fallback for a process that
+# dies before it gets there. Settings the user has no privilege for are
+# skipped with a warning.
+#
+#   with RestoreTuning(CONN_PARAMS, 'fast') as tuning:
+#       restore_file_to_command(["mysql", ..., *tuning.client_args(), DB_NAME], path, codec)
+class RestoreTuning:
+    def __init__(self, conn_params, mode='normal', state_file=DEFAULT_STATE_FILE):
+        if mode not in RESTORE_MODES:
+            raise ValueError(f"Unknown restore mode '{mode}', expected one of {RESTORE_MODES}")
+        self.conn_params = conn_params
+        self.mode = mode
+        self.state_file = state_file
+        self.originals = {}
+        self.applied = {}
+        self.session = {}
+
+    def apply(self):
+        revert_pending(self.conn_params, self.state_file)
+        if self.mode == 'normal':
+            return self
+
+        conn = connect(self.conn_params, use_db=False)
+        cursor = conn.cursor()
+        targets = dict(FAST_RESTORE_GLOBALS)
+        for name, minimum in FAST_RESTORE_MIN_GLOBALS.items():
+            if int(read_global(cursor, name)) < minimum:
+                targets[name] = minimum
+        self.originals = {name: read_global(cursor, name) for name in targets}
+        save_state(self.state_file, self.originals)
+        atexit.register(self.revert)
+
+        for name, value in targets.items():
+            try:
+                set_global(cursor, name, value)
+                self.applied[name] = value
+            except mysql.connector.Error as e:
+                print(f"[!] Fast restore: cannot set {name} ({e.msg})")
+        # Probe session settings here so a missing privilege does not break every client
+        for name, value in FAST_RESTORE_SESSION.items():
+            try:
+                cursor.execute(f"SET SESSION {name} = %s", (value,))
+                self.session[name] = value
+            except mysql.connector.Error as e:
+                print(f"[!] Fast restore: cannot set session {name} ({e.msg})")
+        conn.close()
+        print(f"[i] Fast restore profile: {dict(self.applied, **self.session)}")
+        return self
+
+    def revert(self):
+        if not self.originals:
+            return
+        originals, self.originals = self.originals, {}
+        revert_globals(self.conn_params, originals)
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
+        atexit.unregister(self.revert)
+        self.applied = {}
+        print(f"[✔] Server settings restored: {originals}")
+
+    def session_sql(self):
+        return [f"SET SESSION {name} = {value}" for name, value in self.session.items()]
+
+    # Extra `mysql` client arguments applying the session settings on connect
+    def client_args(self):
+        if not self.session:
+            return []
+        return ["--init-command=SET SESSION " + ', '.join(f"{name} = {value}" for name, value in self.session.items())]
+
+    def __enter__(self):
+        return self.apply()
+
+    def __exit__(self, *exc):
+        self.revert()
@@ -0,0 +1,155 @@
+import argparse
+import glob
+import os
+import sys
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # optional: only needed for the results store
+    pa = ds = None
+
+# --- Config ---
+DEFAULT_STORE_DIR = 'results_store'
+PARTITION_COLUMNS = ['strategy', 'run_month']   # directory levels: strategy=full/run_month=2025-07/
+DEFAULT_PERCENTILES = (50, 95)
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("The results store requires the 'pyarrow' package (pip install pyarrow)")
+
+
+def store_available():
+    return pa is not None
+
+
+# --- Partitioned Parquet store of benchmark runs ---
+# One row per run: run_id, cell parameters and metrics, exactly as in
+# benchmark_runs.csv. Rows are appended as one Parquet file per run id and
+# partition (strategy=<name>/run_month=<YYYY-MM>/<run_id>-0.parquet), so an
+# append never rewrites earlier files and a report only opens the strategy
+# and month directories its filter matches. Readers pull just the columns
+# they ask for; files written before a metric existed read back as nulls.
+#
+#   append_runs(pd.DataFrame(rows))
+#   runs = load_runs(columns=['strategy', 'initial_records', 'restore_time_s'],
+#                    where={'strategy': ['full', 'incremental']})
+#   grouped_percentiles(runs, ['strategy', 'initial_records'], ['restore_time_s'])
+def _partition_schema():
+    return pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS])
+
+
+def append_runs(runs, store_dir=DEFAULT_STORE_DIR, numeric=()):
+    require_pyarrow()
+    if runs.empty:
+        return 0
+    runs = runs.copy()
+    # Metrics are logged as '' when a strategy has no value; keep every file's columns numeric
+    for column in numeric:
+        if column in runs.columns:
+            runs[column] = pd.to_numeric(runs[column], errors='coerce').astype('float64')
+    runs['run_id'] = runs['run_id'].astype(str)
+    runs['strategy'] = runs['strategy'].astype(str)
+    runs['run_month'] = pd.to_datetime(runs['started_at']).dt.strftime('%Y-%m')
+    for run_id, group in runs.groupby('run_id', sort=False):
+        ds.write_dataset(pa.Table.from_pandas(group, preserve_index=False), store_dir, format='parquet',
+                         partitioning=ds.partitioning(_partition_schema(), flavor='hive'),
+                         basename_template=f"{run_id}-{{i}}.parquet",
+                         existing_data_behavior='overwrite_or_ignore')
+    return len(runs)
+
+
+def _dataset(store_dir):
+    partitioning = ds.partitioning(_partition_schema(), flavor='hive')
+    dataset = ds.dataset(store_dir, format='parquet', partitioning=partitioning)
+    # Later runs may carry metrics earlier files do not have
+    schemas = [fragment.physical_schema for fragment in dataset.get_fragments()]
+    schema = pa.unify_schemas(schemas + [_partition_schema()], promote_options='permissive')
+    return ds.dataset(store_dir, schema=schema, format='parquet', partitioning=partitioning)
+
+
+def _filter(where):
+    expression = None
+    for column, value in where.items():
+        if isinstance(value, (list, tuple, set)):
+            term = ds.field(column).isin(list(value))
+        else:
+            term = ds.field(column) == value
+        expression = term if expression is None else expression & term
+    return expression
+
+
+# where: {column: value or list of values}; partition columns prune whole directories
+def load_runs(store_dir=DEFAULT_STORE_DIR, columns=None, where=None, include_warmup=False):
+    require_pyarrow()
+    if not os.path.isdir(store_dir) or not glob.glob(os.path.join(store_dir, '**', '*.parquet'), recursive=True):
+        return pd.DataFrame(columns=columns or [])
+    dataset = _dataset(store_dir)
+    where = dict(where or {})
+    if not include_warmup and 'warmup' in dataset.schema.names:
+        where['warmup'] = False
+    if columns is not None:
+        columns = [c for c in dict.fromkeys(columns) if c in dataset.schema.names]
+    table = dataset.to_table(columns=columns, filter=_filter(where) if where else None)
+    return table.to_pandas()
+
+
+# --- Vectorized analysis ---
+# One row per group with n and <metric>_p<pct> columns, computed in a single
+# groupby pass instead of a Python loop per cell.
+def grouped_percentiles(runs, by, metrics, percentiles=DEFAULT_PERCENTILES):
+    grouped = runs.groupby(by, sort=True, observed=True, dropna=False)
+    stats = grouped[metrics].quantile([p / 100 for p in percentiles]).unstack()
+    stats.columns = [f"{metric}_p{round(q * 100)}" for metric, q in stats.columns]
+    stats.insert(0, 'n', grouped.size())
+    return stats.reset_index()
+
+
+# Metric percentile against one sweep dimension: index = x values, one column per series
+def scaling_curve(runs, x, metric, series='strategy', percentile=50):
+    stats = grouped_percentiles(runs.dropna(subset=[metric]), [series, x], [metric], (percentile,))
+    return stats.pivot(index=x, columns=series, values=f"{metric}_p{percentile}").sort_index()
+
+
+# --- CLI ---
+#   python results_store.py ingest benchmark_runs.csv
+#   python results_store.py report --by strategy,initial_records --metric restore_time_s --metric backup_size_total_MB
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Partitioned Parquet store of benchmark runs")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    ingest = sub.add_parser('ingest', help='append runs from a benchmark_runs.csv file')
+    ingest.add_argument('csv')
+
+    report = sub.add_parser('report', help='grouped percentiles over stored runs')
+    report.add_argument('--by', default='strategy')
+    report.add_argument('--metric', action='append', default=None)
+    report.add_argument('--strategy', action='append', default=None)
+    report.add_argument('--month', action='append', default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    from benchmark import METRICS
+    args = _parse_args(sys.argv[1:])
+    if args.command == 'ingest':
+        rows = append_runs(pd.read_csv(args.csv), args.store, numeric=METRICS)
+        print(f"[✔] {rows} runs from {args.csv} appended to {args.store}/")
+    else:
+        by = args.by.split(',')
+        metrics = args.metric or ['backup_time_total_s', 'backup_size_total_MB', 'restore_time_s']
+        where = {}
+        if args.strategy:
+            where['strategy'] = args.strategy
+        if args.month:
+            where['run_month'] = args.month
+        runs = load_runs(args.store, columns=by + metrics, where=where)
+        if runs.empty:
+            print(f"[!] No runs in {args.store}/ match")
+            sys.exit(1)
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(grouped_percentiles(runs, by, metrics).to_string(index=False))
@@ -0,0 +1,196 @@
+import csv
+import os
+import time
+
+import mysql.connector
+
+from db_common import connect, log_to_csv
+
+# --- Server-side counters per backup / restore phase ---
+# Snapshots SHOW GLOBAL STATUS, information_schema.INNODB_METRICS and the
+# performance_schema statement / wait summaries before and after a phase and
+# diffs them. The summary row answers "why was it slow" (redo volume, fsyncs,
+# buffer pool misses, lock waits, where statement time went); the detail file
+# keeps every counter that moved.
+#
+#   metrics = ServerMetrics(CONN_PARAMS, 'restore full', 'full_server_metrics.csv').start()
+#   run_restore()
+#   summary = metrics.stop()
+
+PS_TIMER_PER_S = 1e12   # performance_schema timers are in picoseconds
+
+# summary column -> SHOW GLOBAL STATUS counter (diffed)
+STATUS_COUNTERS = {
+    'rows_inserted': 'Innodb_rows_inserted',
+    'rows_updated': 'Innodb_rows_updated',
+    'rows_deleted': 'Innodb_rows_deleted',
+    'rows_read': 'Innodb_rows_read',
+    'log_bytes_written': 'Innodb_os_log_written',
+    'log_writes': 'Innodb_log_writes',
+    'log_waits': 'Innodb_log_waits',
+    'log_fsyncs': 'Innodb_os_log_fsyncs',
+    'data_fsyncs': 'Innodb_data_fsyncs',
+    'data_bytes_written': 'Innodb_data_written',
+    'data_bytes_read': 'Innodb_data_read',
+    'buffer_pool_read_requests': 'Innodb_buffer_pool_read_requests',
+    'buffer_pool_reads': 'Innodb_buffer_pool_reads',
+    'buffer_pool_wait_free': 'Innodb_buffer_pool_wait_free',
+    'pages_flushed': 'Innodb_buffer_pool_pages_flushed',
+    'row_lock_waits': 'Innodb_row_lock_waits',
+    'row_lock_time_ms': 'Innodb_row_lock_time',
+    'table_lock_waits': 'Table_locks_waited',
+    'questions': 'Questions',
+    'bytes_received': 'Bytes_received',
+    'bytes_sent': 'Bytes_sent',
+}
+# summary column -> SHOW GLOBAL STATUS gauge (value after the phase)
+STATUS_GAUGES = {
+    'dirty_pages_after': 'Innodb_buffer_pool_pages_dirty',
+}
+
+summary_headers = ['label', 'started_at', 'duration_s'] + list(STATUS_COUNTERS) + list(STATUS_GAUGES) + \
+                  ['rows_inserted_per_s', 'log_MB_per_s', 'fsyncs_per_s', 'buffer_pool_hit_pct',
+                   'statement_time_s', 'top_statement', 'top_statement_time_s',
+                   'lock_wait_time_s', 'top_wait', 'top_wait_time_s']
+detail_headers = ['label', 'source', 'name', 'delta']
+_warned_sources = set()
+
+SOURCES = {
+    'status': "SHOW GLOBAL STATUS",
+    'innodb': "SELECT NAME, COUNT FROM information_schema.INNODB_METRICS WHERE STATUS = 'enabled'",
+    'statement': """
+        SELECT EVENT_NAME, COUNT_STAR, SUM_TIMER_WAIT, SUM_LOCK_TIME
+        FROM performance_schema.events_statements_summary_global_by_event_name
+        WHERE COUNT_STAR > 0
+    """,
+    'wait': """
+        SELECT EVENT_NAME, COUNT_STAR, SUM_TIMER_WAIT
+        FROM performance_schema.events_waits_summary_global_by_event_name
+        WHERE COUNT_STAR > 0 AND EVENT_NAME != 'idle'
+    """,
+}
+
+
+# --- Snapshot: {(source, name): value} ---
+# A source the user cannot read (INNODB_METRICS needs PROCESS, performance_schema
+# may be off) is skipped with a warning instead of failing the phase.
+def snapshot(conn):
+    values = {}
+    cursor = conn.cursor()
+    for source, query in SOURCES.items():
+        try:
+            cursor.execute(query)
+            rows = cursor.fetchall()
+        except mysql.connector.Error as e:
+            if source not in _warned_sources:
+                _warned_sources.add(source)
+                print(f"[!] Server metrics: skipping {source} counters ({e.msg})")
+            continue
+        for row in rows:
+            name = row[0]
+            if source == 'statement':
+                values[(source, name + ':count')] = float(row[1])
+                values[(source, name + ':time_s')] = row[2] / PS_TIMER_PER_S
+                values[(source, name + ':lock_time_s')] = row[3] / PS_TIMER_PER_S
+            elif source == 'wait':
+                values[(source, name + ':count')] = float(row[1])
+                values[(source, name + ':time_s')] = row[2] / PS_TIMER_PER_S
+            else:
+                try:
+                    values[(source, name)] = float(row[1])
+                except (TypeError, ValueError):
+                    pass  # non-numeric status such as Ssl_cipher
+    cursor.close()
+    return values
+
+
+def diff(before, after):
+    return {key: after[key] - before.get(key, 0.0) for key in after if after[key] != before.get(key, 0.0)}
+
+
+def _top(deltas, source, suffix):
+    best = None
+    for (src, name), value in deltas.items():
+        if src == source and name.endswith(suffix):
+            if best is None or value > best[1]:
+                best = (name[:-len(suffix)], value)
+    return best or ('', 0.0)
+
+
+def summarize(label, started, duration, deltas, after):
+    status = {name: value for (source, name), value in deltas.items() if source == 'status'}
+    row = {'label': label, 'started_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started)),
+           'duration_s': round(duration, 3)}
+    for column, counter in STATUS_COUNTERS.items():
+        row[column] = int(status.get(counter, 0))
+    for column, gauge in STATUS_GAUGES.items():
+        row[column] = int(after.get(('status', gauge), 0))
+
+    requests = row['buffer_pool_read_requests']
+    statement_time = sum(v for (src, name), v in deltas.items() if src == 'statement' and name.endswith(':time_s'))
+    lock_wait = sum(v for (src, name), v in deltas.items()
+                    if src == 'wait' and name.startswith('wait/lock/') and name.endswith(':time_s'))
+    top_statement, top_statement_time = _top(deltas, 'statement', ':time_s')
+    top_wait, top_wait_time = _top(deltas, 'wait', ':time_s')
+    row.update({
+        'rows_inserted_per_s': round(row['rows_inserted'] / duration, 1) if duration > 0 else 0.0,
+        'log_MB_per_s': round(row['log_bytes_written'] / 1024 / 1024 / duration, 2) if duration > 0 else 0.0,
+        'fsyncs_per_s': round((row['log_fsyncs'] + row['data_fsyncs']) / duration, 1) if duration > 0 else 0.0,
+        'buffer_pool_hit_pct': round(100.0 * (1 - row['buffer_pool_reads'] / requests), 2) if requests else '',
+        'statement_time_s': round(statement_time, 3),
+        'top_statement': top_statement,
+        'top_statement_time_s': round(top_statement_time, 3),
+        'lock_wait_time_s': round(lock_wait, 3),
+        'top_wait': top_wait,
+        'top_wait_time_s': round(top_wait_time, 3),
+    })
+    return row
+
+
+def write_detail(file_path, label, deltas):
+    write_header = not os.path.exists(file_path)
+    with open(file_path, mode='a', newline='') as f:
+        writer = csv.writer(f)
+        if write_header:
+            writer.writerow(detail_headers)
+        for (source, name), value in sorted(deltas.items()):
+            writer.writerow([label, source, name, round(value, 6)])
+
+
+# --- One Phase ---
+class ServerMetrics:
+    def __init__(self, conn_params, label, summary_file=None, detail_file=None):
+        self.conn_params = conn_params
+        self.label = label
+        self.summary_file = summary_file
+        self.detail_file = detail_file
+        self.summary = None
+        self._conn = None
+        self._before = None
+        self._started = None
+
+    def start(self):
+        # No default database: restores drop and recreate it mid-phase
+        self._conn = connect(self.conn_params, use_db=False)
+        self._before = snapshot(self._conn)
+        self._started = time.time()
+        return self
+
+    def stop(self):
+        duration = time.time() - self._started
+        after = snapshot(self._conn)
+        self._conn.close()
+        deltas = diff(self._before, after)
+        self.summary = summarize(self.label, self._started, duration, deltas, after)
+        if self.summary_file:
+            log_to_csv(self.summary_file, self.summary, summary_headers)
+        if self.detail_file:
+            write_detail(self.detail_file, self.label, deltas)
+        return self.summary
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
@@ -1,10 +1,16 @@
-from faker import Faker
-import mysql.connector
-import subprocess
-import os
 import time
-import psutil
-import csv
+from backup_verify import save_checksums, table_checksums, verify_restore
+from chunked_dump import dump_database, dump_size_bytes
+from chunked_restore import BULK_SESSION_SQL, log_chunk_stats, restore_database
+from compression import backup_command_to_file, compressed_path, restore_file_to_command
+from db_common import RowInserter, get_db_size, log_pipeline_stages, log_to_csv
+from db_pool import apply_sql_file, connect_stats, get_pool, pooled_connection
+from dedup_store import DedupStore
+from live_load import LOAD_COLUMNS, LiveLoad, LoadWindow
+from resource_sampler import RESOURCE_COLUMNS, ResourceSampler
+from restore_tuning import RestoreTuning
+from server_metrics import ServerMetrics
+from workload import Workload
 
 # --- Config ---
 DB_NAME = 'testdb'
@@ -16,75 +22,133 @@ RECORDS_PER_BATCH = 10000
 BACKUP_FILE = 'full_backup.sql'
 BACKUP_LOG_CSV = 'full_backup_log.csv'
 RESTORE_LOG_CSV = 'full_restore_log.csv'
+LOAD_METHOD = 'executemany'     # 'executemany', 'multirow' or 'infile'
+LOAD_BATCH_SIZE = 5000
+DATA_SEED = 42
+SEED_WORKERS = 1                # >1 seeds over a process pool, one connection per worker
+FULL_BACKUP_ENGINE = 'mysqldump'  # 'mysqldump' or 'chunked' (parallel primary-key range dump)
+CHUNKED_BACKUP_DIR = 'full_backup_chunks'
+DUMP_WORKERS = 4
+DUMP_CHUNK_ROWS = 50000
+RESTORE_WORKERS = 4
+RESTORE_CHUNK_LOG_CSV = 'full_restore_chunk_log.csv'
+RESTORE_MODE = 'normal'         # 'normal' or 'fast': relaxed flush/sync + sql_log_bin=0 while restoring, then reverted
+APPLY_CLIENT = 'pool'           # 'pool': replay SQL dumps in-process over a pooled connection, 'mysql': spawn the client
+BACKUP_CODEC = 'none'           # 'none', 'gzip' or 'zstd' (mysqldump engine only)
+BACKUP_CODEC_LEVEL = None       # None = codec default (gzip 6, zstd 3)
+BACKUP_CODEC_THREADS = 0        # zstd worker threads, 0 = single-threaded
+DEDUP_STORE_DIR = None          # e.g. 'backup_store': keep every full backup, deduplicated (mysqldump engine)
+RESOURCE_SAMPLE_INTERVAL_S = 0.05
+RESOURCE_SAMPLES_CSV = 'full_resource_samples.csv'  # CPU / RSS / disk time series per backup and restore
+SERVER_METRICS_CSV = 'full_server_metrics.csv'  # status / InnoDB / performance_schema diffs per phase
+SERVER_METRICS_DETAIL_CSV = 'full_server_metrics_detail.csv'
+ARTIFACT_DIGEST = True          # sha256 of the dump stream as it is written, kept as a .sha256 sidecar (mysqldump engine)
+BACKUP_SINK = 'buffered'        # 'buffered', 'fadvise' (drop written pages from the page cache) or 'direct' (O_DIRECT); restores drop read pages unless 'buffered'
+PIPELINE_STATS_CSV = 'full_pipeline_stats.csv'  # per-stage MB/s and stall time of every streamed dump / restore
+CHECKSUM_FILE = 'full_checksums.json'  # primary-key range hashes taken before the drop
+VERIFY_WORKERS = 4
+VERIFY_LOG_CSV = 'full_verify_log.csv'
+LIVE_LOAD_RATE = 0              # rows/s inserted into `live_load` by concurrent writers while backups run; 0 = off
+LIVE_LOAD_WRITERS = 4
+WORKLOAD_FILE = None            # multi-table schema + UPDATE/DELETE mix, e.g. 'workload_example.json'; None = customers
 
-backup_headers = ['batch', 'records_total', 'backup_time_s', 'backup_size_MB']
-restore_headers = ['total_records', 'restore_time_s', 'cpu_before', 'cpu_after']
+backup_headers = ['batch', 'records_total', 'backup_time_s', 'backup_size_MB',
+                  'insert_time_s', 'insert_rows_per_s', 'insert_workers',
+                  'insert_worker_rows_per_s_min', 'insert_worker_rows_per_s_max', 'engine',
+                  'backup_raw_MB', 'codec', 'codec_level', 'codec_threads', 'cpu_time_s',
+                  'dedup_chunks', 'dedup_new_chunks', 'dedup_store_MB', 'sha256', 'cpu_before', 'cpu_after'] + RESOURCE_COLUMNS + LOAD_COLUMNS
+restore_headers = ['total_records', 'restore_time_s', 'cpu_before', 'cpu_after',
+                   'engine', 'rows_per_s', 'chunks', 'chunk_time_avg_s', 'chunk_time_max_s', 'index_rebuild_s',
+                   'codec', 'restore_mode', 'apply_client', 'connect_time_s'] + RESOURCE_COLUMNS
 
-fake = Faker()
-
-# --- Log to CSV ---
-def log_to_csv(file_path, data, headers):
-    write_header = not os.path.exists(file_path)
-    with open(file_path, mode='a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        if write_header:
-            writer.writeheader()
-        writer.writerow(data)
+CONN_PARAMS = dict(host='localhost', user=DB_USER, password=DB_PASS, database=DB_NAME)
+store = DedupStore(DEDUP_STORE_DIR) if DEDUP_STORE_DIR else None
+inserter = RowInserter(CONN_PARAMS, SEED_WORKERS, DATA_SEED, LOAD_BATCH_SIZE, LOAD_METHOD)
+workload = Workload.load(WORKLOAD_FILE, CONN_PARAMS, seed=DATA_SEED, batch_size=LOAD_BATCH_SIZE,
+                         method=LOAD_METHOD) if WORKLOAD_FILE else None
 
 # --- DB Connection ---
 def get_conn(use_db=True):
-    return mysql.connector.connect(
-        host='localhost',
-        user=DB_USER,
-        password=DB_PASS,
-        database=DB_NAME if use_db else None
-    )
-
-# --- DB Size ---
-def get_db_size():
-    conn = get_conn()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT ROUND(SUM(data_length + index_length) / 1024 / 1024, 2)
-        FROM information_schema.tables
-        WHERE table_schema = %s
-    """, (DB_NAME,))
-    size = cursor.fetchone()[0]
-    conn.close()
-    return size
+    return pooled_connection(CONN_PARAMS, use_db, allow_local_infile=(LOAD_METHOD == 'infile'))
 
 # --- Full Backup (Overwrite) ---
-def do_full_backup(batch_number, records_total):
-    print(f"[*] Creating full backup: {BACKUP_FILE}")
-    start = time.time()
-    subprocess.run([
-        "mysqldump", "-u", DB_USER, f"-p{DB_PASS}", DB_NAME
-    ], stdout=open(BACKUP_FILE, "w"))
-    duration = round(time.time() - start, 2)
-    size = round(os.path.getsize(BACKUP_FILE) / 1024 / 1024, 2)
-    print(f"[✔] Backup completed in {duration}s, size: {size} MB")
+def do_full_backup(batch_number, records_total, insert_stats):
+    with LoadWindow(live_load) as load:
+        server_metrics = ServerMetrics(CONN_PARAMS, f"backup batch {batch_number}",
+                                       SERVER_METRICS_CSV, SERVER_METRICS_DETAIL_CSV).start()
+        sampler = ResourceSampler(f"backup batch {batch_number}", RESOURCE_SAMPLE_INTERVAL_S, RESOURCE_SAMPLES_CSV).start()
+        if FULL_BACKUP_ENGINE == 'chunked':
+            print(f"[*] Creating chunked full backup: {CHUNKED_BACKUP_DIR} ({DUMP_WORKERS} workers)")
+            backup_path = CHUNKED_BACKUP_DIR
+            start = time.time()
+            manifest = dump_database(CONN_PARAMS, CHUNKED_BACKUP_DIR, chunk_rows=DUMP_CHUNK_ROWS, workers=DUMP_WORKERS)
+            duration = round(time.time() - start, 2)
+            size = round(dump_size_bytes(CHUNKED_BACKUP_DIR) / 1024 / 1024, 2)
+            chunks = sum(len(t['chunks']) for t in manifest['tables'])
+            print(f"[✔] Backup completed in {duration}s, size: {size} MB, chunks: {chunks}")
+            stats = {'raw_MB': size, 'codec': 'none', 'codec_level': '', 'codec_threads': '', 'cpu_time_s': ''}
+        elif store:
+            # Every full backup is kept; only chunks not already in the store are written
+            backup_path = f"full_batch{batch_number}"
+            print(f"[*] Creating deduplicated full backup: {backup_path} in {DEDUP_STORE_DIR}")
+            stats = store.put_command(backup_path, [
+                "mysqldump", "-u", DB_USER, f"-p{DB_PASS}", DB_NAME
+            ])
+            stats.update({'codec': 'none', 'codec_level': '', 'codec_threads': '', 'cpu_time_s': ''})
+            duration = stats['backup_time_s']
+            size = stats['new_MB']
+            print(f"[✔] Backup completed in {duration}s, wrote {size} MB of {stats['raw_MB']} MB "
+                  f"({stats['new_chunks']}/{stats['chunks']} new chunks)")
+        else:
+            backup_path = compressed_path(BACKUP_FILE, BACKUP_CODEC)
+            print(f"[*] Creating full backup: {backup_path}")
+            stats = backup_command_to_file([
+                "mysqldump", "-u", DB_USER, f"-p{DB_PASS}", DB_NAME
+            ], backup_path, BACKUP_CODEC, BACKUP_CODEC_LEVEL, BACKUP_CODEC_THREADS, digest=ARTIFACT_DIGEST,
+               sink=BACKUP_SINK)
+            log_pipeline_stages(PIPELINE_STATS_CSV, f"backup {batch_number}", stats['stages'])
+            duration = stats['backup_time_s']
+            size = stats['stored_MB']
+            print(f"[✔] Backup completed in {duration}s, size: {size} MB (raw {stats['raw_MB']} MB, {BACKUP_CODEC})")
+        resources = sampler.stop()
+        server_metrics.stop()
 
     # Log to CSV
-    log_to_csv(BACKUP_LOG_CSV, {
+    log_to_csv(BACKUP_LOG_CSV, dict({
         'batch': batch_number,
         'records_total': records_total,
         'backup_time_s': duration,
-        'backup_size_MB': size
-    }, backup_headers)
+        'backup_size_MB': size,
+        'insert_time_s': insert_stats['load_time_s'],
+        'insert_rows_per_s': insert_stats['rows_per_s'],
+        'insert_workers': insert_stats['workers'],
+        'insert_worker_rows_per_s_min': insert_stats['worker_rows_per_s_min'],
+        'insert_worker_rows_per_s_max': insert_stats['worker_rows_per_s_max'],
+        'engine': FULL_BACKUP_ENGINE,
+        'backup_raw_MB': stats['raw_MB'],
+        'codec': stats['codec'],
+        'codec_level': stats['codec_level'],
+        'codec_threads': stats['codec_threads'],
+        'cpu_time_s': stats['cpu_time_s'],
+        'dedup_chunks': stats.get('chunks', ''),
+        'dedup_new_chunks': stats.get('new_chunks', ''),
+        'dedup_store_MB': round(store.stored_bytes() / 1024 / 1024, 2) if store else '',
+        'sha256': stats.get('sha256', '')
+    }, **resources, **load.stats), backup_headers)
 
-    return BACKUP_FILE
+    return backup_path
 
 # --- Insert Dummy Records ---
-def insert_fake_data(count):
-    conn = get_conn()
-    cursor = conn.cursor()
-    for _ in range(count):
-        name = fake.name()
-        email = fake.email()
-        address = fake.address().replace("\n", " ")
-        cursor.execute("INSERT INTO customers (name, email, address) VALUES (%s, %s, %s)", (name, email, address))
-    conn.commit()
-    conn.close()
+# Workload mode: the initial rows are inserts, batches follow the workload's mix
+def insert_fake_data(count, initial=False):
+    if workload:
+        return workload.seed_rows(count) if initial else workload.apply_batch(count)
+    return inserter.insert('customers', count)
+
+# Rows now in the database: workload batches also update and delete (and
+# cascade), so their net rows are counted instead of assumed
+def count_rows(expected):
+    return workload.row_count() if workload else expected
 
 # --- Step 1: Create DB and Insert Initial Data ---
 print("[*] Setting up initial database...")
@@ -101,22 +165,38 @@ CREATE TABLE customers (
 """)
 conn.commit()
 conn.close()
+if workload:
+    workload.create_schema()
 
 print(f"[*] Inserting {INITIAL_RECORDS} initial records...")
-insert_fake_data(INITIAL_RECORDS)
+insert_stats = insert_fake_data(INITIAL_RECORDS, initial=True)
+total_records = count_rows(INITIAL_RECORDS)
 print("[✔] Initial data inserted.")
 
+live_load = LiveLoad(CONN_PARAMS, LIVE_LOAD_RATE, LIVE_LOAD_WRITERS).start() if LIVE_LOAD_RATE else None
+
 # --- Step 2: Initial Full Backup ---
-db_size = get_db_size()
+db_size = get_db_size(CONN_PARAMS)
 print(f"[i] DB size before full backup: {db_size} MB")
-latest_backup = do_full_backup(batch_number=0, records_total=INITIAL_RECORDS)
+latest_backup = do_full_backup(batch_number=0, records_total=total_records, insert_stats=insert_stats)
 
 # --- Step 3: Incremental Batches with Full Backup Overwrite ---
 for batch in range(1, INCREMENTAL_BATCHES + 1):
     print(f"[*] Inserting batch {batch} ({RECORDS_PER_BATCH} records)...")
-    insert_fake_data(RECORDS_PER_BATCH)
-    total_records = INITIAL_RECORDS + batch * RECORDS_PER_BATCH
-    latest_backup = do_full_backup(batch_number=batch, records_total=total_records)
+    insert_stats = insert_fake_data(RECORDS_PER_BATCH)
+    total_records = count_rows(INITIAL_RECORDS + batch * RECORDS_PER_BATCH)
+    latest_backup = do_full_backup(batch_number=batch, records_total=total_records, insert_stats=insert_stats)
+
+inserter.close()
+if live_load:
+    live_load.stop()
+
+print("[*] Hashing primary-key ranges for post-restore verification...")
+# The live load table depends on where each backup cut it off, so it is not compared
+source_checksums = table_checksums(CONN_PARAMS, workers=VERIFY_WORKERS,
+                                   exclude=(live_load.table,) if live_load else ())
+save_checksums(CHECKSUM_FILE, source_checksums)
+print(f"[✔] Checksums saved to {CHECKSUM_FILE} ({source_checksums['checksum_time_s']}s)")
 
 # --- Step 4: Simulate DB Drop ---
 print("[!] Dropping and recreating database...")
@@ -130,32 +210,62 @@ print("[✔] Database reset.")
 
 # --- Step 5: Restore from Full Backup ---
 print("[*] Restoring from backup...")
-cpu_before = psutil.cpu_percent(interval=1)
-start_time = time.time()
-subprocess.run([
-    "mysql", "-u", DB_USER, f"-p{DB_PASS}", DB_NAME
-], stdin=open(latest_backup, "r"))
-restore_time = round(time.time() - start_time, 2)
-cpu_after = psutil.cpu_percent(interval=1)
+with RestoreTuning(CONN_PARAMS, RESTORE_MODE) as tuning:
+    server_metrics = ServerMetrics(CONN_PARAMS, 'restore full', SERVER_METRICS_CSV, SERVER_METRICS_DETAIL_CSV).start()
+    sampler = ResourceSampler('restore full', RESOURCE_SAMPLE_INTERVAL_S, RESOURCE_SAMPLES_CSV).start()
+    start_time = time.time()
+    restore_stats = {}
+    if FULL_BACKUP_ENGINE == 'chunked':
+        restore_stats = restore_database(CONN_PARAMS, latest_backup, workers=RESTORE_WORKERS,
+                                         session_sql=BULK_SESSION_SQL + tuning.session_sql())
+        print(f"[i] Replayed {restore_stats['chunks']} chunks over {RESTORE_WORKERS} connections, "
+              f"index rebuild {restore_stats['index_rebuild_s']}s")
+    elif store:
+        store.restore_to_command(latest_backup, [
+            "mysql", "-u", DB_USER, f"-p{DB_PASS}", *tuning.client_args(), DB_NAME
+        ])
+    elif APPLY_CLIENT == 'pool':
+        restore_stats = apply_sql_file(get_pool(CONN_PARAMS, extra_session_sql=tuning.session_sql()),
+                                       latest_backup, BACKUP_CODEC)
+        print(f"[i] Replayed {restore_stats['statements']} statements in-process")
+    else:
+        restore_stats = restore_file_to_command([
+            "mysql", "-u", DB_USER, f"-p{DB_PASS}", *tuning.client_args(), DB_NAME
+        ], latest_backup, BACKUP_CODEC, drop_cache=BACKUP_SINK != 'buffered')
+    restore_time = round(time.time() - start_time, 2)
+    log_pipeline_stages(PIPELINE_STATS_CSV, 'restore', restore_stats.get('stages', []))
+    resources = sampler.stop()
+    server_metrics.stop()
 
 print(f"[✔] Restore completed in {restore_time}s")
-print(f"[i] CPU load during restore (approx): from {cpu_before}% to {cpu_after}%")
+print(f"[i] CPU during restore: avg {resources['sys_cpu_avg']}%, peak {resources['sys_cpu_peak']}% "
+      f"(mysqld avg {resources['mysqld_cpu_avg']}%), disk write {resources['disk_write_MB']} MB")
 
 # Log restore performance
-total_records = INITIAL_RECORDS + INCREMENTAL_BATCHES * RECORDS_PER_BATCH
-log_to_csv(RESTORE_LOG_CSV, {
+log_to_csv(RESTORE_LOG_CSV, dict({
     'total_records': total_records,
     'restore_time_s': restore_time,
-    'cpu_before': cpu_before,
-    'cpu_after': cpu_after
-}, restore_headers)
+    'engine': FULL_BACKUP_ENGINE,
+    'rows_per_s': round(total_records / restore_time, 1) if restore_time > 0 else 0.0,
+    'chunks': restore_stats.get('chunks', 1),
+    'chunk_time_avg_s': restore_stats.get('chunk_time_avg_s', ''),
+    'chunk_time_max_s': restore_stats.get('chunk_time_max_s', ''),
+    'index_rebuild_s': restore_stats.get('index_rebuild_s', ''),
+    'codec': 'none' if FULL_BACKUP_ENGINE == 'chunked' else BACKUP_CODEC,
+    'restore_mode': RESTORE_MODE,
+    'apply_client': 'pool' if 'statements' in restore_stats else 'mysql',
+    'connect_time_s': restore_stats.get('connect_time_s', '')
+}, **resources), restore_headers)
+if 'chunk_stats' in restore_stats:
+    log_chunk_stats(RESTORE_CHUNK_LOG_CSV, restore_stats['chunk_stats'], run_label=time.strftime('%Y-%m-%d %H:%M:%S'))
 
-# --- Step 6: Verify Final Row Count ---
-print("[*] Verifying recovered data...")
-conn = get_conn()
-cursor = conn.cursor()
-cursor.execute("SELECT COUNT(*) FROM customers")
-row_count = cursor.fetchone()[0]
-conn.close()
-print(f"[✔] Final row count after restore: {row_count}")
+# --- Step 6: Verify Recovered Data ---
+print("[*] Verifying recovered data against source checksums...")
+artifacts = [] if FULL_BACKUP_ENGINE == 'chunked' or store else [latest_backup]
+report = verify_restore(CONN_PARAMS, source_checksums, artifacts, BACKUP_CODEC, VERIFY_WORKERS, VERIFY_LOG_CSV)
+print(f"[✔] Final row count after restore: {report['rows_actual']}")
+
+conn_stats = connect_stats()
+print(f"[i] Connections: {conn_stats['connects']} opened in {conn_stats['connect_time_s']}s "
+      f"for {conn_stats['checkouts']} checkouts")
 
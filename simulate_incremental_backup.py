@@ -1,10 +1,19 @@
-from faker import Faker
-import mysql.connector
-import subprocess
-import os
 import time
-import psutil
-import csv
+from backup_verify import save_checksums, table_checksums, verify_restore
+from binlog_applier import BinlogApplier, print_histograms
+from binlog_compact import compact_segments
+from backup_scheduler import BackupScheduler
+from binlog_incremental import BinlogIncrementalEngine, dump_binlog_position
+from chunked_dump import dump_database, dump_size_bytes
+from chunked_restore import BULK_SESSION_SQL, restore_database
+from compression import backup_command_to_file, compressed_path, restore_file_to_command
+from db_common import RowInserter, log_pipeline_stages, log_to_csv
+from db_pool import apply_sql_file, connect_stats, get_pool, pooled_connection
+from live_load import LOAD_COLUMNS, LiveLoad, LoadWindow
+from resource_sampler import RESOURCE_COLUMNS, ResourceSampler
+from restore_tuning import RestoreTuning
+from server_metrics import ServerMetrics
+from workload import Workload
 
 # --- Config ---
 DB_NAME = 'testdb'
@@ -15,47 +24,134 @@ BINLOG_DIR = '/var/log/mysql'
 NUM_INITIAL_RECORDS = 400000
 NUM_INCREMENTAL_BATCHES = 10
 RECORDS_PER_BATCH = 10000
+LOAD_METHOD = 'executemany'     # 'executemany', 'multirow' or 'infile'
+LOAD_BATCH_SIZE = 5000
+DATA_SEED = 42
+SEED_WORKERS = 1                # >1 seeds over a process pool, one connection per worker
+FULL_BACKUP_ENGINE = 'mysqldump'  # 'mysqldump' or 'chunked' (parallel primary-key range dump)
+CHUNKED_BACKUP_DIR = 'full_backup_chunks'
+DUMP_WORKERS = 4
+DUMP_CHUNK_ROWS = 50000
+RESTORE_WORKERS = 4
+BACKUP_CODEC = 'none'           # 'none', 'gzip' or 'zstd' (mysqldump dumps and binlog extracts)
+BACKUP_CODEC_LEVEL = None       # None = codec default (gzip 6, zstd 3)
+BACKUP_CODEC_THREADS = 0        # zstd worker threads, 0 = single-threaded
 
 # --- Log Files ---
 BACKUP_LOG_CSV = 'incremental_backup_log.csv'      # Logs full + incremental
 RESTORE_LOG_CSV = 'incremental_restore_log.csv'    # Logs restore performance
+BINLOG_STATE_FILE = 'incremental_binlog_checkpoint.json'
+FLUSH_LOGS_PER_BATCH = True     # start each batch in a fresh binlog file
+COMPACT_BINLOGS = False         # merge all binlog extracts into one compacted file and apply it in one pass
+COMPACTED_BINLOG_FILE = 'binlog_compacted.sql'
+ADAPTIVE_SCHEDULING = False     # let the scheduler choose full vs incremental at each batch boundary
+RESTORE_TIME_BUDGET_S = 30.0    # predicted full restore + incremental replay must stay under this
+RESTORE_MODE = 'normal'         # 'normal' or 'fast': relaxed flush/sync + sql_log_bin=0 while restoring, then reverted
+APPLY_CLIENT = 'pool'           # 'pool': replay dumps and binlog extracts in-process, 'mysql': spawn the client
+APPLY_PIPELINE = 64             # binlog statements per round trip on the in-process applier
+APPLY_LATENCY_CSV = 'incremental_apply_latency.csv'  # per statement type latency histogram per apply
+RESOURCE_SAMPLE_INTERVAL_S = 0.05
+RESOURCE_SAMPLES_CSV = 'incremental_resource_samples.csv'  # CPU / RSS / disk time series per backup and restore
+SERVER_METRICS_CSV = 'incremental_server_metrics.csv'  # status / InnoDB / performance_schema diffs per phase
+SERVER_METRICS_DETAIL_CSV = 'incremental_server_metrics_detail.csv'
+ARTIFACT_DIGEST = True          # sha256 of every dump / binlog extract as it is written (.sha256 sidecar)
+BACKUP_SINK = 'buffered'        # 'buffered', 'fadvise' (drop written pages from the page cache) or 'direct' (O_DIRECT); restores drop read pages unless 'buffered'
+PIPELINE_STATS_CSV = 'incremental_pipeline_stats.csv'  # per-stage MB/s and stall time of every streamed dump / extract / restore
+CHECKSUM_FILE = 'incremental_checksums.json'  # primary-key range hashes taken before the drop
+VERIFY_WORKERS = 4
+VERIFY_LOG_CSV = 'incremental_verify_log.csv'
+LIVE_LOAD_RATE = 0              # rows/s inserted into `live_load` by concurrent writers while backups run; 0 = off
+LIVE_LOAD_WRITERS = 4
+WORKLOAD_FILE = None            # multi-table schema + UPDATE/DELETE mix, e.g. 'workload_example.json'; None = customers
 
 # --- CSV Headers ---
-backup_headers = ['batch', 'type', 'records_inserted', 'backup_time_s', 'backup_size_MB']
-restore_headers = ['phase', 'batch', 'restore_time_s', 'cpu_before', 'cpu_after']
+backup_headers = ['batch', 'type', 'records_inserted', 'backup_time_s', 'backup_size_MB',
+                  'insert_time_s', 'insert_rows_per_s', 'insert_workers',
+                  'insert_worker_rows_per_s_min', 'insert_worker_rows_per_s_max',
+                  'backup_raw_MB', 'codec', 'codec_level', 'codec_threads', 'cpu_time_s',
+                  'start_file', 'start_pos', 'end_file', 'end_pos', 'binlog_files', 'binlog_bytes', 'events',
+                  'sha256', 'cpu_before', 'cpu_after'] + RESOURCE_COLUMNS + LOAD_COLUMNS
+restore_headers = ['phase', 'batch', 'records', 'restore_time_s', 'cpu_before', 'cpu_after',
+                   'engine', 'rows_per_s', 'chunks', 'chunk_time_avg_s', 'chunk_time_max_s', 'index_rebuild_s',
+                   'codec', 'segments_before', 'segments_after', 'bytes_before', 'bytes_after', 'compact_time_s',
+                   'restore_mode', 'apply_client', 'connect_time_s'] + RESOURCE_COLUMNS
 
-fake = Faker()
-
-# --- Utility: Log to CSV ---
-def log_to_csv(file_path, data, headers):
-    write_header = not os.path.exists(file_path)
-    with open(file_path, mode='a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        if write_header:
-            writer.writeheader()
-        writer.writerow(data)
+CONN_PARAMS = dict(host='localhost', user=DB_USER, password=DB_PASS, database=DB_NAME)
+inserter = RowInserter(CONN_PARAMS, SEED_WORKERS, DATA_SEED, LOAD_BATCH_SIZE, LOAD_METHOD)
+workload = Workload.load(WORKLOAD_FILE, CONN_PARAMS, seed=DATA_SEED, batch_size=LOAD_BATCH_SIZE,
+                         method=LOAD_METHOD) if WORKLOAD_FILE else None
 
 # --- DB Connection ---
 def get_conn(use_db=True):
-    return mysql.connector.connect(
-        host='localhost',
-        user=DB_USER,
-        password=DB_PASS,
-        database=DB_NAME if use_db else None
-    )
-
-# --- DB Size ---
-def get_db_size():
-    conn = get_conn()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT ROUND(SUM(data_length + index_length) / 1024 / 1024, 2)
-        FROM information_schema.tables
-        WHERE table_schema = %s
-    """, (DB_NAME,))
-    size_mb = cursor.fetchone()[0]
-    conn.close()
-    return size_mb
+    return pooled_connection(CONN_PARAMS, use_db, allow_local_infile=(LOAD_METHOD == 'infile'))
+
+# --- Insert Rows (in-process or over the parallel seeder) ---
+# Workload mode: the initial rows are inserts, batches follow the workload's mix
+def insert_rows(count, initial=False):
+    if workload:
+        return workload.seed_rows(count) if initial else workload.apply_batch(count)
+    return inserter.insert('customers', count)
+
+# Rows now in the database: workload batches also update and delete (and
+# cascade), so their net rows are counted instead of assumed
+def count_rows(expected):
+    return workload.row_count() if workload else expected
+
+# --- Full Backup (mysqldump or chunked engine) ---
+full_backup_path = CHUNKED_BACKUP_DIR if FULL_BACKUP_ENGINE == 'chunked' else compressed_path(FULL_BACKUP_FILE, BACKUP_CODEC)
+
+def sample_resources(label):
+    return ResourceSampler(label, RESOURCE_SAMPLE_INTERVAL_S, RESOURCE_SAMPLES_CSV).start()
+
+def capture_server_metrics(label):
+    return ServerMetrics(CONN_PARAMS, label, SERVER_METRICS_CSV, SERVER_METRICS_DETAIL_CSV).start()
+
+def take_full_backup(batch):
+    with LoadWindow(live_load) as load:
+        server_metrics = capture_server_metrics(f"backup full {batch}")
+        sampler = sample_resources(f"backup full {batch}")
+        start_time = time.time()
+        if FULL_BACKUP_ENGINE == 'chunked':
+            manifest = dump_database(CONN_PARAMS, CHUNKED_BACKUP_DIR, chunk_rows=DUMP_CHUNK_ROWS, workers=DUMP_WORKERS)
+            backup_duration = round(time.time() - start_time, 2)
+            backup_size = round(dump_size_bytes(CHUNKED_BACKUP_DIR) / 1024 / 1024, 2)
+            stats = {'raw_MB': backup_size, 'codec': 'none', 'codec_level': '', 'codec_threads': '', 'cpu_time_s': '',
+                     'binlog': manifest['binlog']}
+        else:
+            # One snapshot; its binlog coordinates go into the dump header
+            stats = backup_command_to_file([
+                "mysqldump", "-u", DB_USER, f"-p{DB_PASS}", "--single-transaction", "--source-data=2", DB_NAME
+            ], full_backup_path, BACKUP_CODEC, BACKUP_CODEC_LEVEL, BACKUP_CODEC_THREADS, digest=ARTIFACT_DIGEST,
+               sink=BACKUP_SINK)
+            log_pipeline_stages(PIPELINE_STATS_CSV, f"backup full {batch}", stats['stages'])
+            stats['binlog'] = dump_binlog_position(full_backup_path, BACKUP_CODEC)
+            backup_duration = stats['backup_time_s']
+            backup_size = stats['stored_MB']
+        stats['resources'] = sampler.stop()
+        server_metrics.stop()
+    stats['load'] = load.stats
+    print(f"[✔] Full backup completed in {backup_duration}s, size: {backup_size} MB")
+    return backup_duration, backup_size, stats
+
+def log_full_backup(batch, records, insert_stats, backup_duration, backup_size, stats):
+    log_to_csv(BACKUP_LOG_CSV, dict({
+        'batch': batch,
+        'type': 'full',
+        'records_inserted': records,
+        'backup_time_s': backup_duration,
+        'backup_size_MB': backup_size,
+        'insert_time_s': insert_stats['load_time_s'],
+        'insert_rows_per_s': insert_stats['rows_per_s'],
+        'insert_workers': insert_stats['workers'],
+        'insert_worker_rows_per_s_min': insert_stats['worker_rows_per_s_min'],
+        'insert_worker_rows_per_s_max': insert_stats['worker_rows_per_s_max'],
+        'backup_raw_MB': stats['raw_MB'],
+        'codec': stats['codec'],
+        'codec_level': stats['codec_level'],
+        'codec_threads': stats['codec_threads'],
+        'cpu_time_s': stats['cpu_time_s'],
+        'sha256': stats.get('sha256', '')
+    }, **stats['resources'], **stats['load']), backup_headers)
 
 # --- Step 1: Setup DB ---
 conn = get_conn()
@@ -72,76 +168,113 @@ CREATE TABLE customers (
 )
 """)
 
-for _ in range(NUM_INITIAL_RECORDS):
-    name = fake.name()
-    email = fake.email()
-    address = fake.address().replace("\n", " ")
-    cursor.execute("INSERT INTO customers (name, email, address) VALUES (%s, %s, %s)", (name, email, address))
-
 conn.commit()
 conn.close()
+if workload:
+    workload.create_schema()
+insert_stats = insert_rows(NUM_INITIAL_RECORDS, initial=True)
+total_records = count_rows(NUM_INITIAL_RECORDS)
 print("[✔] Initial data inserted.")
 
+live_load = LiveLoad(CONN_PARAMS, LIVE_LOAD_RATE, LIVE_LOAD_WRITERS).start() if LIVE_LOAD_RATE else None
+
 # --- Step 2: Full Backup ---
 print("[*] Performing full backup...")
-start_time = time.time()
-subprocess.run([
-    "mysqldump", "-u", DB_USER, f"-p{DB_PASS}", DB_NAME
-], stdout=open(FULL_BACKUP_FILE, "w"))
-backup_duration = round(time.time() - start_time, 2)
-backup_size = round(os.path.getsize(FULL_BACKUP_FILE) / 1024 / 1024, 2)
-print(f"[✔] Full backup completed in {backup_duration}s, size: {backup_size} MB")
-
-log_to_csv(BACKUP_LOG_CSV, {
-    'batch': 0,
-    'type': 'full',
-    'records_inserted': NUM_INITIAL_RECORDS,
-    'backup_time_s': backup_duration,
-    'backup_size_MB': backup_size
-}, backup_headers)
+backup_duration, backup_size, full_stats = take_full_backup(0)
+log_full_backup(0, total_records, insert_stats, backup_duration, backup_size, full_stats)
 
 # --- Step 3: Insert Incremental Data + Binlog Backup ---
 binlogs = []
-total_inserted = NUM_INITIAL_RECORDS
+chain_rows = []                 # rows changed by each incremental since the full backup being restored
+full_records = total_records
+engine = BinlogIncrementalEngine(CONN_PARAMS, BINLOG_DIR, BINLOG_STATE_FILE,
+                                 BACKUP_CODEC, BACKUP_CODEC_LEVEL, BACKUP_CODEC_THREADS, ARTIFACT_DIGEST, BACKUP_SINK)
+# The chain starts where the full backup's snapshot was taken, not where the dump finished
+engine.set_checkpoint(full_stats['binlog'])
+scheduler = BackupScheduler(RESTORE_TIME_BUDGET_S) if ADAPTIVE_SCHEDULING else None
+if scheduler:
+    scheduler.start_chain(total_records)
 for batch in range(1, NUM_INCREMENTAL_BATCHES + 1):
-    print(f"[*] Flushing logs before batch {batch}...")
-    conn = get_conn()
-    cursor = conn.cursor()
-    cursor.execute("FLUSH LOGS")
-    cursor.execute("SHOW MASTER STATUS")
-    log_file_before, log_pos = cursor.fetchone()[0:2]
+    if FLUSH_LOGS_PER_BATCH:
+        print(f"[*] Flushing logs before batch {batch}...")
+        conn = get_conn()
+        cursor = conn.cursor()
+        cursor.execute("FLUSH LOGS")
+        conn.close()
 
     print(f"[*] Inserting batch {batch} of {NUM_INCREMENTAL_BATCHES}...")
-    for _ in range(RECORDS_PER_BATCH):
-        name = fake.name()
-        email = fake.email()
-        address = fake.address().replace("\n", " ")
-        cursor.execute("INSERT INTO customers (name, email, address) VALUES (%s, %s, %s)", (name, email, address))
-    conn.commit()
-
-    binlog_path = os.path.join(BINLOG_DIR, log_file_before)
-    binlog_output = f"binlog_batch{batch}.sql"
+    insert_stats = insert_rows(RECORDS_PER_BATCH)
+    total_records = count_rows(total_records + RECORDS_PER_BATCH)
+
+    if scheduler and scheduler.decide(batch, total_records, insert_stats['rows']) == 'full':
+        print(f"[*] Scheduler: restore budget would be exceeded, taking a full backup at batch {batch}...")
+        backup_duration, backup_size, full_stats = take_full_backup(batch)
+        engine.set_checkpoint(full_stats['binlog'])
+        log_full_backup(batch, total_records, insert_stats, backup_duration, backup_size, full_stats)
+        scheduler.observe_backup(backup_duration, backup_size)
+        binlogs = []
+        chain_rows = []
+        full_records = total_records
+        continue
+
+    binlog_output = compressed_path(f"binlog_batch{batch}.sql", BACKUP_CODEC)
     binlogs.append(binlog_output)
+    chain_rows.append(insert_stats['rows'])
+
+    # Extract exactly checkpoint -> current position, whatever rotated in between
+    start = engine.checkpoint()
+    print(f"[*] Creating incremental backup from {start['file']}:{start['position']}...")
+    with LoadWindow(live_load) as load:
+        server_metrics = capture_server_metrics(f"backup incremental {batch}")
+        sampler = sample_resources(f"backup incremental {batch}")
+        inc_stats = engine.backup_window(binlog_output)
+        resources = sampler.stop()
+        server_metrics.stop()
+    log_pipeline_stages(PIPELINE_STATS_CSV, f"backup incremental {batch}", inc_stats['stages'])
+    inc_duration = inc_stats['backup_time_s']
+    inc_size = inc_stats['stored_MB']
+    print(f"[✔] Incremental backup {batch} saved: {binlog_output} (Time: {inc_duration}s, Size: {inc_size} MB, "
+          f"{inc_stats['events']} events over {inc_stats['binlog_files']} file(s))")
 
-    print(f"[*] Creating incremental backup from {log_file_before}...")
-    start_inc_time = time.time()
-    subprocess.run([
-        "mysqlbinlog", binlog_path
-    ], stdout=open(binlog_output, "w"))
-    inc_duration = round(time.time() - start_inc_time, 2)
-    inc_size = round(os.path.getsize(binlog_output) / 1024 / 1024, 2)
-    print(f"[✔] Incremental backup {batch} saved: {binlog_output} (Time: {inc_duration}s, Size: {inc_size} MB)")
-
-    total_inserted += RECORDS_PER_BATCH
-    log_to_csv(BACKUP_LOG_CSV, {
+    if scheduler:
+        scheduler.observe_backup(inc_duration, inc_size)
+    log_to_csv(BACKUP_LOG_CSV, dict({
         'batch': batch,
         'type': 'incremental',
-        'records_inserted': total_inserted,
+        'records_inserted': total_records,
         'backup_time_s': inc_duration,
-        'backup_size_MB': inc_size
-    }, backup_headers)
+        'backup_size_MB': inc_size,
+        'insert_time_s': insert_stats['load_time_s'],
+        'insert_rows_per_s': insert_stats['rows_per_s'],
+        'insert_workers': insert_stats['workers'],
+        'insert_worker_rows_per_s_min': insert_stats['worker_rows_per_s_min'],
+        'insert_worker_rows_per_s_max': insert_stats['worker_rows_per_s_max'],
+        'backup_raw_MB': inc_stats['raw_MB'],
+        'codec': inc_stats['codec'],
+        'codec_level': inc_stats['codec_level'],
+        'codec_threads': inc_stats['codec_threads'],
+        'cpu_time_s': inc_stats['cpu_time_s'],
+        'start_file': inc_stats['start_file'],
+        'start_pos': inc_stats['start_pos'],
+        'end_file': inc_stats['end_file'],
+        'end_pos': inc_stats['end_pos'],
+        'binlog_files': inc_stats['binlog_files'],
+        'binlog_bytes': inc_stats['binlog_bytes'],
+        'events': inc_stats['events'],
+        'sha256': inc_stats['sha256']
+    }, **resources, **load.stats), backup_headers)
+
+inserter.close()
+if live_load:
+    live_load.stop()
 
-    conn.close()
+print("[*] Hashing primary-key ranges for post-restore verification...")
+# The live load table depends on where each backup cut it off, so it is not compared
+source_checksums = table_checksums(CONN_PARAMS, workers=VERIFY_WORKERS,
+                                   exclude=(live_load.table,) if live_load else ())
+save_checksums(CHECKSUM_FILE, source_checksums)
+print(f"[✔] Checksums saved to {CHECKSUM_FILE} ({source_checksums['checksum_time_s']}s)")
+artifacts = ([] if FULL_BACKUP_ENGINE == 'chunked' else [full_backup_path]) + binlogs
 
 # --- Step 4: Drop and Recreate DB ---
 print("[!] Dropping and recreating database...")
@@ -155,51 +288,115 @@ print("[✔] Database reset complete.")
 
 # --- Step 5: Restore Full Backup ---
 print("[*] Restoring full backup...")
-cpu_before = psutil.cpu_percent(interval=1)
-start_time = time.time()
-subprocess.run([
-    "mysql", "-u", DB_USER, f"-p{DB_PASS}", DB_NAME
-], stdin=open(FULL_BACKUP_FILE, "r"))
-restore_duration = round(time.time() - start_time, 2)
-cpu_after = psutil.cpu_percent(interval=1)
-print(f"[✔] Full restore completed in {restore_duration}s")
-print(f"[i] CPU load during restore (approx): from {cpu_before}% to {cpu_after}%")
-
-log_to_csv(RESTORE_LOG_CSV, {
-    'phase': 'full',
-    'batch': 0,
-    'restore_time_s': restore_duration,
-    'cpu_before': cpu_before,
-    'cpu_after': cpu_after
-}, restore_headers)
-
-# --- Step 6: Apply Incremental Backups ---
-for i, binlog_file in enumerate(binlogs, 1):
-    print(f"[*] Applying incremental backup {i}...")
-    cpu_before = psutil.cpu_percent(interval=1)
+with RestoreTuning(CONN_PARAMS, RESTORE_MODE) as tuning:
+    server_metrics = capture_server_metrics('restore full')
+    sampler = sample_resources('restore full')
     start_time = time.time()
-    subprocess.run([
-        "mysql", "-u", DB_USER, f"-p{DB_PASS}", DB_NAME
-    ], stdin=open(binlog_file, "r"))
-    duration = round(time.time() - start_time, 2)
-    cpu_after = psutil.cpu_percent(interval=1)
-    print(f"[✔] Applied {binlog_file} in {duration}s")
-    print(f"[i] CPU load during restore (approx): from {cpu_before}% to {cpu_after}%")
-
-    log_to_csv(RESTORE_LOG_CSV, {
-        'phase': 'incremental',
-        'batch': i,
-        'restore_time_s': duration,
-        'cpu_before': cpu_before,
-        'cpu_after': cpu_after
-    }, restore_headers)
+    restore_stats = {}
+    if FULL_BACKUP_ENGINE == 'chunked':
+        restore_stats = restore_database(CONN_PARAMS, CHUNKED_BACKUP_DIR, workers=RESTORE_WORKERS,
+                                         session_sql=BULK_SESSION_SQL + tuning.session_sql())
+    elif APPLY_CLIENT == 'pool':
+        restore_stats = apply_sql_file(get_pool(CONN_PARAMS, extra_session_sql=tuning.session_sql()),
+                                       full_backup_path, BACKUP_CODEC)
+    else:
+        restore_stats = restore_file_to_command([
+            "mysql", "-u", DB_USER, f"-p{DB_PASS}", *tuning.client_args(), DB_NAME
+        ], full_backup_path, BACKUP_CODEC, drop_cache=BACKUP_SINK != 'buffered')
+    restore_duration = round(time.time() - start_time, 2)
+    log_pipeline_stages(PIPELINE_STATS_CSV, 'restore full', restore_stats.get('stages', []))
+    resources = sampler.stop()
+    server_metrics.stop()
+    print(f"[✔] Full restore completed in {restore_duration}s")
+    print(f"[i] CPU during restore: avg {resources['sys_cpu_avg']}%, peak {resources['sys_cpu_peak']}% "
+          f"(mysqld avg {resources['mysqld_cpu_avg']}%), disk write {resources['disk_write_MB']} MB")
+
+    log_to_csv(RESTORE_LOG_CSV, dict({
+        'phase': 'full',
+        'batch': 0,
+        'records': full_records,
+        'restore_time_s': restore_duration,
+        'engine': FULL_BACKUP_ENGINE,
+        'rows_per_s': round(full_records / restore_duration, 1) if restore_duration > 0 else 0.0,
+        'chunks': restore_stats.get('chunks', 1),
+        'chunk_time_avg_s': restore_stats.get('chunk_time_avg_s', ''),
+        'chunk_time_max_s': restore_stats.get('chunk_time_max_s', ''),
+        'index_rebuild_s': restore_stats.get('index_rebuild_s', ''),
+        'codec': full_stats['codec'],
+        'restore_mode': RESTORE_MODE,
+        'apply_client': 'pool' if 'statements' in restore_stats else 'mysql',
+        'connect_time_s': restore_stats.get('connect_time_s', '')
+    }, **resources), restore_headers)
+
+    # --- Step 6: Apply Incremental Backups ---
+    if COMPACT_BINLOGS:
+        compacted_file = compressed_path(COMPACTED_BINLOG_FILE, BACKUP_CODEC)
+        print(f"[*] Compacting {len(binlogs)} incremental backups into {compacted_file}...")
+        compact_stats = compact_segments(binlogs, compacted_file, BACKUP_CODEC,
+                                         level=BACKUP_CODEC_LEVEL, threads=BACKUP_CODEC_THREADS)
+        print(f"[i] {compact_stats['bytes_before']} -> {compact_stats['bytes_after']} bytes, "
+              f"{compact_stats['transactions_before']} -> {compact_stats['transactions_after']} transactions "
+              f"in {compact_stats['compact_time_s']}s")
+        binlogs = [compacted_file]
+        chain_rows = [sum(chain_rows)]
+
+    apply_times = []
+    applier = BinlogApplier(CONN_PARAMS, tuning.session_sql(), APPLY_PIPELINE,
+                            histogram_file=APPLY_LATENCY_CSV) if APPLY_CLIENT == 'pool' else None
+    for i, binlog_file in enumerate(binlogs, 1):
+        print(f"[*] Applying incremental backup {i}...")
+        server_metrics = capture_server_metrics(f"apply {i}")
+        sampler = sample_resources(f"apply {i}")
+        start_time = time.time()
+        apply_stats = {}
+        if applier:
+            apply_stats = applier.apply_file(binlog_file, BACKUP_CODEC, label=f"apply {i}")
+        else:
+            stream_stats = restore_file_to_command([
+                "mysql", "-u", DB_USER, f"-p{DB_PASS}", *tuning.client_args(), DB_NAME
+            ], binlog_file, BACKUP_CODEC, drop_cache=BACKUP_SINK != 'buffered')
+            log_pipeline_stages(PIPELINE_STATS_CSV, f"apply {i}", stream_stats['stages'])
+        duration = round(time.time() - start_time, 2)
+        apply_times.append(duration)
+        resources = sampler.stop()
+        server_metrics.stop()
+        print(f"[✔] Applied {binlog_file} in {duration}s")
+        if apply_stats:
+            print(f"[i] {apply_stats['events']} events, {apply_stats['statements']} statements in "
+                  f"{apply_stats['round_trips']} round trips ({apply_stats['MB_per_s']} MB/s)")
+            print_histograms(apply_stats, limit=4)
+        print(f"[i] CPU during apply: avg {resources['sys_cpu_avg']}%, peak {resources['sys_cpu_peak']}% "
+              f"(mysqld avg {resources['mysqld_cpu_avg']}%)")
+
+        row = {
+            'phase': 'compacted' if COMPACT_BINLOGS else 'incremental',
+            'batch': i,
+            'records': chain_rows[i - 1],
+            'restore_time_s': duration,
+            'codec': BACKUP_CODEC,
+            'restore_mode': RESTORE_MODE,
+            'apply_client': APPLY_CLIENT,
+            'connect_time_s': apply_stats.get('connect_time_s', '')
+        }
+        row.update(resources)
+        if COMPACT_BINLOGS:
+            row.update({key: compact_stats[key] for key in
+                        ('segments_before', 'segments_after', 'bytes_before', 'bytes_after', 'compact_time_s')})
+        log_to_csv(RESTORE_LOG_CSV, row, restore_headers)
+    if applier:
+        applier.close()
+
+if scheduler:
+    predicted, actual = scheduler.observe_restore(NUM_INCREMENTAL_BATCHES, restore_duration, apply_times)
+    print(f"[i] Scheduler restore estimate: predicted {round(predicted, 2)}s, actual {actual}s "
+          f"(budget {RESTORE_TIME_BUDGET_S}s)")
 
 # --- Step 7: Verify Data ---
-print("[*] Verifying final row count...")
-conn = get_conn()
-cursor = conn.cursor()
-cursor.execute("SELECT COUNT(*) FROM customers")
-row_count = cursor.fetchone()[0]
-conn.close()
-print(f"[✔] Final row count after full + incremental restore: {row_count}")
+print("[*] Verifying recovered data against source checksums...")
+report = verify_restore(CONN_PARAMS, source_checksums, artifacts, BACKUP_CODEC, VERIFY_WORKERS, VERIFY_LOG_CSV)
+print(f"[✔] Final row count after full + incremental restore: {report['rows_actual']}")
+
+conn_stats = connect_stats()
+print(f"[i] Connections: {conn_stats['connects']} opened in {conn_stats['connect_time_s']}s "
+      f"for {conn_stats['checkouts']} checkouts")
 
@@ -1,10 +1,21 @@
-from faker import Faker
-import mysql.connector
-import subprocess
 import os
 import time
-import psutil
 import csv
+from backup_verify import save_checksums, table_checksums, verify_restore
+from binlog_applier import BinlogApplier, print_histograms
+from binlog_compact import compact_segments
+from binlog_incremental import BinlogIncrementalEngine, dump_binlog_position
+from chunked_dump import dump_database, dump_size_bytes
+from chunked_restore import BULK_SESSION_SQL, restore_database
+from compression import backup_command_to_file, compressed_path, restore_file_to_command
+from db_common import RowInserter, get_db_size, log_pipeline_stages
+from db_pool import apply_sql_file, connect_stats, get_pool, pooled_connection
+from live_load import LOAD_COLUMNS, LiveLoad, LoadWindow
+from pitr_index import PitrIndex
+from resource_sampler import RESOURCE_COLUMNS, ResourceSampler
+from restore_tuning import RestoreTuning
+from server_metrics import ServerMetrics
+from workload import Workload
 
 # --- Config ---
 DB_NAME = 'testdb'
@@ -15,41 +26,104 @@ BINLOG_DIR = '/var/log/mysql'
 NUM_INITIAL_RECORDS = 400000
 NUM_INCREMENTAL_BATCHES = 10
 RECORDS_PER_BATCH = 10000
+LOAD_METHOD = 'executemany'     # 'executemany', 'multirow' or 'infile'
+LOAD_BATCH_SIZE = 5000
+DATA_SEED = 42
+SEED_WORKERS = 1                # >1 seeds over a process pool, one connection per worker
+FULL_BACKUP_ENGINE = 'mysqldump'  # 'mysqldump' or 'chunked' (parallel primary-key range dump)
+CHUNKED_BACKUP_DIR = 'full_backup_chunks'
+DUMP_WORKERS = 4
+DUMP_CHUNK_ROWS = 50000
+RESTORE_WORKERS = 4
+BACKUP_CODEC = 'none'           # 'none', 'gzip' or 'zstd' (mysqldump dumps and binlog extracts)
+BACKUP_CODEC_LEVEL = None       # None = codec default (gzip 6, zstd 3)
+BACKUP_CODEC_THREADS = 0        # zstd worker threads, 0 = single-threaded
 BACKUP_CSV = 'log_based_backup_log.csv'
 RESTORE_CSV = 'log_based_restore_log.csv'
+BINLOG_STATE_FILE = 'log_based_binlog_checkpoint.json'
+COMPACT_BINLOGS = False         # merge all binlog extracts into one compacted file and apply it in one pass
+COMPACTED_BINLOG_FILE = 'log_based_binlog_compacted.sql'
+PITR_INDEX_FILE = 'log_based_pitr_index.db'
+PITR_TARGET = None              # e.g. {'stop_datetime': '2025-07-10 10:00:05'}, {'stop_gtid': 'uuid:42'}
+                                # or {'stop_position': ('mysql-bin.000003', 1234)}; None = replay everything
+RESTORE_MODE = 'normal'         # 'normal' or 'fast': relaxed flush/sync + sql_log_bin=0 while restoring, then reverted
+APPLY_CLIENT = 'pool'           # 'pool': replay dumps and binlog extracts in-process, 'mysql': spawn the client
+APPLY_PIPELINE = 64             # binlog statements per round trip on the in-process applier
+APPLY_LATENCY_CSV = 'log_based_apply_latency.csv'  # per statement type latency histogram per apply
+RESOURCE_SAMPLE_INTERVAL_S = 0.05
+RESOURCE_SAMPLES_CSV = 'log_based_resource_samples.csv'  # CPU / RSS / disk time series per backup and restore
+SERVER_METRICS_CSV = 'log_based_server_metrics.csv'  # status / InnoDB / performance_schema diffs per phase
+SERVER_METRICS_DETAIL_CSV = 'log_based_server_metrics_detail.csv'
+ARTIFACT_DIGEST = True          # sha256 of every dump / binlog extract as it is written (.sha256 sidecar)
+BACKUP_SINK = 'buffered'        # 'buffered', 'fadvise' (drop written pages from the page cache) or 'direct' (O_DIRECT); restores drop read pages unless 'buffered'
+PIPELINE_STATS_CSV = 'log_based_pipeline_stats.csv'  # per-stage MB/s and stall time of every streamed dump / extract / restore
+CHECKSUM_FILE = 'log_based_checksums.json'  # primary-key range hashes taken before the drop
+VERIFY_WORKERS = 4
+VERIFY_LOG_CSV = 'log_based_verify_log.csv'
+LIVE_LOAD_RATE = 0              # rows/s inserted into `live_load` by concurrent writers while backups run; 0 = off
+LIVE_LOAD_WRITERS = 4
+WORKLOAD_FILE = None            # multi-table schema + UPDATE/DELETE mix, e.g. 'workload_example.json'; None = customers
 
-fake = Faker()
+CONN_PARAMS = dict(host='localhost', user=DB_USER, password=DB_PASS, database=DB_NAME)
+inserter = RowInserter(CONN_PARAMS, SEED_WORKERS, DATA_SEED, LOAD_BATCH_SIZE, LOAD_METHOD)
+workload = Workload.load(WORKLOAD_FILE, CONN_PARAMS, seed=DATA_SEED, batch_size=LOAD_BATCH_SIZE,
+                         method=LOAD_METHOD) if WORKLOAD_FILE else None
 
 # --- CSV Setup ---
+# Rows are written positionally and padded; the trailing columns always come last
+backup_columns = ['batch', 'type', 'File Name', 'backup_size_MB', 'backup_time_s',
+                  'insert_time_s', 'insert_rows_per_s', 'insert_workers',
+                  'insert_worker_rows_per_s_min', 'insert_worker_rows_per_s_max',
+                  'backup_raw_MB', 'codec', 'codec_level', 'codec_threads', 'cpu_time_s',
+                  'start_file', 'start_pos', 'end_file', 'end_pos', 'binlog_files', 'binlog_bytes', 'events',
+                  'transactions', 'index_time_s', 'sha256', 'cpu_before', 'cpu_after']
+backup_trailing = RESOURCE_COLUMNS + LOAD_COLUMNS
+restore_columns = ['Step', 'File Name', 'restore_time_s', 'cpu_before', 'cpu_after',
+                   'engine', 'rows_per_s', 'chunks', 'chunk_time_avg_s', 'chunk_time_max_s', 'index_rebuild_s',
+                   'codec', 'segments_before', 'segments_after', 'bytes_before', 'bytes_after', 'compact_time_s',
+                   'plan_time_ms', 'bytes_applied']
+restore_trailing = ['restore_mode', 'apply_client', 'connect_time_s'] + RESOURCE_COLUMNS
+
 with open(BACKUP_CSV, 'w', newline='') as f:
-    writer = csv.writer(f)
-    writer.writerow(['batch', 'type', 'File Name', 'backup_size_MB', 'backup_time_s'])
+    csv.writer(f).writerow(backup_columns + backup_trailing)
 
 with open(RESTORE_CSV, 'w', newline='') as f:
-    writer = csv.writer(f)
-    writer.writerow(['Step', 'File Name', 'restore_time_s', 'cpu_before', 'cpu_after'])
+    csv.writer(f).writerow(restore_columns + restore_trailing)
+
+def append_row(file_path, columns, values, fields, trailing=RESOURCE_COLUMNS):
+    with open(file_path, 'a', newline='') as f:
+        csv.writer(f).writerow(values + [''] * (len(columns) - len(values)) +
+                               [fields[column] for column in trailing])
+
+def sample_resources(label):
+    return ResourceSampler(label, RESOURCE_SAMPLE_INTERVAL_S, RESOURCE_SAMPLES_CSV).start()
+
+def capture_server_metrics(label):
+    return ServerMetrics(CONN_PARAMS, label, SERVER_METRICS_CSV, SERVER_METRICS_DETAIL_CSV).start()
+
+# --- PITR Index (rebuilt every run, like the CSV logs) ---
+if os.path.exists(PITR_INDEX_FILE):
+    os.remove(PITR_INDEX_FILE)
+pitr_index = PitrIndex(PITR_INDEX_FILE)
 
 # --- Function: Connect to DB ---
 def get_conn(use_db=True):
-    return mysql.connector.connect(
-        host='localhost',
-        user=DB_USER,
-        password=DB_PASS,
-        database=DB_NAME if use_db else None
-    )
-
-# --- Function: Get DB Size ---
-def get_db_size():
-    conn = get_conn()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT ROUND(SUM(data_length + index_length) / 1024 / 1024, 2)
-        FROM information_schema.tables
-        WHERE table_schema = %s
-    """, (DB_NAME,))
-    size_mb = cursor.fetchone()[0]
-    conn.close()
-    return size_mb
+    return pooled_connection(CONN_PARAMS, use_db, allow_local_infile=(LOAD_METHOD == 'infile'))
+
+def restore_fields(resources, apply_client='mysql', connect_time_s=''):
+    return dict(resources, restore_mode=RESTORE_MODE, apply_client=apply_client, connect_time_s=connect_time_s)
+
+# --- Insert Rows (in-process or over the parallel seeder) ---
+# Workload mode: the initial rows are inserts, batches follow the workload's mix
+def insert_rows(count, initial=False):
+    if workload:
+        return workload.seed_rows(count) if initial else workload.apply_batch(count)
+    return inserter.insert('customers', count)
+
+# Rows now in the database: workload batches also update and delete (and
+# cascade), so their net rows are counted instead of assumed
+def count_rows(expected):
+    return workload.row_count() if workload else expected
 
 # --- Step 1: Setup DB ---
 conn = get_conn()
@@ -66,85 +140,116 @@ CREATE TABLE customers (
 )
 """)
 
-for _ in range(NUM_INITIAL_RECORDS):
-    name = fake.name()
-    email = fake.email()
-    address = fake.address().replace("\n", " ")
-    cursor.execute("INSERT INTO customers (name, email, address) VALUES (%s, %s, %s)", (name, email, address))
-
 conn.commit()
 conn.close()
+if workload:
+    workload.create_schema()
+insert_stats = insert_rows(NUM_INITIAL_RECORDS, initial=True)
+full_records = count_rows(NUM_INITIAL_RECORDS)
 print("[✔] Initial data inserted.")
 
+live_load = LiveLoad(CONN_PARAMS, LIVE_LOAD_RATE, LIVE_LOAD_WRITERS).start() if LIVE_LOAD_RATE else None
+
 # --- Step 2: Full Backup ---
-db_size = get_db_size()
+db_size = get_db_size(CONN_PARAMS)
 print(f"[i] Database size before full backup: {db_size} MB")
 print("[*] Performing full backup...")
-start_time = time.time()
-subprocess.run([
-    "mysqldump", "-u", DB_USER, f"-p{DB_PASS}", DB_NAME
-], stdout=open(FULL_BACKUP_FILE, "w"))
-backup_duration = round(time.time() - start_time, 2)
-backup_size = round(os.path.getsize(FULL_BACKUP_FILE) / 1024 / 1024, 2)
+full_backup_path = CHUNKED_BACKUP_DIR if FULL_BACKUP_ENGINE == 'chunked' else compressed_path(FULL_BACKUP_FILE, BACKUP_CODEC)
+with LoadWindow(live_load) as load:
+    server_metrics = capture_server_metrics('backup full 0')
+    sampler = sample_resources('backup full 0')
+    start_time = time.time()
+    if FULL_BACKUP_ENGINE == 'chunked':
+        manifest = dump_database(CONN_PARAMS, CHUNKED_BACKUP_DIR, chunk_rows=DUMP_CHUNK_ROWS, workers=DUMP_WORKERS)
+        backup_duration = round(time.time() - start_time, 2)
+        backup_size = round(dump_size_bytes(CHUNKED_BACKUP_DIR) / 1024 / 1024, 2)
+        full_stats = {'raw_MB': backup_size, 'codec': 'none', 'codec_level': '', 'codec_threads': '', 'cpu_time_s': '',
+                      'binlog': manifest['binlog'], 'snapshot_ts': manifest['snapshot_ts']}
+    else:
+        # One snapshot; its binlog coordinates go into the dump header. mysqldump
+        # takes it as it starts, so the start time stands for the snapshot time
+        full_stats = backup_command_to_file([
+            "mysqldump", "-u", DB_USER, f"-p{DB_PASS}", "--single-transaction", "--source-data=2", DB_NAME
+        ], full_backup_path, BACKUP_CODEC, BACKUP_CODEC_LEVEL, BACKUP_CODEC_THREADS, digest=ARTIFACT_DIGEST,
+           sink=BACKUP_SINK)
+        log_pipeline_stages(PIPELINE_STATS_CSV, 'backup full 0', full_stats['stages'])
+        full_stats['binlog'] = dump_binlog_position(full_backup_path, BACKUP_CODEC)
+        full_stats['snapshot_ts'] = start_time
+        backup_duration = full_stats['backup_time_s']
+        backup_size = full_stats['stored_MB']
+    resources = sampler.stop()
+    server_metrics.stop()
 print(f"[✔] Full backup completed in {backup_duration}s, size: {backup_size} MB")
 
 # Log full backup
-with open(BACKUP_CSV, 'a', newline='') as f:
-    writer = csv.writer(f)
-    writer.writerow([0, 'Full', FULL_BACKUP_FILE, backup_size, backup_duration])
+append_row(BACKUP_CSV, backup_columns,
+           [0, 'Full', full_backup_path, backup_size, backup_duration,
+            insert_stats['load_time_s'], insert_stats['rows_per_s'], insert_stats['workers'],
+            insert_stats['worker_rows_per_s_min'], insert_stats['worker_rows_per_s_max'],
+            full_stats['raw_MB'], full_stats['codec'], full_stats['codec_level'],
+            full_stats['codec_threads'], full_stats['cpu_time_s'],
+            '', '', '', '', '', '', '', '', '', full_stats.get('sha256', ''),
+            resources['cpu_before'], resources['cpu_after']], dict(resources, **load.stats), backup_trailing)
 
 # --- Step 3: Insert Incremental Data + Log-Based Backup ---
 binlogs = []
-conn = get_conn()
-cursor = conn.cursor()
-cursor.execute("SHOW MASTER STATUS")
-current_binlog_file, current_position = cursor.fetchone()[0:2]
-conn.close()
+engine = BinlogIncrementalEngine(CONN_PARAMS, BINLOG_DIR, BINLOG_STATE_FILE,
+                                 BACKUP_CODEC, BACKUP_CODEC_LEVEL, BACKUP_CODEC_THREADS, ARTIFACT_DIGEST, BACKUP_SINK)
+# The chain (and point-in-time recovery) starts where the full backup's snapshot was taken
+checkpoint = engine.set_checkpoint(full_stats['binlog'])
+print(f"[i] Binlog checkpoint of the full backup: {checkpoint['file']}:{checkpoint['position']}")
+pitr_index.add_full_backup(full_backup_path, checkpoint['file'], checkpoint['position'],
+                           FULL_BACKUP_ENGINE, full_stats['codec'], created_ts=full_stats['snapshot_ts'])
 
 for batch in range(1, NUM_INCREMENTAL_BATCHES + 1):
     print(f"[*] Inserting batch {batch} of {NUM_INCREMENTAL_BATCHES}...")
 
-    conn = get_conn()
-    cursor = conn.cursor()
-    for _ in range(RECORDS_PER_BATCH):
-        name = fake.name()
-        email = fake.email()
-        address = fake.address().replace("\n", " ")
-        cursor.execute("INSERT INTO customers (name, email, address) VALUES (%s, %s, %s)", (name, email, address))
-    conn.commit()
-
-    # Get current binlog info AFTER batch insert
-    cursor.execute("SHOW MASTER STATUS")
-    binlog_file_after, end_position = cursor.fetchone()[0:2]
-    conn.close()
-
-    if binlog_file_after != current_binlog_file:
-        print(f"[!] Binlog file rotated from {current_binlog_file} to {binlog_file_after}. This script assumes no rotation.")
-        break
-
-    binlog_output = f"logbackup_batch{batch}.sql"
-    binlogs.append(binlog_output)
+    insert_stats = insert_rows(RECORDS_PER_BATCH)
 
-    binlog_path = os.path.join(BINLOG_DIR, current_binlog_file)
+    binlog_output = compressed_path(f"logbackup_batch{batch}.sql", BACKUP_CODEC)
+    binlogs.append(binlog_output)
 
-    print(f"[*] Extracting log-based incremental backup from position {current_position} to {end_position}...")
-    start_inc_time = time.time()
-    subprocess.run([
-        "mysqlbinlog",
-        f"--start-position={current_position}",
-        f"--stop-position={end_position}",
-        binlog_path
-    ], stdout=open(binlog_output, "w"))
-    inc_duration = round(time.time() - start_inc_time, 2)
-    inc_size = round(os.path.getsize(binlog_output) / 1024 / 1024, 2)
-    print(f"[✔] Log-based backup {batch} saved: {binlog_output} (Time: {inc_duration}s, Size: {inc_size} MB)")
+    # Extract from the saved checkpoint to the current position, across any rotations
+    start = engine.checkpoint()
+    print(f"[*] Extracting log-based incremental backup from checkpoint {start['file']}:{start['position']}...")
+    with LoadWindow(live_load) as load:
+        server_metrics = capture_server_metrics(f"backup log-based {batch}")
+        sampler = sample_resources(f"backup log-based {batch}")
+        inc_stats = engine.backup_window(binlog_output)
+        resources = sampler.stop()
+        server_metrics.stop()
+    log_pipeline_stages(PIPELINE_STATS_CSV, f"backup log-based {batch}", inc_stats['stages'])
+    inc_duration = inc_stats['backup_time_s']
+    inc_size = inc_stats['stored_MB']
+    print(f"[✔] Log-based backup {batch} saved: {binlog_output} (Time: {inc_duration}s, Size: {inc_size} MB, "
+          f"{inc_stats['events']} events, {inc_stats['binlog_bytes']} binlog bytes over {inc_stats['binlog_files']} file(s))")
+    index_stats = pitr_index.add_segment(binlog_output, BACKUP_CODEC, inc_stats['start_file'], inc_stats['start_pos'],
+                                         inc_stats['end_file'], inc_stats['end_pos'])
+    print(f"[i] Indexed {index_stats['transactions']} transactions in {index_stats['index_time_s']}s")
 
     # Log incremental backup
-    with open(BACKUP_CSV, 'a', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow([batch, 'Log-Based', binlog_output, inc_size, inc_duration])
+    append_row(BACKUP_CSV, backup_columns,
+               [batch, 'Log-Based', binlog_output, inc_size, inc_duration,
+                insert_stats['load_time_s'], insert_stats['rows_per_s'], insert_stats['workers'],
+                insert_stats['worker_rows_per_s_min'], insert_stats['worker_rows_per_s_max'],
+                inc_stats['raw_MB'], inc_stats['codec'], inc_stats['codec_level'],
+                inc_stats['codec_threads'], inc_stats['cpu_time_s'],
+                inc_stats['start_file'], inc_stats['start_pos'], inc_stats['end_file'],
+                inc_stats['end_pos'], inc_stats['binlog_files'], inc_stats['binlog_bytes'],
+                inc_stats['events'], index_stats['transactions'], index_stats['index_time_s'], inc_stats['sha256'],
+                resources['cpu_before'], resources['cpu_after']], dict(resources, **load.stats), backup_trailing)
 
-    current_position = end_position
+inserter.close()
+if live_load:
+    live_load.stop()
+
+print("[*] Hashing primary-key ranges for post-restore verification...")
+# The live load table depends on where each backup cut it off, so it is not compared
+source_checksums = table_checksums(CONN_PARAMS, workers=VERIFY_WORKERS,
+                                   exclude=(live_load.table,) if live_load else ())
+save_checksums(CHECKSUM_FILE, source_checksums)
+print(f"[✔] Checksums saved to {CHECKSUM_FILE} ({source_checksums['checksum_time_s']}s)")
+artifacts = ([] if FULL_BACKUP_ENGINE == 'chunked' else [full_backup_path]) + binlogs
 
 # --- Step 4: Drop and Recreate DB ---
 print("[!] Dropping and recreating database...")
@@ -158,44 +263,124 @@ print("[✔] Database reset complete.")
 
 # --- Step 5: Restore Full Backup ---
 print("[*] Restoring full backup...")
-cpu_before = psutil.cpu_percent(interval=1)
-start_time = time.time()
-subprocess.run([
-    "mysql", "-u", DB_USER, f"-p{DB_PASS}", DB_NAME
-], stdin=open(FULL_BACKUP_FILE, "r"))
-restore_duration = round(time.time() - start_time, 2)
-cpu_after = psutil.cpu_percent(interval=1)
-print(f"[✔] Full restore completed in {restore_duration}s")
-print(f"[i] CPU load during restore (approx): from {cpu_before}% to {cpu_after}%")
-
-# Log restore
-with open(RESTORE_CSV, 'a', newline='') as f:
-    writer = csv.writer(f)
-    writer.writerow(['Full Restore', FULL_BACKUP_FILE, restore_duration, cpu_before, cpu_after])
-
-# --- Step 6: Apply Log-Based Incremental Backups ---
-for i, binlog_file in enumerate(binlogs, 1):
-    print(f"[*] Applying log-based incremental backup {i} ({binlog_file})...")
-    cpu_before = psutil.cpu_percent(interval=1)
+with RestoreTuning(CONN_PARAMS, RESTORE_MODE) as tuning:
+    server_metrics = capture_server_metrics('restore full')
+    sampler = sample_resources('restore full')
     start_time = time.time()
-    subprocess.run([
-        "mysql", "-u", DB_USER, f"-p{DB_PASS}", DB_NAME
-    ], stdin=open(binlog_file, "r"))
-    duration = round(time.time() - start_time, 2)
-    cpu_after = psutil.cpu_percent(interval=1)
-    print(f"[✔] Applied {binlog_file} in {duration}s")
-    print(f"[i] CPU load during restore (approx): from {cpu_before}% to {cpu_after}%")
-
-    with open(RESTORE_CSV, 'a', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow([f"Log-Based Restore {i}", binlog_file, duration, cpu_before, cpu_after])
+    restore_stats = {}
+    if FULL_BACKUP_ENGINE == 'chunked':
+        restore_stats = restore_database(CONN_PARAMS, CHUNKED_BACKUP_DIR, workers=RESTORE_WORKERS,
+                                         session_sql=BULK_SESSION_SQL + tuning.session_sql())
+    elif APPLY_CLIENT == 'pool':
+        restore_stats = apply_sql_file(get_pool(CONN_PARAMS, extra_session_sql=tuning.session_sql()),
+                                       full_backup_path, BACKUP_CODEC)
+    else:
+        restore_stats = restore_file_to_command([
+            "mysql", "-u", DB_USER, f"-p{DB_PASS}", *tuning.client_args(), DB_NAME
+        ], full_backup_path, BACKUP_CODEC, drop_cache=BACKUP_SINK != 'buffered')
+    restore_duration = round(time.time() - start_time, 2)
+    log_pipeline_stages(PIPELINE_STATS_CSV, 'restore full', restore_stats.get('stages', []))
+    resources = sampler.stop()
+    server_metrics.stop()
+    print(f"[✔] Full restore completed in {restore_duration}s")
+    print(f"[i] CPU during restore: avg {resources['sys_cpu_avg']}%, peak {resources['sys_cpu_peak']}% "
+          f"(mysqld avg {resources['mysqld_cpu_avg']}%), disk write {resources['disk_write_MB']} MB")
+
+    # Log restore
+    append_row(RESTORE_CSV, restore_columns,
+               ['Full Restore', full_backup_path, restore_duration, resources['cpu_before'], resources['cpu_after'],
+                FULL_BACKUP_ENGINE,
+                round(full_records / restore_duration, 1) if restore_duration > 0 else 0.0,
+                restore_stats.get('chunks', 1), restore_stats.get('chunk_time_avg_s', ''),
+                restore_stats.get('chunk_time_max_s', ''), restore_stats.get('index_rebuild_s', ''),
+                full_stats['codec']],
+               restore_fields(resources, 'pool' if 'statements' in restore_stats else 'mysql',
+                              restore_stats.get('connect_time_s', '')), restore_trailing)
+
+    # --- Step 6: Apply Log-Based Incremental Backups ---
+    compact_columns = []
+    applier = BinlogApplier(CONN_PARAMS, tuning.session_sql(), APPLY_PIPELINE,
+                            histogram_file=APPLY_LATENCY_CSV) if APPLY_CLIENT == 'pool' else None
+    if PITR_TARGET:
+        # Replay only the indexed byte ranges up to the recovery point
+        plan = pitr_index.plan(**PITR_TARGET)
+        print(f"[i] PITR plan in {plan['plan_time_ms']} ms: {plan['transactions']} transactions, "
+              f"{plan['bytes']} bytes from {len(plan['ranges'])} segment(s), stop at {plan['stop_file']}:{plan['stop_pos']}")
+        server_metrics = capture_server_metrics('restore pitr')
+        sampler = sample_resources('restore pitr')
+        if applier:
+            apply_stats = applier.apply_blocks(pitr_index.plan_blocks(plan), label='restore pitr')
+            pitr_stats = {'restore_time_s': apply_stats['restore_time_s'], 'bytes_applied': apply_stats['bytes'],
+                          'segments_applied': len(plan['ranges'])}
+            print_histograms(apply_stats, limit=4)
+        else:
+            apply_stats = {}
+            pitr_stats = pitr_index.apply_plan(plan, ["mysql", "-u", DB_USER, f"-p{DB_PASS}",
+                                                      *tuning.client_args(), DB_NAME])
+        resources = sampler.stop()
+        server_metrics.stop()
+        print(f"[✔] Point-in-time restore applied in {pitr_stats['restore_time_s']}s")
+
+        append_row(RESTORE_CSV, restore_columns,
+                   ["PITR Restore", f"{plan['stop_file']}:{plan['stop_pos']}", pitr_stats['restore_time_s'],
+                    resources['cpu_before'], resources['cpu_after'], '', '', pitr_stats['segments_applied'],
+                    '', '', '', BACKUP_CODEC, '', '', '', '', '', plan['plan_time_ms'], pitr_stats['bytes_applied']],
+                   restore_fields(resources, APPLY_CLIENT, apply_stats.get('connect_time_s', '')), restore_trailing)
+        binlogs = []
+    elif COMPACT_BINLOGS:
+        compacted_file = compressed_path(COMPACTED_BINLOG_FILE, BACKUP_CODEC)
+        print(f"[*] Compacting {len(binlogs)} log-based backups into {compacted_file}...")
+        compact_stats = compact_segments(binlogs, compacted_file, BACKUP_CODEC,
+                                         level=BACKUP_CODEC_LEVEL, threads=BACKUP_CODEC_THREADS)
+        print(f"[i] {compact_stats['bytes_before']} -> {compact_stats['bytes_after']} bytes, "
+              f"{compact_stats['transactions_before']} -> {compact_stats['transactions_after']} transactions "
+              f"in {compact_stats['compact_time_s']}s")
+        compact_columns = [compact_stats[key] for key in
+                           ('segments_before', 'segments_after', 'bytes_before', 'bytes_after', 'compact_time_s')]
+        binlogs = [compacted_file]
+
+    for i, binlog_file in enumerate(binlogs, 1):
+        print(f"[*] Applying log-based incremental backup {i} ({binlog_file})...")
+        server_metrics = capture_server_metrics(f"apply {i}")
+        sampler = sample_resources(f"apply {i}")
+        start_time = time.time()
+        apply_stats = {}
+        if applier:
+            apply_stats = applier.apply_file(binlog_file, BACKUP_CODEC, label=f"apply {i}")
+        else:
+            stream_stats = restore_file_to_command([
+                "mysql", "-u", DB_USER, f"-p{DB_PASS}", *tuning.client_args(), DB_NAME
+            ], binlog_file, BACKUP_CODEC, drop_cache=BACKUP_SINK != 'buffered')
+            log_pipeline_stages(PIPELINE_STATS_CSV, f"apply {i}", stream_stats['stages'])
+        duration = round(time.time() - start_time, 2)
+        resources = sampler.stop()
+        server_metrics.stop()
+        print(f"[✔] Applied {binlog_file} in {duration}s")
+        if apply_stats:
+            print(f"[i] {apply_stats['events']} events, {apply_stats['statements']} statements in "
+                  f"{apply_stats['round_trips']} round trips ({apply_stats['MB_per_s']} MB/s)")
+            print_histograms(apply_stats, limit=4)
+        print(f"[i] CPU during apply: avg {resources['sys_cpu_avg']}%, peak {resources['sys_cpu_peak']}% "
+              f"(mysqld avg {resources['mysqld_cpu_avg']}%)")
+
+        step = "Compacted Log-Based Restore" if COMPACT_BINLOGS else f"Log-Based Restore {i}"
+        append_row(RESTORE_CSV, restore_columns,
+                   [step, binlog_file, duration, resources['cpu_before'], resources['cpu_after'],
+                    '', '', '', '', '', '', BACKUP_CODEC] + compact_columns,
+                   restore_fields(resources, APPLY_CLIENT, apply_stats.get('connect_time_s', '')), restore_trailing)
+
+    if applier:
+        applier.close()
+pitr_index.close()
 
 # --- Step 7: Verify Data ---
-print("[*] Verifying final row count...")
-conn = get_conn()
-cursor = conn.cursor()
-cursor.execute("SELECT COUNT(*) FROM customers")
-row_count = cursor.fetchone()[0]
-conn.close()
-print(f"[✔] Final row count after full + incremental restore: {row_count}")
+print("[*] Verifying recovered data against source checksums...")
+if PITR_TARGET:
+    print("[i] Point-in-time restore: ranges written after the recovery point are expected to differ")
+report = verify_restore(CONN_PARAMS, source_checksums, artifacts, BACKUP_CODEC, VERIFY_WORKERS, VERIFY_LOG_CSV)
+print(f"[✔] Final row count after full + incremental restore: {report['rows_actual']}")
+
+conn_stats = connect_stats()
+print(f"[i] Connections: {conn_stats['connects']} opened in {conn_stats['connect_time_s']}s "
+      f"for {conn_stats['checkouts']} checkouts")
 
@@ -0,0 +1,156 @@
+from backup_verify import save_checksums, table_checksums, verify_restore
+from db_common import RowInserter, create_customers_table, get_db_size, log_to_csv, reset_database
+from live_load import LOAD_COLUMNS, LiveLoad, LoadWindow
+from physical_backup import backup_tablespaces, restore_tablespaces
+from resource_sampler import RESOURCE_COLUMNS, ResourceSampler
+from server_metrics import ServerMetrics
+from workload import Workload
+
+# --- Config ---
+DB_NAME = 'testdb'
+DB_USER = 'testuser'
+DB_PASS = 'testpass'
+INITIAL_RECORDS = 400000
+INCREMENTAL_BATCHES = 10
+RECORDS_PER_BATCH = 10000
+BACKUP_DIR = 'physical_backup'  # .ibd / .cfg copies + manifest.json, overwritten after every batch
+BACKUP_LOG_CSV = 'physical_backup_log.csv'
+RESTORE_LOG_CSV = 'physical_restore_log.csv'
+LOAD_METHOD = 'executemany'     # 'executemany', 'multirow' or 'infile'
+LOAD_BATCH_SIZE = 5000
+DATA_SEED = 42
+SEED_WORKERS = 1                # >1 seeds over a process pool, one connection per worker
+COPY_WORKERS = 4                # files copied concurrently (backup and restore)
+RESOURCE_SAMPLE_INTERVAL_S = 0.05
+RESOURCE_SAMPLES_CSV = 'physical_resource_samples.csv'  # CPU / RSS / disk time series per backup and restore
+SERVER_METRICS_CSV = 'physical_server_metrics.csv'  # status / InnoDB / performance_schema diffs per phase
+SERVER_METRICS_DETAIL_CSV = 'physical_server_metrics_detail.csv'
+CHECKSUM_FILE = 'physical_checksums.json'  # primary-key range hashes taken before the drop
+VERIFY_WORKERS = 4
+VERIFY_LOG_CSV = 'physical_verify_log.csv'
+LIVE_LOAD_RATE = 0              # rows/s inserted into `live_load` by concurrent writers while backups run; 0 = off
+LIVE_LOAD_WRITERS = 4
+WORKLOAD_FILE = None            # multi-table schema + UPDATE/DELETE mix, e.g. 'workload_example.json'; None = customers
+
+backup_headers = ['batch', 'records_total', 'backup_time_s', 'backup_size_MB',
+                  'insert_time_s', 'insert_rows_per_s', 'insert_workers',
+                  'insert_worker_rows_per_s_min', 'insert_worker_rows_per_s_max',
+                  'lock_time_s', 'tables', 'files', 'copy_MB_per_s', 'copy_method',
+                  'cpu_before', 'cpu_after'] + RESOURCE_COLUMNS + LOAD_COLUMNS
+restore_headers = ['total_records', 'restore_time_s', 'cpu_before', 'cpu_after',
+                   'rows_per_s', 'copy_time_s', 'import_time_s', 'restored_MB', 'copy_method'] + RESOURCE_COLUMNS
+
+CONN_PARAMS = dict(host='localhost', user=DB_USER, password=DB_PASS, database=DB_NAME)
+inserter = RowInserter(CONN_PARAMS, SEED_WORKERS, DATA_SEED, LOAD_BATCH_SIZE, LOAD_METHOD)
+workload = Workload.load(WORKLOAD_FILE, CONN_PARAMS, seed=DATA_SEED, batch_size=LOAD_BATCH_SIZE,
+                         method=LOAD_METHOD) if WORKLOAD_FILE else None
+
+# --- Physical Backup (Overwrite) ---
+def do_physical_backup(batch_number, records_total, insert_stats):
+    print(f"[*] Copying tablespaces to {BACKUP_DIR} (FLUSH TABLES ... FOR EXPORT)...")
+    with LoadWindow(live_load) as load:
+        server_metrics = ServerMetrics(CONN_PARAMS, f"backup batch {batch_number}",
+                                       SERVER_METRICS_CSV, SERVER_METRICS_DETAIL_CSV).start()
+        sampler = ResourceSampler(f"backup batch {batch_number}", RESOURCE_SAMPLE_INTERVAL_S,
+                                  RESOURCE_SAMPLES_CSV).start()
+        stats = backup_tablespaces(CONN_PARAMS, BACKUP_DIR, workers=COPY_WORKERS)
+        resources = sampler.stop()
+        server_metrics.stop()
+    print(f"[✔] Backup completed in {stats['backup_time_s']}s, size: {stats['stored_MB']} MB, "
+          f"tables locked {stats['lock_time_s']}s ({stats['copy_MB_per_s']} MB/s via {stats['copy_method']})")
+
+    log_to_csv(BACKUP_LOG_CSV, dict({
+        'batch': batch_number,
+        'records_total': records_total,
+        'backup_time_s': stats['backup_time_s'],
+        'backup_size_MB': stats['stored_MB'],
+        'insert_time_s': insert_stats['load_time_s'],
+        'insert_rows_per_s': insert_stats['rows_per_s'],
+        'insert_workers': insert_stats['workers'],
+        'insert_worker_rows_per_s_min': insert_stats['worker_rows_per_s_min'],
+        'insert_worker_rows_per_s_max': insert_stats['worker_rows_per_s_max'],
+        'lock_time_s': stats['lock_time_s'],
+        'tables': stats['tables'],
+        'files': stats['files'],
+        'copy_MB_per_s': stats['copy_MB_per_s'],
+        'copy_method': stats['copy_method']
+    }, **resources, **load.stats), backup_headers)
+
+# --- Insert Rows (customers, or the workload's tables and mix) ---
+def insert_rows(count, initial=False):
+    if workload:
+        return workload.seed_rows(count) if initial else workload.apply_batch(count)
+    return inserter.insert('customers', count)
+
+# Rows now in the database: workload batches also update and delete (and
+# cascade), so their net rows are counted instead of assumed
+def count_rows(expected):
+    return workload.row_count() if workload else expected
+
+# --- Step 1: Create DB and Insert Initial Data ---
+print("[*] Setting up initial database...")
+create_customers_table(CONN_PARAMS)
+if workload:
+    workload.create_schema()
+print(f"[*] Inserting {INITIAL_RECORDS} initial records...")
+insert_stats = insert_rows(INITIAL_RECORDS, initial=True)
+total_records = count_rows(INITIAL_RECORDS)
+print("[✔] Initial data inserted.")
+
+live_load = LiveLoad(CONN_PARAMS, LIVE_LOAD_RATE, LIVE_LOAD_WRITERS).start() if LIVE_LOAD_RATE else None
+
+# --- Step 2: Initial Physical Backup ---
+db_size = get_db_size(CONN_PARAMS)
+print(f"[i] DB size before physical backup: {db_size} MB")
+do_physical_backup(batch_number=0, records_total=total_records, insert_stats=insert_stats)
+
+# --- Step 3: Batches with Physical Backup Overwrite ---
+for batch in range(1, INCREMENTAL_BATCHES + 1):
+    print(f"[*] Inserting batch {batch} ({RECORDS_PER_BATCH} records)...")
+    insert_stats = insert_rows(RECORDS_PER_BATCH)
+    total_records = count_rows(INITIAL_RECORDS + batch * RECORDS_PER_BATCH)
+    do_physical_backup(batch_number=batch, records_total=total_records, insert_stats=insert_stats)
+
+inserter.close()
+if live_load:
+    live_load.stop()
+
+print("[*] Hashing primary-key ranges for post-restore verification...")
+# The live load table depends on where each backup cut it off, so it is not compared
+source_checksums = table_checksums(CONN_PARAMS, workers=VERIFY_WORKERS,
+                                   exclude=(live_load.table,) if live_load else ())
+save_checksums(CHECKSUM_FILE, source_checksums)
+print(f"[✔] Checksums saved to {CHECKSUM_FILE} ({source_checksums['checksum_time_s']}s)")
+
+# --- Step 4: Simulate DB Drop ---
+print("[!] Dropping and recreating database...")
+reset_database(CONN_PARAMS)
+print("[✔] Database reset.")
+
+# --- Step 5: Restore by Importing Tablespaces ---
+print("[*] Importing tablespaces...")
+server_metrics = ServerMetrics(CONN_PARAMS, 'restore full', SERVER_METRICS_CSV, SERVER_METRICS_DETAIL_CSV).start()
+sampler = ResourceSampler('restore full', RESOURCE_SAMPLE_INTERVAL_S, RESOURCE_SAMPLES_CSV).start()
+restore_stats = restore_tablespaces(CONN_PARAMS, BACKUP_DIR, workers=COPY_WORKERS)
+resources = sampler.stop()
+server_metrics.stop()
+restore_time = restore_stats['restore_time_s']
+print(f"[✔] Restore completed in {restore_time}s (copy {restore_stats['copy_time_s']}s, "
+      f"import {restore_stats['import_time_s']}s)")
+print(f"[i] CPU during restore: avg {resources['sys_cpu_avg']}%, peak {resources['sys_cpu_peak']}% "
+      f"(mysqld avg {resources['mysqld_cpu_avg']}%), disk write {resources['disk_write_MB']} MB")
+
+log_to_csv(RESTORE_LOG_CSV, dict({
+    'total_records': total_records,
+    'restore_time_s': restore_time,
+    'rows_per_s': round(total_records / restore_time, 1) if restore_time > 0 else 0.0,
+    'copy_time_s': restore_stats['copy_time_s'],
+    'import_time_s': restore_stats['import_time_s'],
+    'restored_MB': restore_stats['restored_MB'],
+    'copy_method': restore_stats['copy_method']
+}, **resources), restore_headers)
+
+# --- Step 6: Verify Recovered Data ---
+print("[*] Verifying recovered data against source checksums...")
+report = verify_restore(CONN_PARAMS, source_checksums, workers=VERIFY_WORKERS, log_file=VERIFY_LOG_CSV)
+print(f"[✔] Final row count after restore: {report['rows_actual']}")
@@ -0,0 +1,193 @@
+import os
+import time
+
+from binlog_applier import BinlogApplier
+from binlog_compact import compact_segments
+from binlog_incremental import BinlogIncrementalEngine, dump_binlog_position
+from chunked_dump import dump_database, dump_size_bytes
+from chunked_restore import BULK_SESSION_SQL, restore_database
+from compression import backup_command_to_file, compressed_path, restore_file_to_command
+from db_common import client_command
+from db_pool import apply_sql_file, get_pool, pooled_connection
+from physical_backup import backup_tablespaces, restore_tablespaces
+from restore_tuning import RestoreTuning
+
+# --- Backup Strategies for the benchmark harness ---
+# A strategy owns its backup artifacts for one run. The harness seeds the
+# database, calls backup_initial() once and backup_batch() after every batch,
+# drops the database and calls restore(). Each call returns a stats dict with
+# at least backup_time_s / backup_size_MB or restore_time_s.
+#
+# Cell parameters used here:
+#   engine   'mysqldump' or 'chunked' (full backups; ignored by 'physical')
+#   codec    'none', 'gzip' or 'zstd' (mysqldump dumps and binlog extracts)
+#   sink     'buffered', 'fadvise' or 'direct': how dumps and extracts are written;
+#            anything but 'buffered' also drops artifact pages read by mysql-client restores
+#   workers  chunked dump/restore connections, zstd threads, physical file copies
+#   compact  replay binlog extracts as one compacted file
+#   restore_mode  'normal' or 'fast' (restore_tuning profile; the harness applies
+#                 self.tuning around restore())
+#   apply_client  'pool' (dumps and binlog extracts replayed in-process over a
+#                 pooled connection) or 'mysql' (piped into a mysql client process)
+#
+# A strategy lists the parameters it does not read in `ignores`; the harness
+# resets them to their defaults so such cells are not run twice.
+
+
+class Strategy:
+    name = None
+    ignores = frozenset()
+
+    def __init__(self, cell, conn_params, work_dir, binlog_dir):
+        self.cell = cell
+        self.conn_params = conn_params
+        self.work_dir = work_dir
+        self.binlog_dir = binlog_dir
+        self.engine = cell.get('engine', 'mysqldump')
+        self.codec = cell.get('codec', 'none')
+        self.sink = cell.get('sink', 'buffered')
+        self.workers = cell.get('workers', 1)
+        self.apply_client = cell.get('apply_client', 'pool')
+        self.full_path = None
+        self.full_binlog = None     # binlog position the latest full backup is consistent with
+        self.connect_time_s = 0.0
+        self.tuning = RestoreTuning(conn_params, cell.get('restore_mode', 'normal'))
+
+    def path(self, name):
+        return os.path.join(self.work_dir, name)
+
+    def mysql_command(self):
+        return client_command("mysql", self.conn_params, *self.tuning.client_args(), self.conn_params['database'])
+
+    def full_backup(self):
+        if self.engine == 'chunked':
+            self.full_path = self.path('full_chunks')
+            start = time.time()
+            self.full_binlog = dump_database(self.conn_params, self.full_path, workers=self.workers)['binlog']
+            return {'backup_time_s': round(time.time() - start, 2),
+                    'backup_size_MB': round(dump_size_bytes(self.full_path) / 1024 / 1024, 2)}
+        self.full_path = compressed_path(self.path('full_backup.sql'), self.codec)
+        stats = backup_command_to_file(client_command("mysqldump", self.conn_params, "--single-transaction",
+                                                      "--source-data=2", self.conn_params['database']),
+                                       self.full_path, self.codec, threads=self.workers if self.workers > 1 else 0,
+                                       sink=self.sink)
+        self.full_binlog = dump_binlog_position(self.full_path, self.codec)
+        return {'backup_time_s': stats['backup_time_s'], 'backup_size_MB': stats['stored_MB'],
+                'cpu_time_s': stats['cpu_time_s']}
+
+    def restore_full(self):
+        start = time.time()
+        if self.engine == 'chunked':
+            stats = restore_database(self.conn_params, self.full_path, workers=self.workers,
+                                     session_sql=BULK_SESSION_SQL + self.tuning.session_sql())
+            self.connect_time_s += stats['connect_time_s']
+        elif self.apply_client == 'pool':
+            pool = get_pool(self.conn_params, extra_session_sql=self.tuning.session_sql())
+            self.connect_time_s += apply_sql_file(pool, self.full_path, self.codec)['connect_time_s']
+        else:
+            restore_file_to_command(self.mysql_command(), self.full_path, self.codec,
+                                    drop_cache=self.sink != 'buffered')
+        return round(time.time() - start, 2)
+
+    def backup_initial(self):
+        return self.full_backup()
+
+    def backup_batch(self, batch):
+        raise NotImplementedError
+
+    def restore(self):
+        raise NotImplementedError
+
+
+# --- Full backup after every batch, restore the latest one ---
+class FullStrategy(Strategy):
+    name = 'full'
+    ignores = frozenset({'compact'})
+
+    def backup_batch(self, batch):
+        return self.full_backup()
+
+    def restore(self):
+        return {'restore_time_s': self.restore_full(), 'connect_time_s': round(self.connect_time_s, 4)}
+
+
+# --- Full backup + one binlog window per batch ---
+class IncrementalStrategy(Strategy):
+    name = 'incremental'
+    flush_logs = True
+
+    def __init__(self, cell, conn_params, work_dir, binlog_dir):
+        super().__init__(cell, conn_params, work_dir, binlog_dir)
+        self.binlog_engine = BinlogIncrementalEngine(conn_params, binlog_dir, self.path('binlog_checkpoint.json'),
+                                                     self.codec, threads=self.workers if self.workers > 1 else 0,
+                                                     sink=self.sink)
+        self.segments = []
+
+    def backup_initial(self):
+        stats = self.full_backup()
+        self.binlog_engine.set_checkpoint(self.full_binlog)
+        return stats
+
+    def backup_batch(self, batch):
+        if self.flush_logs:
+            conn = pooled_connection(self.conn_params)
+            conn.cursor().execute("FLUSH LOGS")
+            conn.close()
+        path = compressed_path(self.path(f"{self.name}_batch{batch}.sql"), self.codec)
+        stats = self.binlog_engine.backup_window(path)
+        self.segments.append(path)
+        return {'backup_time_s': stats['backup_time_s'], 'backup_size_MB': stats['stored_MB'],
+                'cpu_time_s': stats['cpu_time_s'], 'events': stats['events']}
+
+    def restore(self):
+        full_time = self.restore_full()
+        segments = self.segments
+        compact_time = 0.0
+        if self.cell.get('compact') and segments:
+            compacted = compressed_path(self.path('compacted.sql'), self.codec)
+            compact_time = compact_segments(segments, compacted, self.codec)['compact_time_s']
+            segments = [compacted]
+        start = time.time()
+        if self.apply_client == 'pool':
+            with BinlogApplier(self.conn_params, self.tuning.session_sql(), progress_interval_s=0) as applier:
+                for segment in segments:
+                    self.connect_time_s += applier.apply_file(segment, self.codec)['connect_time_s']
+        else:
+            for segment in segments:
+                restore_file_to_command(self.mysql_command(), segment, self.codec, drop_cache=self.sink != 'buffered')
+        apply_time = round(time.time() - start, 2)
+        return {
+            'restore_time_s': round(full_time + compact_time + apply_time, 2),
+            'full_restore_time_s': full_time,
+            'apply_time_s': apply_time,
+            'compact_time_s': compact_time,
+            'connect_time_s': round(self.connect_time_s, 4),
+        }
+
+
+# --- Same chain without forcing a binlog rotation per batch ---
+class LogBasedStrategy(IncrementalStrategy):
+    name = 'log_based'
+    flush_logs = False
+
+
+# --- Transportable tablespace copy after every batch, import the latest one ---
+class PhysicalStrategy(Strategy):
+    name = 'physical'
+    ignores = frozenset({'engine', 'codec', 'sink', 'compact', 'restore_mode', 'apply_client'})
+
+    def full_backup(self):
+        self.full_path = self.path('physical_backup')
+        stats = backup_tablespaces(self.conn_params, self.full_path, workers=self.workers)
+        return {'backup_time_s': stats['backup_time_s'], 'backup_size_MB': stats['stored_MB'],
+                'lock_time_s': stats['lock_time_s']}
+
+    def backup_batch(self, batch):
+        return self.full_backup()
+
+    def restore(self):
+        stats = restore_tablespaces(self.conn_params, self.full_path, workers=self.workers)
+        return {'restore_time_s': stats['restore_time_s']}
+
+
+STRATEGIES = {cls.name: cls for cls in (FullStrategy, IncrementalStrategy, LogBasedStrategy, PhysicalStrategy)}
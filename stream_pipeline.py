@@ -0,0 +1,566 @@
+import datetime
+import errno
+import hashlib
+import mmap
+import os
+import queue
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for the 'zstd' codec
+    zstandard = None
+
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+except ImportError:  # optional: only needed for the encrypt / decrypt stages
+    Cipher = None
+
+# --- Config ---
+BLOCK_SIZE = 1024 * 1024        # bytes per buffer; a multiple of ALIGNMENT
+QUEUE_DEPTH = 4                 # blocks waiting between two stages
+ALIGNMENT = 4096                # O_DIRECT offset / length / address alignment
+BUFFER_SLACK = ALIGNMENT        # room past a full block for cipher tails
+DROP_CACHE_BYTES = 32 * 1024 * 1024     # synced and dropped from the page cache at a time
+POLL_S = 0.1                    # how often a blocked stage checks for an aborted pipeline
+NONCE_SIZE = 16                 # AES-CTR initial counter block, stored in front of the ciphertext
+KEY_SIZE = 32                   # AES-256
+SINK_MODES = ('buffered', 'fadvise', 'direct')
+
+STAGE_COLUMNS = ['logged_at', 'label', 'stage', 'MB_in', 'MB_out', 'busy_s', 'stall_in_s', 'stall_out_s',
+                 'MB_per_s', 'pool_MB']
+
+
+# --- Streaming pipeline: source -> transforms -> sink ---
+# Every stage runs in its own thread and passes fixed-size blocks over a
+# bounded queue. Blocks come from one pool of page-aligned buffers allocated
+# up front, so memory stays at pool_MB however large the dump is: when the
+# sink falls behind, the queues fill, the pool runs dry and the source stops
+# reading from mysqldump (backpressure). Pass-through stages (hashing) hand
+# the same buffer on; transforms write into a fresh pool buffer and return
+# the input one.
+#
+# Per stage: busy_s is time spent working, stall_in_s waiting for the stage
+# before it, stall_out_s waiting for a free buffer or room in the next queue.
+# The stage with the highest busy_s is the bottleneck; a large stall_out_s
+# upstream of it is the backpressure it causes.
+#
+#   hasher = HashStage()
+#   stages = Pipeline(FileSource('dump.sql'), [hasher, CompressStage('zstd', 3)],
+#                     FileSink('dump.sql.zst', 'fadvise')).run()
+#   print(summarize(stages), hasher.hexdigest())
+class PipelineAborted(Exception):
+    pass
+
+
+class Block:
+    def __init__(self, capacity):
+        self.buffer = mmap.mmap(-1, capacity)     # anonymous mappings are page-aligned
+        self.view = memoryview(self.buffer)
+        self.length = 0
+
+    @property
+    def data(self):
+        return self.view[:self.length]
+
+
+class BufferPool:
+    def __init__(self, count, block_size=BLOCK_SIZE):
+        self.count = count
+        self.block_size = block_size
+        self.capacity = block_size + BUFFER_SLACK
+        self._free = queue.Queue()
+        for _ in range(count):
+            self._free.put(Block(self.capacity))
+
+    def get(self, timeout=None):
+        return self._free.get(timeout=timeout)
+
+    def put(self, block):
+        block.length = 0
+        self._free.put(block)
+
+    def size_MB(self):
+        return round(self.count * self.capacity / 1024 / 1024, 1)
+
+
+class Stage:
+    name = 'stage'
+
+    def __init__(self):
+        self.inbox = None
+        self.outbox = None
+        self.pool = None
+        self.abort = None
+        self.error = None
+        self.pending = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.stall_in = 0.0
+        self.stall_out = 0.0
+        self.elapsed = 0.0
+
+    def _wait(self, call):
+        while True:
+            try:
+                return call(timeout=POLL_S)
+            except (queue.Empty, queue.Full):
+                if self.abort.is_set():
+                    raise PipelineAborted()
+
+    def take(self):
+        start = time.perf_counter()
+        block = self._wait(self.inbox.get)
+        self.stall_in += time.perf_counter() - start
+        if block is not None:
+            self.bytes_in += block.length
+        return block
+
+    def acquire(self):
+        start = time.perf_counter()
+        block = self._wait(self.pool.get)
+        self.stall_out += time.perf_counter() - start
+        return block
+
+    def release(self, block):
+        self.pool.put(block)
+
+    def emit(self, block):
+        if block is not None:
+            self.bytes_out += block.length
+        start = time.perf_counter()
+        self._wait(lambda timeout: self.outbox.put(block, timeout=timeout))
+        self.stall_out += time.perf_counter() - start
+
+    # Copy transform output into pool buffers, emitting each one as it fills
+    def emit_bytes(self, data):
+        data = memoryview(data)
+        while data:
+            if self.pending is None:
+                self.pending = self.acquire()
+            block = self.pending
+            n = min(len(data), self.pool.block_size - block.length)
+            block.view[block.length:block.length + n] = data[:n]
+            block.length += n
+            data = data[n:]
+            if block.length == self.pool.block_size:
+                self.pending = None
+                self.emit(block)
+
+    def flush_pending(self):
+        if self.pending is not None:
+            block, self.pending = self.pending, None
+            if block.length:
+                self.emit(block)
+            else:
+                self.release(block)
+
+    def process(self, block):
+        self.emit(block)
+
+    def finish(self):
+        pass
+
+    def close(self):
+        pass
+
+    def work(self):
+        while True:
+            block = self.take()
+            if block is None:
+                break
+            self.process(block)
+        self.finish()
+        self.flush_pending()
+        self.emit(None)
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            self.work()
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            self.error = e
+            self.abort.set()
+        finally:
+            try:
+                self.close()
+            except OSError as e:
+                if self.error is None:
+                    self.error = e
+                    self.abort.set()
+            self.elapsed = time.perf_counter() - start
+
+    def stats(self):
+        busy = max(self.elapsed - self.stall_in - self.stall_out, 0.0)
+        moved = max(self.bytes_in, self.bytes_out) / 1024 / 1024
+        return {
+            'stage': self.name,
+            'MB_in': round(self.bytes_in / 1024 / 1024, 2),
+            'MB_out': round(self.bytes_out / 1024 / 1024, 2),
+            'busy_s': round(busy, 3),
+            'stall_in_s': round(self.stall_in, 3),
+            'stall_out_s': round(self.stall_out, 3),
+            'MB_per_s': round(moved / busy, 1) if busy > 0 else '',
+        }
+
+
+class Pipeline:
+    def __init__(self, source, stages, sink, block_size=BLOCK_SIZE, depth=QUEUE_DEPTH):
+        self.chain = [source] + list(stages) + [sink]
+        self.block_size = block_size
+        self.depth = depth
+        self.pool = None
+
+    def run(self):
+        # Every queue full, plus an input and a pending output block per stage:
+        # a stage can always get the buffer it waits for, so the pool never deadlocks
+        count = (len(self.chain) - 1) * self.depth + 2 * len(self.chain) + 1
+        self.pool = BufferPool(count, self.block_size)
+        abort = threading.Event()
+        for stage in self.chain:
+            stage.pool, stage.abort = self.pool, abort
+        for upstream, downstream in zip(self.chain, self.chain[1:]):
+            upstream.outbox = downstream.inbox = queue.Queue(maxsize=self.depth)
+
+        threads = [threading.Thread(target=stage.run, name=f"pipeline-{stage.name}", daemon=True)
+                   for stage in self.chain]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        errors = [stage.error for stage in self.chain if stage.error is not None]
+        if errors:
+            raise errors[0]
+        return self.stats()
+
+    def stats(self):
+        return [dict(stage.stats(), pool_MB=self.pool.size_MB()) for stage in self.chain]
+
+
+# --- Sources ---
+class StreamSource(Stage):
+    name = 'source'
+
+    def __init__(self, stream):
+        super().__init__()
+        self.stream = stream
+
+    def read_into(self, view):
+        return self.stream.readinto(view)
+
+    def work(self):
+        while True:
+            block = self.acquire()
+            n = self.read_into(block.view[:self.pool.block_size])
+            if not n:
+                self.release(block)
+                break
+            block.length = n
+            self.bytes_in += n
+            self.emit(block)
+        self.emit(None)
+
+
+# Reads a backup artifact; with drop_cache the pages already read are evicted
+# as it goes, so a restore does not push the server's working set out either
+class FileSource(StreamSource):
+    name = 'file'
+
+    def __init__(self, path, drop_cache=False):
+        super().__init__(open(path, 'rb', buffering=0))
+        self.fd = self.stream.fileno()
+        self.drop_cache = drop_cache and hasattr(os, 'posix_fadvise')
+        self.offset = 0
+        self.dropped = 0
+        if self.drop_cache:
+            os.posix_fadvise(self.fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+    def read_into(self, view):
+        n = self.stream.readinto(view)
+        self.offset += n or 0
+        if self.drop_cache and (not n or self.offset - self.dropped >= DROP_CACHE_BYTES):
+            os.posix_fadvise(self.fd, self.dropped, self.offset - self.dropped, os.POSIX_FADV_DONTNEED)
+            self.dropped = self.offset
+        return n
+
+    def close(self):
+        self.stream.close()
+
+
+# --- Transforms ---
+class HashStage(Stage):
+    def __init__(self, algorithm='sha256'):
+        super().__init__()
+        self.name = algorithm
+        self.hasher = hashlib.new(algorithm)
+
+    def process(self, block):
+        self.hasher.update(block.data)
+        self.emit(block)
+
+    def hexdigest(self):
+        return self.hasher.hexdigest()
+
+
+# Same container formats as compression.open_writer, so artifacts read back
+# with open_reader / gzip / zstd whichever path wrote them
+class CompressStage(Stage):
+    def __init__(self, codec, level, threads=0):
+        super().__init__()
+        self.name = codec
+        if codec == 'gzip':
+            self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        else:
+            self.compressor = zstandard.ZstdCompressor(level=level, threads=threads).compressobj()
+
+    def process(self, block):
+        self.emit_bytes(self.compressor.compress(block.data))
+        self.release(block)
+
+    def finish(self):
+        self.emit_bytes(self.compressor.flush())
+
+
+class DecompressStage(Stage):
+    def __init__(self, codec):
+        super().__init__()
+        self.name = codec
+        self.codec = codec
+        self.decompressor = self._new()
+
+    def _new(self):
+        if self.codec == 'gzip':
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    def process(self, block):
+        data = block.data
+        while data:
+            if self.codec == 'gzip':
+                # max_length keeps a highly compressed block from expanding all at once
+                self.emit_bytes(self.decompressor.decompress(data, self.pool.block_size))
+                data = self.decompressor.unconsumed_tail
+            else:
+                self.emit_bytes(self.decompressor.decompress(data))
+                data = b''
+            if self.decompressor.eof:
+                # Concatenated members / frames
+                data = self.decompressor.unused_data
+                self.decompressor = self._new()
+        self.release(block)
+
+    def finish(self):
+        if self.codec == 'gzip':
+            self.emit_bytes(self.decompressor.flush())
+
+
+def _require_cipher():
+    if Cipher is None:
+        raise RuntimeError("Encrypted artifacts require the 'cryptography' package (pip install cryptography)")
+
+
+# 32 raw bytes or 64 hex characters
+def load_key(path):
+    with open(path, 'rb') as f:
+        key = f.read().strip()
+    if len(key) == 2 * KEY_SIZE:
+        key = bytes.fromhex(key.decode('ascii'))
+    if len(key) != KEY_SIZE:
+        raise ValueError(f"{path}: expected a {KEY_SIZE}-byte key (raw or hex)")
+    return key
+
+
+# AES-256-CTR; the random initial counter block is written in front of the
+# ciphertext. CTR keeps the length unchanged, so every block encrypts
+# straight into one pool buffer.
+class EncryptStage(Stage):
+    name = 'aes-ctr'
+
+    def __init__(self, key):
+        super().__init__()
+        _require_cipher()
+        self.nonce = os.urandom(NONCE_SIZE)
+        self.cipher = Cipher(algorithms.AES(key), modes.CTR(self.nonce)).encryptor()
+
+    def work(self):
+        self.emit_bytes(self.nonce)
+        self.flush_pending()
+        super().work()
+
+    def process(self, block):
+        out = self.acquire()
+        out.length = self.cipher.update_into(block.data, out.view)
+        self.release(block)
+        self.emit(out)
+
+
+class DecryptStage(Stage):
+    name = 'aes-ctr'
+
+    def __init__(self, key):
+        super().__init__()
+        _require_cipher()
+        self.key = key
+        self.header = b''
+        self.cipher = None
+
+    def process(self, block):
+        data = block.data
+        if self.cipher is None:
+            need = NONCE_SIZE - len(self.header)
+            self.header += bytes(data[:need])
+            data = data[need:]
+            if len(self.header) < NONCE_SIZE:
+                self.release(block)
+                return
+            self.cipher = Cipher(algorithms.AES(self.key), modes.CTR(self.header)).decryptor()
+        if data:
+            out = self.acquire()
+            out.length = self.cipher.update_into(data, out.view)
+            self.emit(out)
+        self.release(block)
+
+    def finish(self):
+        if self.cipher is None and self.bytes_in:
+            raise ValueError("Encrypted artifact is shorter than its nonce")
+
+
+# --- Sinks ---
+class Sink(Stage):
+    def work(self):
+        while True:
+            block = self.take()
+            if block is None:
+                break
+            self.write(block.data)
+            self.bytes_out += block.length
+            self.release(block)
+        self.finish()
+
+    def write(self, data):
+        raise NotImplementedError
+
+
+# Feeds a consumer process (mysql) through its stdin pipe
+class StreamSink(Sink):
+    name = 'stream'
+
+    def __init__(self, stream):
+        super().__init__()
+        self.stream = stream
+
+    def write(self, data):
+        self.stream.write(data)
+
+    def close(self):
+        self.stream.close()
+
+
+class DiscardSink(Sink):
+    name = 'discard'
+
+    def write(self, data):
+        pass
+
+
+# buffered  plain buffered writes (the page cache keeps the whole artifact)
+# fadvise   every DROP_CACHE_BYTES: fdatasync, then POSIX_FADV_DONTNEED on the
+#           written range, so the cache holds at most that much of the backup
+# direct    O_DIRECT from the aligned pool buffers, bypassing the cache; the
+#           last partial block is padded to ALIGNMENT and truncated back.
+#           Falls back to 'fadvise' where the filesystem refuses O_DIRECT (tmpfs)
+class FileSink(Sink):
+    def __init__(self, path, mode='buffered'):
+        super().__init__()
+        if mode not in SINK_MODES:
+            raise ValueError(f"Unknown sink mode '{mode}', expected one of {SINK_MODES}")
+        if mode != 'buffered' and not hasattr(os, 'posix_fadvise'):
+            mode = 'buffered'
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        self.fd = None
+        if mode == 'direct':
+            try:
+                self.fd = os.open(path, flags | os.O_DIRECT, 0o644)
+            except (AttributeError, OSError) as e:
+                if isinstance(e, OSError) and e.errno != errno.EINVAL:
+                    raise
+                mode = 'fadvise'
+        if self.fd is None:
+            self.fd = os.open(path, flags, 0o644)
+        self.mode = mode
+        self.name = f"file-{mode}"
+        self.written = 0
+        self.dropped = 0
+        self.staging = None
+
+    def _write_all(self, data):
+        while data:
+            n = os.write(self.fd, data)
+            data = data[n:]
+
+    def write(self, data):
+        if self.mode == 'direct':
+            self._write_direct(data)
+        else:
+            self._write_all(data)
+        self.written += len(data)
+        if self.mode == 'fadvise' and self.written - self.dropped >= DROP_CACHE_BYTES:
+            self._drop_cache()
+
+    def _write_direct(self, data):
+        size = self.pool.block_size
+        if self.staging is None:
+            self.staging = Block(size)
+        staging = self.staging
+        if not staging.length and len(data) == size:
+            # Full pool block: written straight from its aligned buffer
+            self._write_all(data)
+            return
+        while data:
+            n = min(len(data), size - staging.length)
+            staging.view[staging.length:staging.length + n] = data[:n]
+            staging.length += n
+            data = data[n:]
+            if staging.length == size:
+                self._write_all(staging.view[:size])
+                staging.length = 0
+
+    def _drop_cache(self):
+        os.fdatasync(self.fd)
+        os.posix_fadvise(self.fd, self.dropped, self.written - self.dropped, os.POSIX_FADV_DONTNEED)
+        self.dropped = self.written
+
+    def finish(self):
+        if self.mode == 'direct' and self.staging is not None and self.staging.length:
+            tail = self.staging.length
+            padded = -(-tail // ALIGNMENT) * ALIGNMENT
+            self.staging.view[tail:padded] = bytes(padded - tail)
+            self._write_all(self.staging.view[:padded])
+            os.ftruncate(self.fd, self.written)
+            self.staging.length = 0
+        if self.mode == 'fadvise':
+            self._drop_cache()
+        elif self.mode == 'direct':
+            os.fsync(self.fd)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+# --- Stage Stats ---
+def summarize(stages):
+    bottleneck = max(stages, key=lambda s: s['busy_s'])
+    parts = ', '.join(f"{s['stage']} {s['MB_per_s'] or '-'} MB/s" for s in stages)
+    return f"{parts}; bottleneck {bottleneck['stage']}, {stages[0]['pool_MB']} MB buffered"
+
+
+# CSV rows for STAGE_COLUMNS; callers write them with db_common.log_to_csv
+def stage_rows(label, stages):
+    logged_at = datetime.datetime.now().isoformat(timespec='seconds')
+    return [dict(stage, logged_at=logged_at, label=label) for stage in stages]
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# The modules under test live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def fixture_path(name):
+    return os.path.join(FIXTURES, name)
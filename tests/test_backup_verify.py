@@ -0,0 +1,42 @@
+import gzip
+
+from backup_verify import _outside, row_hash_sql, verify_artifact
+from compression import backup_command_to_file, digest_path
+
+
+def test_row_hash_sql():
+    assert row_hash_sql(['id', 'email']) == \
+        "CRC32(CONCAT_WS('#', `id`, `email`, ISNULL(`id`), ISNULL(`email`)))"
+
+
+def test_row_hash_sql_distinguishes_null():
+    # CONCAT_WS skips NULLs, so ('a', NULL) and (NULL, 'a') only differ by the ISNULL flags
+    expr = row_hash_sql(['a', 'b'])
+    assert expr.endswith("ISNULL(`a`), ISNULL(`b`)))")
+
+
+def test_outside_ranges():
+    assert _outside('id', []) == ('', ())
+    # Rows below the first range and above the last one (inserted after the manifest was taken)
+    assert _outside('id', [(1, 100), (101, 200), (201, 250)]) == (" WHERE `id` < %s OR `id` > %s", (1, 250))
+
+
+def test_verify_artifact(tmp_path):
+    src = tmp_path / 'dump.sql'
+    src.write_bytes(b"INSERT INTO `customers` VALUES (1,'Ann','555-0100');\n" * 5000)
+    path = str(tmp_path / 'full_backup.sql.gz')
+    backup_command_to_file(['cat', str(src)], path, 'gzip', digest=True)
+    with open(digest_path(path)) as f:
+        assert f.read().endswith("  full_backup.sql.gz\n")
+    assert verify_artifact(path, 'gzip')['ok']
+
+    # The digest covers the uncompressed stream: recompressing keeps it valid, an edited row does not
+    with open(path, 'rb') as f:
+        data = gzip.decompress(f.read())
+    with open(path, 'wb') as f:
+        f.write(gzip.compress(data, 9))
+    assert verify_artifact(path, 'gzip')['ok']
+    with open(path, 'wb') as f:
+        f.write(gzip.compress(data.replace(b"'Ann'", b"'Bob'", 1)))
+    report = verify_artifact(path, 'gzip')
+    assert not report['ok'] and report['expected'] != report['actual']
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from benchmark import DEFAULT_CELL, expand_cells, load_matrix
+
+
+def test_expand_cells_product():
+    config = {'matrix': {'strategy': ['full', 'incremental'], 'initial_records': [1000, 2000, 4000]},
+              'fixed': {'batches': 2}}
+    cells = expand_cells(config)
+    assert len(cells) == 6
+    assert [c['cell_id'] for c in cells] == [1, 2, 3, 4, 5, 6]
+    assert {(c['strategy'], c['initial_records']) for c in cells} == \
+        {(s, n) for s in ('full', 'incremental') for n in (1000, 2000, 4000)}
+    # Fixed values override the defaults, everything else keeps them
+    assert all(c['batches'] == 2 and c['seed'] == DEFAULT_CELL['seed'] for c in cells)
+
+
+def test_expand_cells_without_matrix():
+    cells = expand_cells({})
+    assert len(cells) == 1
+    assert cells[0] == dict(DEFAULT_CELL, cell_id=1)
+
+
+def test_expand_cells_unknown_strategy():
+    with pytest.raises(ValueError):
+        expand_cells({'matrix': {'strategy': ['full', 'snapshot']}})
+
+
+def test_load_matrix_unknown_parameter(tmp_path):
+    path = tmp_path / 'matrix.json'
+    path.write_text(json.dumps({'matrix': {'strategy': ['full'], 'compresion': ['zstd']}}))
+    with pytest.raises(ValueError):
+        load_matrix(str(path))
+    path.write_text(json.dumps({'matrix': {'strategy': ['full']}, 'fixed': {'batches': 3}}))
+    assert load_matrix(str(path))['fixed'] == {'batches': 3}
+
+
+def test_expand_cells_skips_ignored_parameters():
+    config = {'matrix': {'strategy': ['full', 'physical'], 'codec': ['none', 'zstd'],
+                         'restore_mode': ['normal', 'fast'], 'workers': [1, 4]}}
+    cells = expand_cells(config)
+    physical = [c for c in cells if c['strategy'] == 'physical']
+    assert len(cells) == 8 + 2
+    assert [c['cell_id'] for c in cells] == list(range(1, 11))
+    assert {c['workers'] for c in physical} == {1, 4}
+    assert all(c['codec'] == 'none' and c['restore_mode'] == 'normal' for c in physical)
@@ -0,0 +1,65 @@
+from conftest import fixture_path
+
+from binlog_compact import COMPACT_FOOTER, COMPACT_HEADER, compact_segments
+from binlog_text import Statement, iter_items
+
+SEGMENTS = ['mysqlbinlog_segment_a.txt', 'mysqlbinlog_segment_b.txt']
+
+
+def compact(tmp_path, names, **kwargs):
+    output = tmp_path / 'compacted.sql'
+    stats = compact_segments([fixture_path(name) for name in names], str(output), **kwargs)
+    data = output.read_bytes()
+    with open(output, 'rb') as f:
+        items = [item.text for item in iter_items(f) if isinstance(item, Statement) and item.is_data]
+    return stats, data, items
+
+
+def test_compacted_stream(tmp_path):
+    stats, data, items = compact(tmp_path, SEGMENTS)
+    assert data.startswith(COMPACT_HEADER) and data.endswith(COMPACT_FOOTER)
+    assert stats['segments_before'] == 2
+    assert stats['transactions_before'] == 4
+    # binlog.000004 transactions 8-9 | procedure | 11 | new format description | 12
+    assert stats['transactions_after'] == 3
+    assert stats['statements_after'] == len(items)
+    assert stats['bytes_after'] < stats['bytes_before']
+
+    # Repeated preamble and session state are written once, GTIDs not at all
+    assert items.count(b'SET @@session.sql_mode=1168113696') == 1
+    assert sum(1 for text in items if text.startswith(b"BINLOG '\n3GFyaA8B")) == 1
+    assert sum(1 for text in items if text.startswith(b"BINLOG '\n4WpyaA8B")) == 1
+    assert not any(b'GTID_NEXT' in text for text in items)
+    # The isolation level is set once per replayed group, not per source transaction
+    assert sum(1 for text in items if text.startswith(b'/*!50718 SET TRANSACTION')) == 3
+
+    # The procedure commits the open group and runs on its own
+    create = next(i for i, text in enumerate(items) if text.startswith(b'CREATE DEFINER'))
+    assert items[create - 1] != b'BEGIN'
+    assert b'COMMIT' in items[:create]
+    assert items[:create].count(b'BEGIN') == items[:create].count(b'COMMIT') == 1
+
+
+def test_row_events_for_one_table_are_merged(tmp_path):
+    _, _, items = compact(tmp_path, SEGMENTS)
+    rows = [text for text in items if text.startswith(b"BINLOG '\nVGpyaBMB")]
+    # Transaction 11 wrote two INSERTs into customers: one BINLOG statement
+    assert len(rows) == 1
+    assert rows[0].count(b'VGpyaBMB') == 2 and rows[0].count(b'VGpyaB4B') == 2
+
+
+def test_keep_gtids(tmp_path):
+    stats, _, items = compact(tmp_path, SEGMENTS, keep_gtids=True)
+    assert stats['transactions_after'] == 4
+    gtids = [text.split(b"'")[1] for text in items if b'GTID_NEXT' in text]
+    assert [g for g in gtids if g != b'AUTOMATIC'] == [b'3e11fa47-71ca-11e1-9e33-c80aa9429562:%d' % n
+                                                       for n in range(8, 13)]
+    assert gtids[-1] == b'AUTOMATIC'
+
+
+def test_startup_rollback_is_dropped(tmp_path):
+    stats, _, items = compact(tmp_path, ['mysqlbinlog_startup_stream.txt'])
+    assert b'ROLLBACK' not in items
+    assert items[0].startswith(b"BINLOG '\nz2lyaA8B")
+    assert items.count(b'BEGIN') == items.count(b'COMMIT') == 1
+    assert stats['transactions_before'] == stats['transactions_after'] == 1
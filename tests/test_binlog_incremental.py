@@ -0,0 +1,31 @@
+import gzip
+
+import pytest
+import zstandard
+from conftest import fixture_path
+
+from binlog_incremental import dump_binlog_position
+
+
+def test_dump_coordinates():
+    assert dump_binlog_position(fixture_path('mysqldump_routines.sql')) == {'file': 'binlog.000004', 'position': 1573}
+
+
+def test_dump_coordinates_legacy_syntax(tmp_path):
+    # Servers before 8.0.23 write CHANGE MASTER TO; the codec is honoured too
+    path = tmp_path / 'full_backup.sql.gz'
+    with open(fixture_path('mysqldump_routines.sql'), 'rb') as src:
+        data = src.read().replace(b'CHANGE REPLICATION SOURCE TO SOURCE_LOG_FILE', b'CHANGE MASTER TO MASTER_LOG_FILE')
+    with gzip.open(path, 'wb') as f:
+        f.write(data.replace(b'SOURCE_LOG_POS', b'MASTER_LOG_POS'))
+    assert dump_binlog_position(str(path), 'gzip') == {'file': 'binlog.000004', 'position': 1573}
+
+
+def test_dump_without_coordinates(tmp_path):
+    # Dumped without --source-data
+    path = tmp_path / 'full_backup.sql.zst'
+    with open(fixture_path('mysqldump_routines.sql'), 'rb') as src:
+        data = b''.join(line for line in src if b'CHANGE REPLICATION SOURCE' not in line)
+    path.write_bytes(zstandard.ZstdCompressor().compress(data))
+    with pytest.raises(RuntimeError):
+        dump_binlog_position(str(path), 'zstd')
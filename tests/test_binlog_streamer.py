@@ -0,0 +1,55 @@
+import asyncio
+import os
+
+from conftest import fixture_path
+
+from binlog_streamer import BinlogStreamer
+
+
+class FakeProc:
+    def __init__(self, data):
+        self.stdout = asyncio.StreamReader()
+        self.stdout.feed_data(data)
+        self.stdout.feed_eof()
+
+
+def stream_fixture(tmp_path, name):
+    with open(fixture_path(name), 'rb') as f:
+        data = f.read()
+    streamer = BinlogStreamer({}, segment_dir=str(tmp_path), state_file=str(tmp_path / 'state.json'),
+                              index_file=None)
+
+    async def run():
+        streamer.proc = FakeProc(data)
+        await streamer._read_stream()
+        streamer._truncate_to_last_commit()
+        streamer._close_segment()
+
+    asyncio.run(run())
+    segments = sorted(n for n in os.listdir(tmp_path) if n.startswith('segment_'))
+    return streamer, [(tmp_path / n).read_bytes() for n in segments]
+
+
+# mysqlbinlog --read-from-remote-server output for a binlog created at server
+# startup: ROLLBACK/*!*/; comes before the format description BINLOG statement
+def test_startup_preamble_keeps_format_description(tmp_path):
+    streamer, segments = stream_fixture(tmp_path, 'mysqlbinlog_startup_stream.txt')
+    preamble = b''.join(streamer.preamble)
+    assert b'DELIMITER /*!*/;' in preamble
+    assert b'ROLLBACK/*!*/;' in preamble
+    assert b"BINLOG '\nz2lyaA8B" in preamble
+    assert preamble.endswith(b"'/*!*/;\n")
+
+    assert len(segments) == 1
+    segment = segments[0]
+    assert segment.startswith(preamble)
+    # The format description event precedes the row event that needs it
+    assert segment.index(b"BINLOG '\nz2lyaA8B") < segment.index(b"BINLOG '\nNmpyaBMB")
+    assert segment.count(b'z2lyaA8B') == 1
+    assert b'COMMIT/*!*/;' in segment
+
+
+def test_checkpoint_follows_last_commit(tmp_path):
+    streamer, _ = stream_fixture(tmp_path, 'mysqlbinlog_startup_stream.txt')
+    assert streamer.current_file == 'binlog.000007'
+    assert streamer.current_pos == 493
@@ -0,0 +1,76 @@
+from conftest import fixture_path
+
+from binlog_text import DATA_DELIMITER, Event, Statement, binlog_body, gtid_next, iter_items, session_key
+
+
+def read_items(name):
+    with open(fixture_path(name), 'rb') as f:
+        return list(iter_items(f))
+
+
+def statements(items):
+    return [item for item in items if isinstance(item, Statement)]
+
+
+def test_delimiter_switches():
+    items = statements(read_items('mysqlbinlog_segment_a.txt'))
+    # Header and footer lines run under ';', everything between under /*!*/;
+    assert items[0].text == b'/*!50530 SET @@SESSION.PSEUDO_SLAVE_MODE=1*/'
+    assert items[0].delimiter == b';' and not items[0].is_data
+    assert items[-1].text == b'/*!50530 SET @@SESSION.PSEUDO_SLAVE_MODE=0*/'
+    assert not items[-1].is_data
+    data = [s for s in items if s.is_data]
+    assert data[0].keyword() == b'BINLOG'
+    assert data[-1].text.startswith(b"SET @@SESSION.GTID_NEXT= 'AUTOMATIC'")
+    assert all(s.delimiter == DATA_DELIMITER for s in data)
+
+
+def test_multiline_statement_keeps_inner_semicolons():
+    items = statements(read_items('mysqlbinlog_segment_b.txt'))
+    procedure = [s for s in items if s.keyword() == b'CREATE']
+    assert len(procedure) == 1
+    assert procedure[0].text.rstrip().endswith(b'  SELECT ROW_COUNT();\nEND')
+    assert procedure[0].event.position == 2315
+    # "BEGIN\n/*!*/;" is a single statement
+    assert sum(1 for s in items if s.text.strip() == b'BEGIN') == 2
+
+
+def test_event_headers():
+    items = read_items('mysqlbinlog_startup_stream.txt')
+    events = [item for item in items if isinstance(item, Event)]
+    assert [e.position for e in events] == [4, 4, 126, 157, 236, 313, 388, 462]
+    rotate, start = events[0], events[1]
+    assert rotate.event_type == 'Rotate' and rotate.rotate_to == 'binlog.000007'
+    assert rotate.timestamp is None     # fake Rotate event, end_log_pos 0
+    assert start.event_type == 'Start' and start.end_pos == 126
+    rows = events[6]
+    assert rows.event_type == 'Write_rows'
+    # Row events take the table from the Table_map event before them
+    assert rows.table == ('testdb', 'customers')
+    assert events[-1].event_type == 'Xid' and events[-1].end_pos == 493
+
+
+def test_statement_offsets_slice_the_file():
+    with open(fixture_path('mysqlbinlog_startup_stream.txt'), 'rb') as f:
+        data = f.read()
+    for item in statements(read_items('mysqlbinlog_startup_stream.txt')):
+        chunk = data[item.offset:item.end_offset]
+        assert chunk.rstrip().endswith(item.delimiter)
+        assert chunk.startswith(item.text.split(b'\n', 1)[0])
+
+
+def test_statement_helpers():
+    items = statements(read_items('mysqlbinlog_segment_a.txt'))
+    gtids = [gtid_next(s) for s in items if gtid_next(s) is not None]
+    assert gtids == ['3e11fa47-71ca-11e1-9e33-c80aa9429562:8', '3e11fa47-71ca-11e1-9e33-c80aa9429562:9',
+                     'AUTOMATIC']
+
+    rows = [s for s in items if s.keyword() == b'BINLOG' and s.event.event_type == 'Write_rows']
+    assert len(rows) == 2
+    assert [line[:8] for line in binlog_body(rows[0])] == [b'NmpyaBMB', b'Aw4BAQAC', b'NmpyaB4B', b'LTE0hA7Y']
+
+    keys = {session_key(s.text) for s in items}
+    assert ('timestamp',) in keys
+    assert ('charset',) in keys
+    assert (b'sql_mode',) in keys
+    assert (b'auto_increment_increment', b'auto_increment_offset') in keys
@@ -0,0 +1,51 @@
+import mysql.connector
+import pytest
+
+import chunked_dump
+from chunked_dump import dump_database
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append(sql)
+        if sql.startswith('SHOW CREATE TABLE'):
+            raise mysql.connector.Error(msg='Lost connection to MySQL server during query')
+
+    def fetchall(self):
+        return [('customers', 'BASE TABLE')]
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.statements = []
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+def test_failed_dump_closes_connections(tmp_path, monkeypatch):
+    opened = []
+
+    def connect(**params):
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    monkeypatch.setattr(chunked_dump.mysql.connector, 'connect', connect)
+    with pytest.raises(mysql.connector.Error):
+        dump_database({'database': 'testdb'}, str(tmp_path / 'chunks'), workers=3)
+    # The control connection and all three snapshot connections
+    assert len(opened) == 4 and all(conn.closed for conn in opened)
+    assert opened[0].statements[-1] == 'UNLOCK TABLES'
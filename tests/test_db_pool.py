@@ -0,0 +1,42 @@
+import io
+
+from conftest import fixture_path
+
+from db_pool import iter_sql_statements
+
+
+def read_statements(name):
+    with open(fixture_path(name), 'rb') as f:
+        return list(iter_sql_statements(f))
+
+
+def test_mysqldump_statements():
+    statements = read_statements('mysqldump_routines.sql')
+    # Comment lines (including the --source-data coordinates) are skipped
+    assert not any(s.lstrip().startswith(b'--') for s in statements)
+    assert statements[0] == b'/*!40101 SET @OLD_CHARACTER_SET_CLIENT=@@CHARACTER_SET_CLIENT */'
+    assert statements[-1] == b'/*!40111 SET SQL_NOTES=@OLD_SQL_NOTES */'
+    create = next(s for s in statements if s.startswith(b'CREATE TABLE'))
+    assert create.endswith(b'COLLATE=utf8mb4_0900_ai_ci')
+    # A ';' inside a quoted value does not end the statement
+    insert = next(s for s in statements if s.startswith(b'INSERT'))
+    assert b"'Ann;Lee'" in insert and insert.endswith(b"'555-13')")
+
+
+def test_delimiter_changes():
+    statements = read_statements('mysqldump_routines.sql')
+    trigger = next(s for s in statements if b'TRIGGER `customers_bi`' in s)
+    assert trigger.endswith(b'END */')
+    assert b'  SET NEW.email = LOWER(NEW.email);' in trigger
+    procedure = next(s for s in statements if s.startswith(b'CREATE DEFINER'))
+    assert procedure.split(b'\n')[1:] == [b'BEGIN', b'  UPDATE customers SET phone = phone WHERE id = cid;',
+                                          b'  SELECT ROW_COUNT();', b'END ']
+    # Back on ';' after "DELIMITER ;"
+    after = statements[statements.index(procedure) + 1]
+    assert after == b'/*!50003 SET sql_mode              = @saved_sql_mode */ '
+    assert not any(s.strip().upper().startswith(b'DELIMITER') for s in statements)
+
+
+def test_trailing_statement_without_delimiter():
+    stream = io.BytesIO(b"CREATE TABLE t (id int);\nINSERT INTO t VALUES (1)\n")
+    assert list(iter_sql_statements(stream)) == [b'CREATE TABLE t (id int)', b'INSERT INTO t VALUES (1)']
@@ -0,0 +1,73 @@
+import hashlib
+import io
+
+import numpy as np
+import pytest
+
+import dedup_store
+from dedup_store import MAX_CHUNK, MIN_CHUNK, DedupStore, iter_chunks
+
+
+# mysqldump-style extended INSERT lines with varied row contents
+def dump_text(rows, seed=7):
+    rng = np.random.default_rng(seed)
+    lines = []
+    for start in range(1, rows, 50):
+        values = ','.join(f"({i},'{rng.integers(10 ** 9):x}','u{rng.integers(10 ** 6)}@ex.com',"
+                          f"'555-{rng.integers(10 ** 4):04d}')" for i in range(start, start + 50))
+        lines.append(f"INSERT INTO `customers` VALUES {values};\n")
+    return ''.join(lines).encode()
+
+
+def chunk_digests(data):
+    return [hashlib.sha256(chunk).hexdigest() for chunk in iter_chunks(io.BytesIO(data))]
+
+
+def test_chunk_sizes_and_roundtrip():
+    data = dump_text(20000)
+    chunks = list(iter_chunks(io.BytesIO(data)))
+    assert b''.join(chunks) == data
+    assert all(MIN_CHUNK <= len(chunk) <= MAX_CHUNK for chunk in chunks[:-1])
+    assert len(chunks) > 50
+
+
+def test_boundaries_stable_after_insert():
+    data = dump_text(20000)
+    offset = data.index(b'\n', 5000) + 1
+    edited = data[:offset] + b"INSERT INTO `customers` VALUES (0,'new','new@ex.com','555-0000');\n" + data[offset:]
+    before, after = chunk_digests(data), chunk_digests(edited)
+    # Only the chunk around the insert changes; everything after it is found again
+    assert len(set(after) - set(before)) <= 2
+    assert after[3:] == before[3:]
+
+
+def test_boundaries_independent_of_read_size(monkeypatch):
+    data = dump_text(20000)
+    whole = chunk_digests(data)
+    monkeypatch.setattr(dedup_store, 'READ_SIZE', 50000)
+    assert chunk_digests(data) == whole
+
+
+def test_store_dedups_second_backup(tmp_path):
+    data = dump_text(20000)
+    edited = data.replace(b"(17,'", b"(17,'edited", 1)
+    store = DedupStore(str(tmp_path))
+    first = store.put_stream('full_1', io.BytesIO(data))
+    second = store.put_stream('full_2', io.BytesIO(edited))
+    assert first['new_chunks'] == first['chunks']
+    assert second['new_chunks'] <= 2
+    assert b''.join(store.iter_backup('full_2')) == edited
+    assert store.list_backups() == ['full_1', 'full_2']
+    # A reopened store knows the chunks already on disk
+    assert DedupStore(str(tmp_path)).put_stream('full_3', io.BytesIO(data))['new_chunks'] == 0
+
+
+def test_failed_command_stores_nothing(tmp_path):
+    store = DedupStore(str(tmp_path))
+    with pytest.raises(RuntimeError):
+        store.put_command('full_1', ['sh', '-c', 'echo partial; exit 3'])
+    assert store.list_backups() == []
+    store.put_stream('full_2', io.BytesIO(b'INSERT INTO t VALUES (1);\n'))
+    with pytest.raises(RuntimeError):
+        store.restore_to_command('full_2', ['sh', '-c', 'cat >/dev/null; exit 1'])
+    assert store.put_command('full_3', ['printf', 'x'])['raw_MB'] == 0.0
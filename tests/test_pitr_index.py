@@ -0,0 +1,94 @@
+import io
+
+import pytest
+from conftest import fixture_path
+
+from binlog_text import Statement, iter_items
+from pitr_index import RANGE_FOOTER, PitrIndex, _parse_args, parse_datetime
+
+UUID = '3e11fa47-71ca-11e1-9e33-c80aa9429562'
+
+
+# binlog.000004 from the dump's position 1573: GTIDs 8-9 in segment a,
+# 10 (CREATE PROCEDURE) and 11 in segment b, which then rotates to
+# binlog.000005 for GTID 12
+@pytest.fixture
+def index(tmp_path):
+    with PitrIndex(str(tmp_path / 'pitr_index.db')) as index:
+        index.add_segment(fixture_path('mysqlbinlog_segment_a.txt'), start_file='binlog.000004',
+                          start_pos=1573, end_file='binlog.000004', end_pos=2236)
+        index.add_segment(fixture_path('mysqlbinlog_segment_b.txt'), start_file='binlog.000004',
+                          start_pos=2236, end_file='binlog.000005', end_pos=521)
+        index.add_full_backup(fixture_path('mysqldump_routines.sql'), 'binlog.000004', 1573,
+                              created_ts=parse_datetime('2025-07-12 14:05:31'))
+        yield index
+
+
+def test_segment_scan(index):
+    rows = index.db.execute("SELECT log_file, start_pos, end_pos, gtid, tables FROM transactions ORDER BY seq").fetchall()
+    assert rows == [
+        ('binlog.000004', 1573, 1909, f'{UUID}:8', 'testdb.customers'),
+        ('binlog.000004', 1909, 2236, f'{UUID}:9', 'testdb.customers'),
+        ('binlog.000004', 2236, 2576, f'{UUID}:10', ''),
+        ('binlog.000004', 2576, 3063, f'{UUID}:11', 'testdb.customers'),
+        ('binlog.000005', 197, 521, f'{UUID}:12', 'testdb.orders'),
+    ]
+
+
+def test_plan_to_datetime(index):
+    plan = index.plan(stop_datetime='2025-07-12 14:06:15')
+    assert plan['full_backup']['binlog_pos'] == 1573
+    assert plan['transactions'] == 3
+    assert (plan['stop_file'], plan['stop_pos'], plan['stop_gtid']) == ('binlog.000004', 2576, f'{UUID}:10')
+    assert [r['transactions'] for r in plan['ranges']] == [2, 1]
+    assert plan['binlog_files'] == ['binlog.000004']
+    # Like mysqlbinlog --stop-datetime, a transaction at the exact time is not replayed
+    assert index.plan(stop_datetime='2025-07-12 14:06:20')['stop_gtid'] == f'{UUID}:10'
+
+
+def test_plan_to_gtid(index):
+    plan = index.plan(stop_gtid=f'{UUID}:11')
+    assert plan['transactions'] == 4
+    assert (plan['stop_file'], plan['stop_pos']) == ('binlog.000004', 3063)
+    with pytest.raises(ValueError):
+        index.plan(stop_gtid=f'{UUID}:99')
+
+
+def test_plan_to_position(index):
+    plan = index.plan(stop_position=('binlog.000005', 521))
+    assert plan['transactions'] == 5
+    assert plan['binlog_files'] == ['binlog.000004', 'binlog.000005']
+    assert plan['stop_gtid'] == f'{UUID}:12'
+    assert index.mysqlbinlog_args(plan) == ['mysqlbinlog', '--start-position=1573', '--stop-position=521',
+                                            'binlog.000004', 'binlog.000005']
+    # A position inside a transaction stops after the previous one
+    assert index.plan(stop_position=('binlog.000004', 3000))['stop_gtid'] == f'{UUID}:10'
+
+
+def test_no_full_backup_before_target(index):
+    with pytest.raises(ValueError):
+        index.plan(stop_datetime='2025-07-12 14:00:00')
+
+
+def test_range_from_mid_segment_restores_session(index):
+    # A newer full backup taken between GTIDs 8 and 9
+    index.add_full_backup('full_2.sql', 'binlog.000004', 1909, created_ts=parse_datetime('2025-07-12 14:05:45'))
+    plan = index.plan(stop_gtid=f'{UUID}:9')
+    assert plan['full_backup']['path'].endswith('full_2.sql')
+    assert plan['transactions'] == 1
+
+    stream = b''.join(index.plan_blocks(plan))
+    assert stream.endswith(RANGE_FOOTER)
+    assert b'NmpyaB4B' not in stream and b'PmpyaB4B' in stream
+    data = [item.text.strip() for item in iter_items(io.BytesIO(stream)) if isinstance(item, Statement) and item.is_data]
+    assert data[0].startswith(b"BINLOG '\n3GFyaA8B")
+    # Transaction 9 only carries SET TIMESTAMP; the rest of its session comes from the index
+    assert b'SET @@session.sql_mode=1168113696' in data
+    assert data.index(b'SET @@session.sql_mode=1168113696') < data.index(b'BEGIN')
+    assert data[-2:] == [b'COMMIT', b"SET @@SESSION.GTID_NEXT= 'AUTOMATIC' /* added by pitr_index */"]
+
+
+def test_full_command_created_at():
+    args = _parse_args(['full', 'full_2.sql', 'binlog.000004', '1909', '--created-at', '2025-07-12 14:05:45'])
+    assert (args.binlog_pos, args.created_at) == (1909, parse_datetime('2025-07-12 14:05:45'))
+    assert _parse_args(['full', 'full_2.sql', 'binlog.000004', '1909']).created_at is None
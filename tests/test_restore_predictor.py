@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from restore_predictor import RestoreModel, RestorePredictor, benchmark_sample, make_sample, t_critical
+
+
+# Two-sided Student t quantiles from the tables
+@pytest.mark.parametrize('confidence, dof, expected, tolerance', [
+    (0.95, 1, 12.706, 0.001), (0.99, 1, 63.657, 0.001), (0.95, 2, 4.303, 0.001), (0.99, 2, 9.925, 0.001),
+    (0.95, 3, 3.182, 0.04), (0.95, 5, 2.571, 0.01), (0.95, 10, 2.228, 0.002), (0.99, 10, 3.169, 0.005),
+    (0.95, 30, 2.042, 0.001), (0.95, 1000, 1.962, 0.001),
+])
+def test_t_critical(confidence, dof, expected, tolerance):
+    assert t_critical(confidence, dof) == pytest.approx(expected, rel=tolerance)
+
+
+def fitted(samples):
+    model = RestoreModel(samples[0]['strategy'])
+    model.samples = samples
+    model.fit()
+    return model
+
+
+def test_fit_recovers_linear_model():
+    # restore = 2 s + 10 us/row + 0.5 s per incremental, sizes proportional to rows
+    rng = np.random.default_rng(3)
+    samples = [make_sample('incremental', rows, rows / 10000, chain, 'zstd', 2 + rows * 1e-5 + 0.5 * chain)
+               for rows, chain in zip(rng.integers(100000, 1000000, 12), rng.integers(1, 20, 12))]
+    model = fitted(samples)
+    # A single codec never varies; size_MB is collinear with rows but kept
+    assert model.active == ['rows', 'size_MB', 'chain_length']
+    assert model.dof == 12 - 3
+    result = model.predict(make_sample('incremental', 500000, 50, 10, 'zstd'))
+    assert result['predicted_restore_time_s'] == pytest.approx(12.0, abs=1e-3)
+    # Exact fit: the interval collapses onto the prediction
+    assert result['interval_high_s'] - result['interval_low_s'] < 1e-3
+    assert model.describe().startswith('incremental: 2 + ')
+
+
+def test_prediction_interval_covers_noise():
+    rng = np.random.default_rng(5)
+    rows = rng.integers(100000, 1000000, 40)
+    times = 1 + rows * 2e-5 + rng.normal(0, 0.5, len(rows))
+    model = fitted([make_sample('full', r, r / 5000, 0, 'none', t) for r, t in zip(rows, times)])
+    result = model.predict(make_sample('full', 400000, 80))
+    assert result['interval_low_s'] < 9 < result['interval_high_s']
+    assert 1.5 < result['interval_high_s'] - result['interval_low_s'] < 3
+
+
+def test_few_samples():
+    model = RestoreModel('physical')
+    assert model.predict(make_sample('physical', 1000, 1))['predicted_restore_time_s'] is None
+    model.add(make_sample('physical', 1000, 1, restore_time_s=4.0))
+    # One sample: per-row rate through the origin, no interval
+    assert model.predict(make_sample('physical', 3000, 3)) == {
+        'strategy': 'physical', 'samples': 1, 'predicted_restore_time_s': 12.0, 'interval_low_s': '',
+        'interval_high_s': ''}
+    model.add(make_sample('physical', 2000, 2, restore_time_s=6.0))
+    # Two samples fit exactly with no residual degrees of freedom left
+    assert model.predict(make_sample('physical', 3000, 3))['predicted_restore_time_s'] == pytest.approx(8.0)
+    assert model.sigma2 is None
+
+
+def test_check_logs_error(tmp_path):
+    log = str(tmp_path / 'prediction_log.csv')
+    predictor = RestorePredictor([make_sample('full', 1000, 1, restore_time_s=2.0)], log_file=log)
+    row = predictor.check(make_sample('full', 2000, 2, restore_time_s=5.0))
+    assert row['predicted_restore_time_s'] == 4.0
+    assert row['error_s'] == 1.0 and row['error_pct'] == 20.0
+    assert len(predictor.model('full').samples) == 2
+    with open(log) as f:
+        assert len(f.read().splitlines()) == 2
+
+
+def test_benchmark_sample_rows():
+    run = {'strategy': 'incremental', 'initial_records': 1000, 'batches': 4, 'records_per_batch': 100,
+           'codec': 'zstd', 'backup_size_total_MB': 3.5, 'backup_size_last_MB': 0.2, 'restore_time_s': 2.0}
+    # Inserts only: seeded rows plus every batch
+    assert benchmark_sample(dict(run, rows_expected=np.nan))['rows'] == 1400
+    # A workload mix deletes rows too; the verified count is used
+    sample = benchmark_sample(dict(run, rows_expected=1180))
+    assert sample == make_sample('incremental', 1180, 3.5, 4, 'zstd', 2.0)
+    assert benchmark_sample(dict(run, strategy='full', rows_expected=1180))['size_MB'] == 0.2
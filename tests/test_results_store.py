@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from results_store import append_runs, grouped_percentiles, load_runs, scaling_curve
+
+pytest.importorskip('pyarrow')
+
+
+def make_runs():
+    rows = []
+    for strategy, base in (('full', 10.0), ('incremental', 4.0)):
+        for records in (1000, 2000):
+            for rep in range(1, 6):
+                rows.append({'run_id': f"{strategy}-{records}-{rep}", 'strategy': strategy, 'initial_records': records,
+                             'rep': rep, 'warmup': rep == 1, 'started_at': f"2025-0{6 + rep % 2}-15 10:00:00",
+                             'restore_time_s': base * records / 1000 + rep})
+    return pd.DataFrame(rows)
+
+
+def test_grouped_percentiles():
+    stats = grouped_percentiles(make_runs(), ['strategy', 'initial_records'], ['restore_time_s'])
+    assert list(stats.columns) == ['strategy', 'initial_records', 'n', 'restore_time_s_p50', 'restore_time_s_p95']
+    assert stats['n'].tolist() == [5, 5, 5, 5]
+    full = stats[(stats['strategy'] == 'full') & (stats['initial_records'] == 2000)].iloc[0]
+    # Restore times 21..25 s
+    assert full['restore_time_s_p50'] == 23.0
+    assert full['restore_time_s_p95'] == pytest.approx(np.percentile([21, 22, 23, 24, 25], 95))
+
+
+def test_scaling_curve():
+    runs = make_runs()
+    runs.loc[runs['rep'] == 5, 'restore_time_s'] = np.nan    # runs without the metric are left out
+    curve = scaling_curve(runs, 'initial_records', 'restore_time_s')
+    assert curve.index.tolist() == [1000, 2000]
+    assert sorted(curve.columns) == ['full', 'incremental']
+    assert curve.loc[2000, 'full'] == 22.5
+    assert curve.loc[1000, 'incremental'] == 6.5
+
+
+def test_store_roundtrip(tmp_path):
+    store = str(tmp_path / 'store')
+    runs = make_runs()
+    assert append_runs(runs, store) == len(runs)
+    assert (tmp_path / 'store' / 'strategy=full' / 'run_month=2025-07').is_dir()
+    loaded = load_runs(store, columns=['strategy', 'initial_records', 'restore_time_s'], where={'strategy': 'full'})
+    assert list(loaded.columns) == ['strategy', 'initial_records', 'restore_time_s']
+    # Warm-up runs are skipped unless asked for
+    assert len(loaded) == 8
+    assert len(load_runs(store, where={'run_month': '2025-06'}, include_warmup=True)) == 8
+    assert load_runs(str(tmp_path / 'missing'), columns=['strategy']).empty
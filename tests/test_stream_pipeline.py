@@ -0,0 +1,100 @@
+import gzip
+import hashlib
+import io
+import os
+import zlib
+
+import pytest
+import zstandard
+
+from stream_pipeline import (ALIGNMENT, NONCE_SIZE, CompressStage, DecompressStage, DecryptStage, DiscardSink,
+                             EncryptStage, FileSink, FileSource, HashStage, Pipeline, StreamSource, load_key,
+                             summarize)
+
+BLOCK = 64 * 1024
+KEY = bytes(range(32))
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+def payload(size):
+    # Compressible but not trivially so, and not a multiple of the block size
+    words = [b'INSERT', b'INTO', b'`customers`', b'VALUES', b'(1,', b"'John',", b"'555-0100');", b'\n']
+    out = io.BytesIO()
+    i = 0
+    while out.tell() < size:
+        out.write(words[i % len(words)] + b' ' + str(i * 7919 % 100003).encode())
+        i += 1
+    return out.getvalue()[:size]
+
+
+def write_file(path, transforms, data, sink='buffered'):
+    return Pipeline(StreamSource(io.BytesIO(data)), transforms, FileSink(str(path), sink), block_size=BLOCK).run()
+
+
+def read_file(path, transforms):
+    out = path.with_name(path.name + '.out')
+    Pipeline(FileSource(str(path)), transforms, FileSink(str(out)), block_size=BLOCK).run()
+    return out.read_bytes()
+
+
+@pytest.mark.parametrize('sink', ['buffered', 'fadvise', 'direct'])
+@pytest.mark.parametrize('codec', ['gzip', 'zstd'])
+def test_compressed_roundtrip(tmp_path, codec, sink):
+    data = payload(5 * BLOCK + 1234)
+    path = tmp_path / f"dump.sql.{codec}"
+    hasher = HashStage()
+    stages = write_file(path, [hasher, CompressStage(codec, 3)], data, sink)
+    assert hasher.hexdigest() == hashlib.sha256(data).hexdigest()
+    assert stages[0]['MB_out'] == round(len(data) / 1024 / 1024, 2)
+    assert os.path.getsize(path) < len(data)
+    # The container is the plain format: stock readers open it
+    with open(path, 'rb') as f:
+        raw = f.read()
+    stock = gzip.decompress if codec == 'gzip' else zstandard.ZstdDecompressor().decompressobj().decompress
+    assert stock(raw) == data
+    assert read_file(path, [DecompressStage(codec)]) == data
+    assert 'bottleneck' in summarize(stages)
+
+
+@pytest.mark.parametrize('size', [BLOCK * 3, BLOCK * 3 + 1, ALIGNMENT - 1, 1])
+def test_direct_sink_truncates_padded_tail(tmp_path, size):
+    data = payload(size)
+    path = tmp_path / 'dump.sql'
+    sink = FileSink(str(path), 'direct')
+    Pipeline(StreamSource(io.BytesIO(data)), [], sink, block_size=BLOCK).run()
+    assert sink.mode in ('direct', 'fadvise')   # tmpfs refuses O_DIRECT
+    assert os.path.getsize(path) == size
+    assert path.read_bytes() == data
+
+
+def test_encrypted_roundtrip(tmp_path):
+    pytest.importorskip('cryptography')
+    data = payload(3 * BLOCK + 17)
+    path = tmp_path / 'dump.sql.zst'
+    write_file(path, [CompressStage('zstd', 3), EncryptStage(KEY)], data, 'direct')
+    stored = path.read_bytes()
+    # Random initial counter block, then ciphertext: no zstd magic where the frame starts
+    assert len(stored) > NONCE_SIZE and stored[NONCE_SIZE:NONCE_SIZE + 4] != ZSTD_MAGIC
+    assert read_file(path, [DecryptStage(KEY), DecompressStage('zstd')]) == data
+    # A different key decrypts to garbage that is not a zstd frame
+    with pytest.raises(zstandard.ZstdError):
+        read_file(path, [DecryptStage(bytes(32)), DecompressStage('zstd')])
+
+
+def test_failed_stage_aborts_pipeline(tmp_path):
+    path = tmp_path / 'not_gzip.gz'
+    path.write_bytes(payload(2 * BLOCK))
+    with pytest.raises(zlib.error):
+        Pipeline(FileSource(str(path)), [DecompressStage('gzip')], DiscardSink(), block_size=BLOCK).run()
+
+
+def test_load_key(tmp_path):
+    raw = tmp_path / 'raw.key'
+    raw.write_bytes(KEY)
+    text = tmp_path / 'hex.key'
+    text.write_text(KEY.hex() + '\n')
+    assert load_key(str(raw)) == load_key(str(text)) == KEY
+    short = tmp_path / 'short.key'
+    short.write_bytes(KEY[:16])
+    with pytest.raises(ValueError):
+        load_key(str(short))
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from workload import Workload, _cascade_targets, _ColumnGenerator, _expand_tables, create_table_sql, split_count
+
+SPEC = {
+    'seed': 7,
+    'mix': {'insert': 0.6, 'update': 0.3, 'delete': 0.1},
+    'tables': [
+        {'name': 'accounts', 'share': 1,
+         'columns': [{'name': 'email', 'type': 'varchar', 'length': 120},
+                     {'name': 'bio', 'type': 'text', 'length': 400},
+                     {'name': 'status', 'type': 'enum', 'values': ['active', "o'neil"]}],
+         'indexes': [['email'], ['bio', 'status']]},
+        {'name': 'orders', 'share': 4,
+         'columns': [{'name': 'account_id', 'type': 'int', 'references': 'accounts'},
+                     {'name': 'total', 'type': 'decimal'}]},
+        {'name': 'events', 'count': 3, 'share': 0.6,
+         'columns': [{'name': 'payload', 'type': 'blob', 'length': 200000}]},
+    ],
+}
+
+
+@pytest.mark.parametrize('total, shares', [(10, [1, 4, 0.2, 0.2, 0.2]), (7, [1, 1, 1]), (0, [1, 2]), (1, [3, 1])])
+def test_split_count_adds_up(total, shares):
+    counts = split_count(total, shares)
+    assert sum(counts) == total
+    exact = np.asarray(shares) * total / sum(shares)
+    assert all(abs(c - e) < 1 for c, e in zip(counts, exact))
+
+
+def test_expand_tables():
+    tables = _expand_tables(SPEC)
+    assert [t['name'] for t in tables] == ['accounts', 'orders', 'events_1', 'events_2', 'events_3']
+    assert [t['share'] for t in tables] == pytest.approx([1, 4, 0.2, 0.2, 0.2])
+
+
+@pytest.mark.parametrize('tables, message', [
+    ([{'name': 't', 'columns': [{'name': 'c', 'type': 'json'}]}], "unknown type 'json'"),
+    ([{'name': 't', 'columns': [{'name': 'p', 'type': 'int', 'references': 'parents'}]}], "references 'parents'"),
+    ([{'name': 'p', 'count': 2, 'columns': []},
+      {'name': 't', 'columns': [{'name': 'p_id', 'type': 'int', 'references': 'p'}]}], "without 'count'"),
+])
+def test_expand_tables_rejects(tables, message):
+    with pytest.raises(ValueError, match=message):
+        _expand_tables({'tables': tables})
+
+
+def test_create_table_sql():
+    accounts, orders, events = _expand_tables(SPEC)[:3]
+    assert create_table_sql(accounts) == (
+        "CREATE TABLE `accounts` (\n"
+        "    `id` INT AUTO_INCREMENT PRIMARY KEY,\n"
+        "    `email` VARCHAR(120),\n"
+        "    `bio` TEXT,\n"
+        "    `status` ENUM('active', 'o''neil'),\n"
+        "    KEY `idx_email` (`email`),\n"
+        "    KEY `idx_bio_status` (`bio`(32), `status`)\n"
+        ")")
+    assert create_table_sql(orders) == (
+        "CREATE TABLE `orders` (\n"
+        "    `id` INT AUTO_INCREMENT PRIMARY KEY,\n"
+        "    `account_id` INT NOT NULL,\n"
+        "    `total` DECIMAL(12,2),\n"
+        "    KEY `idx_account_id` (`account_id`),\n"
+        "    CONSTRAINT `fk_orders_account_id` FOREIGN KEY (`account_id`) REFERENCES `accounts` (`id`) "
+        "ON DELETE CASCADE\n"
+        ")")
+    assert "`payload` MEDIUMBLOB" in create_table_sql(events)
+
+
+def test_column_values_widths_and_seed():
+    words = np.array(['alpha', 'beta', 'gamma', 'delta'], dtype=object)
+    column = {'name': 'bio', 'type': 'varchar', 'length': 60}
+    values = _ColumnGenerator(column, np.random.default_rng(1), words).values(500)
+    assert all(30 <= len(v) <= 60 for v in values)
+    assert _ColumnGenerator(column, np.random.default_rng(1), words).values(500) == values
+    blobs = _ColumnGenerator({'name': 'b', 'type': 'blob', 'length': 64}, np.random.default_rng(1), words).values(50)
+    assert all(isinstance(b, bytes) and 32 <= len(b) <= 64 for b in blobs)
+    dates = _ColumnGenerator({'name': 'd', 'type': 'datetime'}, np.random.default_rng(1), words).values(5)
+    assert all(len(d) == 19 and d[10] == ' ' for d in dates)
+
+
+def test_workload_mix_is_normalized():
+    workload = Workload(dict(SPEC, mix={'insert': 3, 'delete': 1}), conn_params={})
+    assert workload.mix == {'insert': 0.75, 'update': 0.0, 'delete': 0.25}
+    assert workload.table_names == ['accounts', 'orders', 'events_1', 'events_2', 'events_3']
+
+
+def test_cascade_targets():
+    spec = {'tables': [
+        {'name': 'accounts', 'columns': []},
+        {'name': 'orders', 'columns': [{'name': 'account_id', 'type': 'int', 'references': 'accounts'}]},
+        {'name': 'items', 'columns': [{'name': 'order_id', 'type': 'int', 'references': 'orders'}]},
+        {'name': 'notes', 'columns': [{'name': 'account_id', 'type': 'int', 'references': 'accounts'}]},
+        {'name': 'events', 'count': 2, 'columns': []},
+    ]}
+    assert _cascade_targets(_expand_tables(spec)) == {
+        'accounts': {'orders', 'items', 'notes'}, 'orders': {'items'}, 'items': set(), 'notes': set(),
+        'events_1': set(), 'events_2': set()}
+
+
+@pytest.mark.parametrize('mix', [{'insert': 0, 'update': 0, 'delete': 0}, {}, {'insert': 2, 'delete': -1}])
+def test_workload_mix_rejects(mix):
+    with pytest.raises(ValueError, match='mix'):
+        Workload(dict(SPEC, mix=mix), conn_params={})
+
+
+def test_insert_skips_rows_without_parent():
+    workload = Workload(SPEC, conn_params={})
+    orders = workload.tables[1]
+    # No accounts loaded yet: nothing to reference, so nothing reaches the server
+    assert workload._insert(None, orders, 5) == 0
+    assert workload.skipped == 5
@@ -0,0 +1,383 @@
+import json
+import sys
+import time
+
+import numpy as np
+from faker import Faker
+
+from data_loader import DEFAULT_BATCH_SIZE, iter_batches, load_rows
+from db_pool import pooled_connection
+
+# --- Config ---
+DEFAULT_SEED = 42
+TEXT_POOL_SIZE = 5000           # pre-built values per text column; rows sample from it
+WORD_VOCAB_SIZE = 2000
+INDEX_PREFIX = 32               # indexed TEXT/BLOB columns use a prefix of this many characters
+PACKET_BUDGET = 16 * 1024 * 1024  # max bytes per multi-row INSERT, well under max_allowed_packet
+DEFAULT_MIX = {'insert': 1.0, 'update': 0.0, 'delete': 0.0}
+
+# Column type -> SQL type (char/varchar take `length`, enum takes `values`)
+COLUMN_TYPES = {
+    'int': 'INT', 'bigint': 'BIGINT', 'decimal': 'DECIMAL(12,2)', 'double': 'DOUBLE', 'bool': 'TINYINT(1)',
+    'date': 'DATE', 'datetime': 'DATETIME', 'char': 'CHAR', 'varchar': 'VARCHAR', 'text': 'TEXT', 'blob': 'BLOB',
+    'enum': 'ENUM',
+}
+_TEXT_TYPES = ('char', 'varchar', 'text')
+_PREFIX_TYPES = ('text', 'blob')
+# Value length of the variable-width types when a column gives no `length`
+_DEFAULT_LENGTHS = {'char': 20, 'varchar': 100, 'text': 1000, 'blob': 1024}
+
+
+# --- Workload definition ---
+# A JSON file lists the tables in creation order (see workload_example.json):
+#
+#   {"seed": 42,
+#    "mix": {"insert": 0.6, "update": 0.3, "delete": 0.1},
+#    "tables": [
+#      {"name": "accounts", "share": 1,
+#       "columns": [{"name": "email", "type": "varchar", "length": 120}, ...],
+#       "indexes": [["email"], ["status", "created_at"]]},
+#      {"name": "orders", "share": 4,
+#       "columns": [{"name": "account_id", "type": "int", "references": "accounts"}, ...]},
+#      {"name": "events", "count": 20, "share": 0.5, "columns": [...]}]}
+#
+# Every table gets an `id` AUTO_INCREMENT primary key. Row counts passed to
+# seed_rows() / apply_batch() are split across tables by `share`; `count` expands
+# one spec into name_1 .. name_N. `references` adds an index and a foreign
+# key (ON DELETE CASCADE) to an earlier, non-repeated table. `length` is the
+# maximum width of char/varchar/text/blob values; generated values vary
+# between half and all of it. Batches follow `mix`: inserts, updates of
+# random live rows (all non-key columns rewritten) and deletes.
+def _expand_tables(spec):
+    tables, repeated = [], set()
+    for table in spec['tables']:
+        for column in table['columns']:
+            if column['type'] not in COLUMN_TYPES:
+                raise ValueError(f"{table['name']}.{column['name']}: unknown type '{column['type']}', "
+                                 f"expected one of {sorted(COLUMN_TYPES)}")
+            parent = column.get('references')
+            if parent is not None and (parent in repeated or parent not in {t['name'] for t in tables}):
+                raise ValueError(f"{table['name']}.{column['name']} references '{parent}', "
+                                 f"which must be an earlier table without 'count'")
+        count = table.get('count', 1)
+        if count == 1:
+            tables.append(dict(table, share=table.get('share', 1.0)))
+        else:
+            repeated.add(table['name'])
+            share = table.get('share', 1.0) / count
+            tables += [dict(table, name=f"{table['name']}_{i}", share=share) for i in range(1, count + 1)]
+    return tables
+
+
+def _column_sql(column):
+    kind = column['type']
+    if column.get('references'):
+        return f"`{column['name']}` INT NOT NULL"
+    if kind in ('char', 'varchar'):
+        sql_type = f"{COLUMN_TYPES[kind]}({column.get('length', 100)})"
+    elif kind == 'text':
+        sql_type = 'MEDIUMTEXT' if column.get('length', 1000) > 65535 else 'TEXT'
+    elif kind == 'blob':
+        sql_type = 'MEDIUMBLOB' if column.get('length', 1024) > 65535 else 'BLOB'
+    elif kind == 'enum':
+        sql_type = "ENUM(" + ", ".join("'" + v.replace("'", "''") + "'" for v in column['values']) + ")"
+    else:
+        sql_type = COLUMN_TYPES[kind]
+    return f"`{column['name']}` {sql_type}"
+
+
+def create_table_sql(table):
+    types = {c['name']: c['type'] for c in table['columns']}
+    lines = ["`id` INT AUTO_INCREMENT PRIMARY KEY"] + [_column_sql(c) for c in table['columns']]
+    indexes = [list(index) for index in table.get('indexes', [])]
+    indexes += [[c['name']] for c in table['columns'] if c.get('references') and [c['name']] not in indexes]
+    for index in indexes:
+        parts = ', '.join(f"`{c}`({INDEX_PREFIX})" if types[c] in _PREFIX_TYPES else f"`{c}`" for c in index)
+        lines.append(f"KEY `idx_{'_'.join(index)}` ({parts})")
+    for column in table['columns']:
+        if column.get('references'):
+            lines.append(f"CONSTRAINT `fk_{table['name']}_{column['name']}` FOREIGN KEY (`{column['name']}`) "
+                         f"REFERENCES `{column['references']}` (`id`) ON DELETE CASCADE")
+    return f"CREATE TABLE `{table['name']}` (\n    " + ",\n    ".join(lines) + "\n)"
+
+
+# Tables an ON DELETE CASCADE from each table can reach, directly or through other tables
+def _cascade_targets(tables):
+    children = {t['name']: {c['name'] for c in tables for col in c['columns'] if col.get('references') == t['name']}
+                for t in tables}
+    targets = {}
+    for table in reversed(tables):      # children come after their parents
+        reached = set(children[table['name']])
+        for child in children[table['name']]:
+            reached |= targets[child]
+        targets[table['name']] = reached
+    return targets
+
+
+def split_count(total, shares):
+    weights = np.asarray(shares, dtype=float)
+    exact = total * weights / weights.sum()
+    counts = np.floor(exact).astype(int)
+    # Largest remainders get the leftover rows so the parts add up to total
+    for i in np.argsort(exact - counts)[::-1][:total - counts.sum()]:
+        counts[i] += 1
+    return counts.tolist()
+
+
+# --- Value generation ---
+# Text values are built once per column from a Faker word vocabulary and
+# sampled by index (like RowPool), so they compress like real text; BLOBs
+# are fresh random bytes per row. Same seed, same data.
+class _ColumnGenerator:
+    def __init__(self, column, rng, words):
+        self.column = column
+        self.kind = column['type']
+        self.rng = rng
+        self.length = column.get('length', _DEFAULT_LENGTHS.get(self.kind, 0))
+        if self.kind in _TEXT_TYPES:
+            self.pool = self._text_pool(words)
+
+    def _text_pool(self, words):
+        low = self.length if self.kind == 'char' else max(self.length // 2, 1)
+        widths = self.rng.integers(low, self.length + 1, TEXT_POOL_SIZE)
+        # Average English word + space is ~7 characters; overshoot, then cut to width
+        counts = widths // 6 + 2
+        picks = words[self.rng.integers(0, len(words), int(counts.sum()))]
+        values, start = [], 0
+        for count, width in zip(counts, widths):
+            values.append(' '.join(picks[start:start + count])[:width])
+            start += count
+        return np.array(values, dtype=object)
+
+    def values(self, n):
+        rng = self.rng
+        kind = self.kind
+        if kind in _TEXT_TYPES:
+            return self.pool[rng.integers(0, len(self.pool), n)].tolist()
+        if kind == 'blob':
+            widths = rng.integers(max(self.length // 2, 1), self.length + 1, n)
+            data = rng.bytes(int(widths.sum()))
+            ends = np.cumsum(widths)
+            return [data[end - width:end] for end, width in zip(ends.tolist(), widths.tolist())]
+        if kind == 'int':
+            return rng.integers(0, 1_000_000, n).tolist()
+        if kind == 'bigint':
+            return rng.integers(0, 10 ** 12, n).tolist()
+        if kind == 'decimal':
+            return np.round(rng.uniform(0, 100_000, n), 2).tolist()
+        if kind == 'double':
+            return (rng.random(n) * 10_000).tolist()
+        if kind == 'bool':
+            return rng.integers(0, 2, n).tolist()
+        if kind in ('date', 'datetime'):
+            # 2015-01-01 .. 2025-01-01
+            seconds = np.datetime64('2015-01-01T00:00:00') + rng.integers(0, 315_532_800, n).astype('timedelta64[s]')
+            text = seconds.astype('datetime64[D]' if kind == 'date' else 'datetime64[s]').astype(str)
+            return np.char.replace(text, 'T', ' ').tolist()
+        if kind == 'enum':
+            return np.array(self.column['values'], dtype=object)[rng.integers(0, len(self.column['values']), n)].tolist()
+        raise ValueError(f"Unknown column type '{kind}'")
+
+
+# --- Workload ---
+class Workload:
+    def __init__(self, spec, conn_params, seed=None, batch_size=DEFAULT_BATCH_SIZE, method='executemany'):
+        self.spec = spec
+        self.conn_params = conn_params
+        self.batch_size = batch_size
+        self.method = method
+        self.seed = spec.get('seed', DEFAULT_SEED) if seed is None else seed
+        self.rng = np.random.default_rng(self.seed)
+        mix = spec.get('mix', DEFAULT_MIX)
+        total = sum(mix.get(op, 0.0) for op in DEFAULT_MIX)
+        if total <= 0 or any(mix.get(op, 0.0) < 0 for op in DEFAULT_MIX):
+            raise ValueError(f"Workload mix {mix}: shares must be non-negative with a positive total")
+        self.mix = {op: mix.get(op, 0.0) / total for op in DEFAULT_MIX}
+        self.tables = _expand_tables(spec)
+
+        fake = Faker()
+        fake.seed_instance(self.seed)
+        words = np.array([fake.word() for _ in range(WORD_VOCAB_SIZE)], dtype=object)
+        self.generators = {t['name']: [_ColumnGenerator(c, self.rng, words) for c in t['columns']
+                                       if not c.get('references')] for t in self.tables}
+        # Ids that exist in each table, read back from the server after every
+        # insert: LOAD DATA and the interleaved AUTO_INCREMENT lock modes can
+        # leave gaps, so ids are never assumed to be 1..N. A delete marks every
+        # table its ON DELETE CASCADE reaches as stale; those are re-read before use.
+        self.ids = {t['name']: np.array([], dtype=np.int64) for t in self.tables}
+        self.cascades = _cascade_targets(self.tables)
+        self.stale = set()
+        self.skipped = 0    # child rows not inserted in the last run: no parent row left to reference
+
+    @classmethod
+    def load(cls, path, conn_params, **kwargs):
+        with open(path) as f:
+            return cls(json.load(f), conn_params, **kwargs)
+
+    @property
+    def table_names(self):
+        return [t['name'] for t in self.tables]
+
+    def _connection(self):
+        return pooled_connection(self.conn_params, allow_local_infile=(self.method == 'infile'))
+
+    def create_schema(self):
+        conn = self._connection()
+        cursor = conn.cursor()
+        cursor.execute("SET SESSION foreign_key_checks = 0")
+        for table in reversed(self.tables):
+            cursor.execute(f"DROP TABLE IF EXISTS `{table['name']}`")
+        cursor.execute("SET SESSION foreign_key_checks = 1")
+        for table in self.tables:
+            cursor.execute(create_table_sql(table))
+        conn.commit()
+        cursor.close()
+        conn.close()
+        indexes = sum(len(t.get('indexes', [])) for t in self.tables)
+        print(f"[✔] Workload schema: {len(self.tables)} tables, {indexes} secondary indexes, "
+              f"{sum(1 for t in self.tables for c in t['columns'] if c.get('references'))} foreign keys")
+
+    def _read_ids(self, conn, table, after=0):
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT `id` FROM `{table}` WHERE `id` > %s ORDER BY `id`", (after,))
+        ids = np.array([row[0] for row in cursor.fetchall()], dtype=np.int64)
+        cursor.close()
+        return ids
+
+    def _known_ids(self, conn, table):
+        if table in self.stale:
+            self.ids[table] = self._read_ids(conn, table)
+            self.stale.discard(table)
+        return self.ids[table]
+
+    # Random ids of rows that exist
+    def _live_ids(self, conn, table, n):
+        ids = self._known_ids(conn, table)
+        if n <= 0 or not len(ids):
+            return np.array([], dtype=np.int64)
+        return self.rng.choice(ids, n)
+
+    def _rows(self, conn, table, n):
+        columns = []
+        generated = iter([g.values(n) for g in self.generators[table['name']]])
+        for column in table['columns']:
+            if column.get('references'):
+                columns.append([int(i) for i in self._live_ids(conn, column['references'], n)])
+            else:
+                columns.append(next(generated))
+        return list(zip(*columns))
+
+    def _insert(self, conn, table, n):
+        if n <= 0:
+            return 0
+        # Deletes can empty a parent table; its children are skipped and counted
+        # rather than generated without a parent id to reference
+        empty = [c['references'] for c in table['columns']
+                 if c.get('references') and not len(self._known_ids(conn, c['references']))]
+        if empty:
+            print(f"[!] Skipped {n} rows of {table['name']}: no rows in {', '.join(empty)} to reference")
+            self.skipped += n
+            return 0
+        names = [f"`{c['name']}`" for c in table['columns']]
+        method = self.method
+        if method == 'infile' and any(c['type'] == 'blob' for c in table['columns']):
+            method = 'multirow'     # CSV files carry text, not binary
+        # Wide rows get smaller batches so one INSERT stays under the packet budget
+        width = sum(c.get('length', _DEFAULT_LENGTHS[c['type']]) for c in table['columns']
+                    if c['type'] in _DEFAULT_LENGTHS) + 64
+        batch_size = max(1, min(self.batch_size, PACKET_BUDGET // width))
+        stats = load_rows(conn, f"`{table['name']}`", names, self._rows(conn, table, n), batch_size, method,
+                          verbose=False)
+        known = self.ids[table['name']]
+        new = self._read_ids(conn, table['name'], int(known[-1]) if len(known) else 0)
+        self.ids[table['name']] = np.concatenate([known, new])
+        return stats['rows']
+
+    def _update(self, conn, table, n):
+        ids = self._live_ids(conn, table['name'], n)
+        columns = [c for c in table['columns'] if not c.get('references')]
+        if not len(ids) or not columns:
+            return 0
+        cursor = conn.cursor()
+        sets = ', '.join(f"`{c['name']}` = %s" for c in columns)
+        values = [g.values(len(ids)) for g in self.generators[table['name']]]
+        rows = [row + (int(i),) for row, i in zip(zip(*values), ids)]
+        updated = 0
+        for batch in iter_batches(rows, self.batch_size):
+            cursor.executemany(f"UPDATE `{table['name']}` SET {sets} WHERE `id` = %s", batch)
+            updated += cursor.rowcount
+            conn.commit()
+        cursor.close()
+        return updated
+
+    def _delete(self, conn, table, n):
+        ids = np.unique(self._live_ids(conn, table['name'], n)).tolist()
+        if not ids:
+            return 0
+        cursor = conn.cursor()
+        deleted = 0
+        for batch in iter_batches(ids, self.batch_size):
+            cursor.execute(f"DELETE FROM `{table['name']}` WHERE `id` IN ({', '.join(['%s'] * len(batch))})", batch)
+            deleted += cursor.rowcount
+            conn.commit()
+        cursor.close()
+        self.ids[table['name']] = self.ids[table['name']][~np.isin(self.ids[table['name']], ids)]
+        self.stale.update(self.cascades[table['name']])
+        return deleted
+
+    def _run(self, counts_by_op, label):
+        start = time.time()
+        conn = self._connection()
+        done = {'inserted': 0, 'updated': 0, 'deleted': 0}
+        self.skipped = 0
+        try:
+            for op, key, action in (('insert', 'inserted', self._insert), ('update', 'updated', self._update),
+                                    ('delete', 'deleted', self._delete)):
+                # Deletes run children first so the cascade work stays inside the parent's statement
+                tables = list(reversed(self.tables)) if op == 'delete' else self.tables
+                counts = dict(zip(self.table_names, split_count(counts_by_op[op], [t['share'] for t in self.tables])))
+                for table in tables:
+                    done[key] += action(conn, table, counts[table['name']])
+        finally:
+            conn.close()
+        duration = time.time() - start
+        rows = sum(done.values())
+        rows_per_s = round(rows / duration, 1) if duration > 0 else 0.0
+        stats = dict(done, rows=rows, load_time_s=round(duration, 2), rows_per_s=rows_per_s, workers=1,
+                     worker_rows_per_s_min=rows_per_s, worker_rows_per_s_max=rows_per_s, skipped=self.skipped)
+        print(f"[i] Workload {label}: {done['inserted']} inserted, {done['updated']} updated, "
+              f"{done['deleted']} deleted, {self.skipped} skipped over {len(self.tables)} tables in {stats['load_time_s']}s "
+              f"({stats['rows_per_s']} rows/s)")
+        return stats
+
+    # Initial data: inserts only
+    def seed_rows(self, count):
+        return self._run({'insert': count, 'update': 0, 'delete': 0}, 'seed')
+
+    # One incremental batch of `count` row operations split by the mix
+    def apply_batch(self, count):
+        counts = dict(zip(DEFAULT_MIX, split_count(count, [self.mix[op] for op in DEFAULT_MIX])))
+        return self._run(counts, 'batch')
+
+    # Rows in the workload tables now. Batches delete as well as insert, and
+    # cascades remove child rows too, so this is counted rather than derived
+    # from seeded + batch rows
+    def row_count(self):
+        conn = self._connection()
+        cursor = conn.cursor()
+        total = 0
+        for table in self.table_names:
+            cursor.execute(f"SELECT COUNT(*) FROM `{table}`")
+            total += cursor.fetchone()[0]
+        cursor.close()
+        conn.close()
+        return total
+
+
+# --- Preview the DDL of a workload file ---
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else 'workload_example.json'
+    with open(path) as f:
+        spec = json.load(f)
+    for table in _expand_tables(spec):
+        print(create_table_sql(table) + ";\n")